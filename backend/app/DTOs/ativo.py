@@ -3,6 +3,7 @@ from decimal import Decimal
 from datetime import date
 
 class AtivoDTO(BaseModel):
+    id_ativo      : int     | None = None
     cd_ativo      : str     | None
     cd_isin       : str     | None
     perc_indexador: float   | None
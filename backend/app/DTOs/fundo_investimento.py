@@ -15,7 +15,7 @@ class ArquivoOriginalDTO(BaseModel):
     id_fundo_investimento: int
     nm_arquivo: str
     nm_arquivo_original: str
-    conteudo_arquivo: str
+    ds_armazenamento: str = "banco"
     hash_arquivo: str
     tamanho_arquivo: int
     fl_processado: bool = False
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 
 class IndexadorDTO(BaseModel):
+    id_indexador : int | None = None
     cd_indexador : str | None
     sgl_indexador: str | None
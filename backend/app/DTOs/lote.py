@@ -3,6 +3,7 @@ from datetime import date
 from decimal import Decimal
 
 class LoteDTO(BaseModel):
+    id_lote     : int     | None = None
     vl_pu_compra: Decimal | None
     qtd_comprada: Decimal | None
     dt_operacao : date    | None
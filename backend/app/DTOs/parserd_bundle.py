@@ -10,3 +10,29 @@ class ParsedBundleDTO(BaseModel):
     indexador: IndexadorDTO
     lote     : LoteDTO
     posicao  : PosicaoDTO
+
+    def to_row(self) -> tuple:
+        """Serializa o bundle em uma tupla compacta (barata de picklar entre processos)."""
+        return tuple(
+            getattr(getattr(self, attr), campo)
+            for attr, _, campos in _ROW_LAYOUT
+            for campo in campos
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "ParsedBundleDTO":
+        """Reconstrói o bundle a partir de `to_row`, sem revalidar (os dados já foram validados)."""
+        valores = iter(row)
+        return cls.model_construct(**{
+            attr: dto.model_construct(**{campo: next(valores) for campo in campos})
+            for attr, dto, campos in _ROW_LAYOUT
+        })
+
+
+# Ordem dos campos na tupla de `ParsedBundleDTO.to_row`
+_ROW_LAYOUT = (
+    ("lote",      LoteDTO,      ("vl_pu_compra", "qtd_comprada", "dt_operacao")),
+    ("indexador", IndexadorDTO, ("cd_indexador", "sgl_indexador")),
+    ("ativo",     AtivoDTO,     ("cd_ativo", "cd_isin", "perc_indexador", "perc_cupom", "vl_pu_emissao", "dt_emissao", "dt_vencimento")),
+    ("posicao",   PosicaoDTO,   ("vl_pu_posicao", "vl_principal", "vl_financeiro_disponivel", "dt_posicao")),
+)
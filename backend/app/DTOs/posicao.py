@@ -3,6 +3,7 @@ from datetime import date
 from decimal import Decimal
 
 class PosicaoDTO(BaseModel):
+    id_posicao              : int     | None = None
     vl_pu_posicao           : Decimal | None
     vl_principal            : Decimal | None
     vl_financeiro_disponivel: Decimal | None
@@ -2,7 +2,16 @@ from sqlalchemy import create_engine
 from .settings import get_settings
 from sqlalchemy.orm import sessionmaker, Session
 
-engine       = create_engine(get_settings().database_url, echo=True)
+_settings    = get_settings()
+engine       = create_engine(
+    _settings.database_url,
+    echo          = _settings.DB_ECHO,
+    pool_size     = _settings.DB_POOL_SIZE,
+    max_overflow  = _settings.DB_MAX_OVERFLOW,
+    pool_timeout  = _settings.DB_POOL_TIMEOUT,
+    pool_recycle  = _settings.DB_POOL_RECYCLE,
+    pool_pre_ping = True,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
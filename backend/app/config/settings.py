@@ -10,6 +10,78 @@ class Settings(BaseSettings):
     POSTGRES_DB      : str
     DEBUG            : bool = False
 
+    # Rotas síncronas (def) e run_in_threadpool rodam no threadpool do anyio, limitado a API_THREADS;
+    # o pool de conexões comporta todas as threads (DB_POOL_SIZE + DB_MAX_OVERFLOW >= API_THREADS)
+    API_THREADS    : int   = 40
+    DB_POOL_SIZE   : int   = 20
+    DB_MAX_OVERFLOW: int   = 20
+    DB_POOL_TIMEOUT: float = 30.0  # espera máxima por uma conexão livre
+    DB_POOL_RECYCLE: int   = 1800  # segundos até reabrir uma conexão
+    DB_ECHO        : bool  = False  # loga todo SQL (custo alto por requisição; só para depuração)
+
+    # Ingestão: persistência em lote (INSERT multi-linha) ou linha a linha (fallback)
+    INGESTION_BULK      : bool = True
+    INGESTION_CHUNK_SIZE: int  = 1000
+    # "append" insere tudo de novo a cada upload; "upsert" reaproveita Ativo/Lote pela chave natural
+    INGESTION_MODE      : str  = "append"
+
+    # Parsing de uploads com vários arquivos em pool de processos (None = nº de CPUs)
+    PARSER_PROCESS_POOL: bool       = True
+    PARSER_MAX_WORKERS : int | None = None
+
+    # Conteúdo dos XMLs enviados: no banco (gzip) ou, se definido, em um diretório local endereçado pelo hash
+    ARQUIVO_BLOB_DIR: str | None = None
+
+    # Jobs de ingestão: uploads com processamento em segundo plano (worker.py)
+    INGESTION_ASYNC     : bool  = False  # padrão quando a rota não recebe `background`
+    JOB_POLL_SEGUNDOS   : float = 2.0    # intervalo de consulta da fila quando ela está vazia
+    JOB_TIMEOUT_SEGUNDOS: int   = 600    # sem heartbeat por esse tempo, o job volta para a fila
+    JOB_MAX_TENTATIVAS  : int   = 3
+
+    # Enriquecimento ANBIMA: requisições concorrentes com limite de taxa e novas tentativas
+    ANBIMA_MAX_CONCORRENCIA: int   = 4
+    ANBIMA_RATE_POR_SEGUNDO: float = 2.0   # token bucket compartilhado pelo processo
+    ANBIMA_RATE_RAJADA     : int   = 4     # capacidade do bucket (rajada máxima)
+    ANBIMA_TIMEOUT_SEGUNDOS: float = 30.0
+    ANBIMA_MAX_TENTATIVAS  : int   = 4
+    ANBIMA_BACKOFF_BASE    : float = 0.5   # backoff exponencial com jitter: até base * 2^tentativa
+    ANBIMA_BACKOFF_MAX     : float = 30.0
+    ANBIMA_EXTRATOR        : str   = "auto"  # "lxml" (opcional), "html.parser" ou "auto" (lxml se instalado)
+
+    # Proteção contra a ANBIMA fora do ar / limitando: circuit breaker e concorrência adaptativa (AIMD)
+    ANBIMA_CONCORRENCIA_INICIAL    : int   = 2     # cresce até ANBIMA_MAX_CONCORRENCIA enquanto as respostas forem boas
+    ANBIMA_LATENCIA_ALVO_SEGUNDOS  : float = 5.0   # resposta mais lenta que isso reduz a concorrência
+    ANBIMA_CIRCUITO_FALHAS         : int   = 5     # falhas seguidas (rede, 429, 5xx) que abrem o circuito
+    ANBIMA_CIRCUITO_ABERTO_SEGUNDOS: float = 60.0  # tempo recusando requisições antes de sondar de novo
+
+    # Cache das páginas da ANBIMA por cd_ativo (tb_cache_enriquecimento + LRU em memória)
+    ANBIMA_CACHE_TTL_HORAS       : float = 168.0  # resultados com dados
+    ANBIMA_CACHE_TTL_ERRO_MINUTOS: float = 60.0   # erros / páginas sem dados: tenta de novo antes
+    ANBIMA_CACHE_LRU_TAMANHO     : int   = 10000
+
+    # Cache das respostas do analytics (LRU por processo; a chave inclui a versão dos dados)
+    ANALYTICS_CACHE_ATIVO       : bool  = True
+    ANALYTICS_CACHE_TAMANHO     : int   = 512
+    ANALYTICS_CACHE_TTL_SEGUNDOS: float = 3600.0  # rede de segurança; a invalidação vem da versão
+    ANALYTICS_CACHE_LISTEN      : bool  = True    # versões via LISTEN/NOTIFY (sem consulta por requisição)
+
+    # Exportação em streaming das posições (cursor no servidor, lido em lotes)
+    EXPORTACAO_LOTE_LINHAS: int = 10000  # linhas por fetch do cursor e por row group do Parquet
+
+    # Fila persistente de enriquecimento (worker.py enriquecimento)
+    ENRIQUECIMENTO_LOTE            : int   = 50    # itens reservados por vez (buscados de forma concorrente)
+    ENRIQUECIMENTO_MAX_TENTATIVAS  : int   = 5
+    ENRIQUECIMENTO_BACKOFF_MINUTOS : float = 60.0  # base do backoff exponencial (>= TTL dos erros no cache)
+    ENRIQUECIMENTO_TIMEOUT_SEGUNDOS: int   = 900   # item "processando" sem heartbeat volta para a fila
+
+    # Agendador de atualização (worker.py agendador): reenfileira dados enriquecidos antigos
+    ENRIQUECIMENTO_IDADE_MAXIMA_DIAS     : int = 30
+    ENRIQUECIMENTO_ORCAMENTO_DIARIO      : int = 500  # atualizações (requisições) por dia, espalhadas pela janela
+    ENRIQUECIMENTO_JANELA_INICIO_HORA    : int = 1    # janela fora do pico, no fuso abaixo (fim < início cruza a meia-noite)
+    ENRIQUECIMENTO_JANELA_FIM_HORA       : int = 6
+    ENRIQUECIMENTO_FUSO                  : str = "America/Sao_Paulo"
+    ENRIQUECIMENTO_AGENDADOR_SEGUNDOS    : int = 60   # intervalo entre as rodadas do agendador
+
     @property
     def database_url(self) -> str:
         return f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.config import get_db
+from app.controllers.etag import etag_analytics
 from app.services.analytics import (
     get_overview_service, 
     get_indexadores_service, 
     get_ativos_service, 
     get_evolucao_mensal_service
 )
+from app.services.exportacao import exportar_posicoes_service
 from app.schemas.analytics import (
     OverviewResponse, 
     IndexadoresResponse, 
@@ -20,15 +23,15 @@ logger = logging.getLogger(__name__)
 
 analytics_routes = APIRouter(prefix="/analytics", tags=["Analytics"])
 
-@analytics_routes.get("/overview", response_model=OverviewResponse)
-async def get_overview(
+@analytics_routes.get("/overview", response_model=OverviewResponse, dependencies=[Depends(etag_analytics)])
+def get_overview(
     db: Session = Depends(get_db),
     fundo_id: Optional[int] = Query(None, description="ID do fundo específico"),
     enriched: bool = Query(False, description="Incluir dados enriquecidos"),
     date_from: Optional[str] = Query(None, description="Data inicial (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Data final (YYYY-MM-DD)"),
     indexador: Optional[str] = Query(None, description="Filtrar por indexador"),
-    codigo_ativo: Optional[str] = Query(None, description="Filtrar por código do ativo")
+    codigo_ativo: Optional[str] = Query(None, description="Filtrar por código ou ISIN do ativo (substring)")
 ):
     """Retorna visão geral dos dados do fundo"""
     try:
@@ -37,8 +40,8 @@ async def get_overview(
         logger.error(f"Erro ao buscar overview: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
-@analytics_routes.get("/ativos", response_model=AtivosResponse)
-async def get_ativos(
+@analytics_routes.get("/ativos", response_model=AtivosResponse, dependencies=[Depends(etag_analytics)])
+def get_ativos(
     db: Session = Depends(get_db),
     fundo_id: Optional[int] = Query(None, description="ID do fundo específico"),
     indexador: Optional[str] = Query(None, description="Filtrar por indexador"),
@@ -47,17 +50,21 @@ async def get_ativos(
     enriched: bool = Query(False, description="Incluir dados enriquecidos"),
     date_from: Optional[str] = Query(None, description="Data inicial (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Data final (YYYY-MM-DD)"),
-    codigo_ativo: Optional[str] = Query(None, description="Filtrar por código do ativo")
+    codigo_ativo: Optional[str] = Query(None, description="Filtrar por código ou ISIN do ativo (substring)"),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior (paginação em keyset; ignora offset)"),
+    contagem: Optional[str] = Query(None, pattern="^(exata|estimada|nenhuma)$", description="Total: exata, estimada (planner) ou nenhuma; padrão: exata só na primeira página")
 ):
     """Retorna lista de ativos com filtros"""
     try:
-        return get_ativos_service(db, fundo_id, indexador, limit, offset, enriched, date_from, date_to, codigo_ativo)
+        return get_ativos_service(db, fundo_id, indexador, limit, offset, enriched, date_from, date_to, codigo_ativo, cursor, contagem)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Erro ao buscar ativos: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
-@analytics_routes.get("/indexadores", response_model=IndexadoresResponse)
-async def get_indexadores(db: Session = Depends(get_db)):
+@analytics_routes.get("/indexadores", response_model=IndexadoresResponse, dependencies=[Depends(etag_analytics)])
+def get_indexadores(db: Session = Depends(get_db)):
     """Retorna estatísticas dos indexadores"""
     try:
         return get_indexadores_service(db)
@@ -65,18 +72,43 @@ async def get_indexadores(db: Session = Depends(get_db)):
         logger.error(f"Erro ao buscar indexadores: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
-@analytics_routes.get("/evolucao-mensal", response_model=EvolucaoMensalResponse)
-async def get_evolucao_mensal(
+@analytics_routes.get("/evolucao-mensal", response_model=EvolucaoMensalResponse, dependencies=[Depends(etag_analytics)])
+def get_evolucao_mensal(
     db: Session = Depends(get_db),
     ano: Optional[int] = Query(None, description="Ano para filtrar"),
     date_from: Optional[str] = Query(None, description="Data inicial (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Data final (YYYY-MM-DD)"),
     indexador: Optional[str] = Query(None, description="Filtrar por indexador"),
-    codigo_ativo: Optional[str] = Query(None, description="Filtrar por código do ativo")
+    codigo_ativo: Optional[str] = Query(None, description="Filtrar por código ou ISIN do ativo (substring)")
 ):
     """Retorna evolução mensal dos ativos"""
     try:
         return get_evolucao_mensal_service(db, ano, date_from, date_to, indexador, codigo_ativo)
     except Exception as e:
         logger.error(f"Erro ao buscar evolução mensal: {e}")
-        raise HTTPException(status_code=500, detail="Erro interno do servidor")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@analytics_routes.get("/exportar")
+def exportar_posicoes(
+    formato: str = Query("csv", pattern="^(csv|ndjson|parquet)$", description="csv, ndjson ou parquet (requer pyarrow)"),
+    fundo_id: Optional[int] = Query(None, description="ID do fundo específico"),
+    enriched: bool = Query(False, description="Incluir dados enriquecidos"),
+    date_from: Optional[str] = Query(None, description="Data inicial (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Data final (YYYY-MM-DD)"),
+    indexador: Optional[str] = Query(None, description="Filtrar por indexador"),
+    codigo_ativo: Optional[str] = Query(None, description="Filtrar por código ou ISIN do ativo (substring)")
+):
+    """Exporta (em streaming, em uma única requisição) todas as posições dos filtros"""
+    try:
+        media_type, nome_arquivo, conteudo = exportar_posicoes_service(
+            formato, fundo_id, enriched, date_from, date_to, indexador, codigo_ativo
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        conteudo,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'}
+    )
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import logging
 
 from app.config import get_db
 from app.services.enrichment_service import EnrichmentService
+from app.services.fila_enriquecimento import enfileirar_enriquecimento, get_status_fila_service
+from app.persiste.util.ativo_enriquecido import get_ativos_para_enriquecimento
 from app.schemas.enrichment import (
     EnrichmentStatusResponse,
     EnrichmentResultResponse,
     BulkEnrichmentRequest,
-    BulkEnrichmentResponse
+    BulkEnrichmentResponse,
+    FilaEnriquecimentoStatusResponse
 )
 
 logger = logging.getLogger(__name__)
@@ -17,7 +20,7 @@ logger = logging.getLogger(__name__)
 enrichment_routes = APIRouter(prefix="/enrichment", tags=["Enrichment"])
 
 @enrichment_routes.get("/status", response_model=EnrichmentStatusResponse)
-async def get_enrichment_status(db: Session = Depends(get_db)):
+def get_enrichment_status(db: Session = Depends(get_db)):
     """Retorna o status atual do enriquecimento dos ativos"""
     try:
         service = EnrichmentService()
@@ -31,8 +34,17 @@ async def get_enrichment_status(db: Session = Depends(get_db)):
         logger.error(f"Erro ao buscar status de enriquecimento: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
+@enrichment_routes.get("/fila", response_model=FilaEnriquecimentoStatusResponse)
+def get_fila_enriquecimento(db: Session = Depends(get_db)):
+    """Quantidade de itens da fila de enriquecimento por status (pendente, processando, concluido, erro)"""
+    try:
+        return get_status_fila_service(db)
+    except Exception as e:
+        logger.error(f"Erro ao buscar status da fila de enriquecimento: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
 @enrichment_routes.post("/enrich/{ativo_id}", response_model=EnrichmentResultResponse)
-async def enrich_single_ativo(
+def enrich_single_ativo(
     ativo_id: int,
     db: Session = Depends(get_db)
 ):
@@ -42,7 +54,9 @@ async def enrich_single_ativo(
         resultado = service.enrich_single_ativo(db, ativo_id)
         
         if not resultado['sucesso']:
-            raise HTTPException(status_code=400, detail=resultado.get('erro', 'Erro desconhecido'))
+            # ANBIMA indisponível (circuito aberto, 429/5xx): o cliente pode tentar de novo depois
+            status_code = 503 if resultado.get('transitorio') else 400
+            raise HTTPException(status_code=status_code, detail=resultado.get('erro', 'Erro desconhecido'))
         
         return EnrichmentResultResponse(**resultado)
     except HTTPException:
@@ -52,9 +66,8 @@ async def enrich_single_ativo(
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @enrichment_routes.post("/enrich/bulk", response_model=BulkEnrichmentResponse)
-async def enrich_multiple_ativos(
+def enrich_multiple_ativos(
     request: BulkEnrichmentRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Enriquece múltiplos ativos com dados da ANBIMA"""
@@ -62,15 +75,11 @@ async def enrich_multiple_ativos(
         service = EnrichmentService()
         
         if request.background:
-            # Executar em background
-            background_tasks.add_task(
-                service.enrich_multiple_ativos,
-                db,
-                request.ativo_ids
-            )
+            # Fila persistente, consumida por `worker.py enriquecimento`
+            total = enfileirar_enriquecimento(db, request.ativo_ids)
             return BulkEnrichmentResponse(
-                message="Enriquecimento iniciado em background",
-                total=len(request.ativo_ids),
+                message="Enriquecimento enfileirado",
+                total=total,
                 background=True
             )
         else:
@@ -83,10 +92,9 @@ async def enrich_multiple_ativos(
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @enrichment_routes.post("/enrich/pending", response_model=BulkEnrichmentResponse)
-async def enrich_pending_ativos(
+def enrich_pending_ativos(
     limit: int = Query(50, ge=1, le=200, description="Limite de ativos a processar"),
-    background: bool = Query(False, description="Executar em background"),
-    background_tasks: BackgroundTasks = None,
+    background: bool = Query(False, description="Enfileirar (worker de enriquecimento) em vez de executar na requisição"),
     db: Session = Depends(get_db)
 ):
     """Enriquece ativos pendentes de enriquecimento"""
@@ -94,16 +102,13 @@ async def enrich_pending_ativos(
         logger.info(f"Enriquecendo ativos pendentes - limit: {limit}, background: {background}")
         service = EnrichmentService()
         
-        if background and background_tasks:
-            # Executar em background
-            background_tasks.add_task(
-                service.enrich_pending_ativos,
-                db,
-                limit
-            )
+        if background:
+            # Fila persistente, consumida por `worker.py enriquecimento`
+            ativos_pendentes = get_ativos_para_enriquecimento(db, limit)
+            total = enfileirar_enriquecimento(db, [ativo.id_ativo for ativo in ativos_pendentes])
             return BulkEnrichmentResponse(
-                message="Enriquecimento de ativos pendentes iniciado em background",
-                total=0,
+                message="Enriquecimento de ativos pendentes enfileirado",
+                total=total,
                 background=True
             )
         else:
@@ -128,7 +133,7 @@ async def enrich_pending_ativos(
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @enrichment_routes.get("/ativos/{ativo_id}/enriched")
-async def get_ativo_enriched_data(
+def get_ativo_enriched_data(
     ativo_id: int,
     db: Session = Depends(get_db)
 ):
@@ -0,0 +1,61 @@
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from typing import Callable, List
+import hashlib
+
+from app.config import get_db
+from app.models.versao_dados import ESCOPO_GLOBAL, escopo_fundo
+from app.services.cache_analytics import escopos_consulta, versoes_dados
+
+
+def _escopos_analytics(request: Request) -> List[str]:
+    """Mesmos escopos do cache do analytics: o fundo filtrado (ou global) e, com enriched, o enriquecimento"""
+    fundo_id = request.query_params.get("fundo_id")
+    enriched = request.query_params.get("enriched", "").lower() in ("1", "true", "on", "yes")
+    return escopos_consulta(int(fundo_id) if fundo_id and fundo_id.isdigit() else None, enriched)
+
+
+def _escopos_globais(request: Request) -> List[str]:
+    return [ESCOPO_GLOBAL]
+
+
+def _escopos_fundo(request: Request) -> List[str]:
+    return [escopo_fundo(request.path_params["fundo_id"])]
+
+
+def calcular_etag(request: Request, versoes: dict) -> str:
+    """ETag forte: hash do caminho, da query (ordenada) e das versões dos dados"""
+    query = "&".join(f"{chave}={valor}" for chave, valor in sorted(request.query_params.multi_items()))
+    base = f"{request.url.path}?{query}|" + ",".join(f"{escopo}={versao}" for escopo, versao in sorted(versoes.items()))
+    return '"' + hashlib.sha256(base.encode()).hexdigest()[:32] + '"'
+
+
+def _etag_confere(if_none_match: str, etag: str) -> bool:
+    candidatos = [candidato.strip() for candidato in if_none_match.split(",")]
+    return "*" in candidatos or any(candidato.removeprefix("W/") == etag for candidato in candidatos)
+
+
+def etag_condicional(escopos: Callable[[Request], List[str]]) -> Callable:
+    """
+    Dependência de GET condicional: ETag pela versão dos dados dos `escopos`.
+
+    - `If-None-Match` igual ao ETag atual -> 304 antes de qualquer consulta da rota
+      (custa só a busca da versão, que normalmente nem vai ao banco).
+    - Caso contrário, a resposta sai com o ETag e `Cache-Control: no-cache`
+      (o navegador guarda, mas sempre revalida).
+    """
+    def dependencia(request: Request, response: Response, db: Session = Depends(get_db)) -> None:
+        etag = calcular_etag(request, versoes_dados(db, escopos(request)))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_confere(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return dependencia
+
+
+etag_analytics = etag_condicional(_escopos_analytics)
+etag_global = etag_condicional(_escopos_globais)
+etag_fundo = etag_condicional(_escopos_fundo)
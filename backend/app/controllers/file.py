@@ -1,8 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, Depends, status, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, status, HTTPException, Query, Response
+from typing import Optional, Union
 from app.utils import FileLoader, Parser
 from app.provider import get_file_loader, get_file_parser
 from app.services import upload_files_service
-from app.schemas import UploadFilesResponse
+from app.schemas import UploadFilesResponse, JobEnfileiradoResponse
+from app.services.ingestao_job import enfileirar_upload_arquivos, job_enfileirado_response
+from app.config import get_settings
 from sqlalchemy.orm import Session
 from app.config import get_db
 from logging_config import logger
@@ -12,17 +15,26 @@ file_routes = APIRouter(prefix="/file", tags=["Arquivos"])
 
 @file_routes.post(
     "/upload_files",
-    response_model = UploadFilesResponse,
+    response_model = Union[UploadFilesResponse, JobEnfileiradoResponse],
     status_code    = status.HTTP_201_CREATED,
+    responses      = {status.HTTP_202_ACCEPTED: {"model": JobEnfileiradoResponse}},
     summary        = "Recebe n arquivos xml com informações de uma posição de um fundo de investimentos e insere no banco de dados",
 )
 async def upload_files_route(
-    ls_files: list[UploadFile] = File(...),
-    db      : Session          = Depends(get_db),
-    loader  : FileLoader       = Depends(get_file_loader),
-    parser  : Parser           = Depends(get_file_parser)
+    response  : Response,
+    ls_files  : list[UploadFile] = File(...),
+    background: Optional[bool]   = Query(None, description="Processar em segundo plano (202 + id do job); padrão: INGESTION_ASYNC"),
+    enriquecer: bool             = Query(False, description="Enriquecer os ativos via ANBIMA após a ingestão (só em segundo plano)"),
+    db        : Session          = Depends(get_db),
+    loader    : FileLoader       = Depends(get_file_loader),
+    parser    : Parser           = Depends(get_file_parser)
 ):
     try:
+        if get_settings().INGESTION_ASYNC if background is None else background:
+            job = await enfileirar_upload_arquivos(db, ls_files, loader, enriquecer=enriquecer)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return job_enfileirado_response(job)
+
         bundles = await upload_files_service(ls_files=ls_files, db=db, loader=loader, parser=parser)
         return UploadFilesResponse(
             str_message              = "Arquivos processados com sucesso!",
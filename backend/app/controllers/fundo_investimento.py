@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 import logging
 
-from app.config import get_db
+from app.config import get_db, get_settings
 from app.services.fundo_investimento import FundoInvestimentoService
 from app.schemas.fundo_investimento import (
     FundoInvestimentoResponse,
@@ -12,14 +13,21 @@ from app.schemas.fundo_investimento import (
     FundoListResponse
 )
 from app.utils import FileLoader
+from app.controllers.etag import etag_fundo, etag_global
 
 logger = logging.getLogger(__name__)
 
 fundo_routes = APIRouter(prefix="/fundo", tags=["Fundo de Investimento"])
 
-@fundo_routes.post("/upload", response_model=UploadFundoResponse)
+@fundo_routes.post(
+    "/upload",
+    response_model=UploadFundoResponse,
+    responses={202: {"model": UploadFundoResponse, "description": "Arquivo armazenado; processamento enfileirado (ver /jobs/{id_job})"}}
+)
 async def upload_arquivo_fundo(
+    response: Response,
     arquivo: UploadFile = File(...),
+    background: Optional[bool] = Query(None, description="Processar em segundo plano (202 + id do job); padrão: INGESTION_ASYNC"),
     db: Session = Depends(get_db)
 ):
     """
@@ -36,7 +44,8 @@ async def upload_arquivo_fundo(
         
         # Processar upload
         service = FundoInvestimentoService()
-        resultado = await service.processar_upload_arquivo(db, arquivo, conteudo)
+        em_background = get_settings().INGESTION_ASYNC if background is None else background
+        resultado = await service.processar_upload_arquivo(db, arquivo, conteudo, em_background)
         
         if not resultado.sucesso:
             if resultado.arquivo_duplicado:
@@ -48,6 +57,9 @@ async def upload_arquivo_fundo(
             else:
                 raise HTTPException(status_code=400, detail=resultado.mensagem)
         
+        if resultado.id_job:
+            response.status_code = 202
+        
         return resultado
         
     except HTTPException:
@@ -56,8 +68,8 @@ async def upload_arquivo_fundo(
         logger.error(f"Erro no upload do arquivo: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
-@fundo_routes.get("/", response_model=FundoListResponse)
-async def listar_fundos(
+@fundo_routes.get("/", response_model=FundoListResponse, dependencies=[Depends(etag_global)])
+def listar_fundos(
     db: Session = Depends(get_db),
     limit: int = Query(50, ge=1, le=100, description="Limite de resultados"),
     offset: int = Query(0, ge=0, description="Offset para paginação")
@@ -72,8 +84,8 @@ async def listar_fundos(
         logger.error(f"Erro ao listar fundos: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
-@fundo_routes.get("/{fundo_id}", response_model=FundoDetalhesResponse)
-async def get_fundo_detalhes(
+@fundo_routes.get("/{fundo_id}", response_model=FundoDetalhesResponse, dependencies=[Depends(etag_fundo)])
+def get_fundo_detalhes(
     fundo_id: int,
     db: Session = Depends(get_db)
 ):
@@ -95,8 +107,37 @@ async def get_fundo_detalhes(
         logger.error(f"Erro ao buscar fundo {fundo_id}: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
+@fundo_routes.get("/{fundo_id}/arquivos/{arquivo_id}/conteudo")
+def download_arquivo_fundo(
+    fundo_id: int,
+    arquivo_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Download (em streaming) do XML original enviado para o fundo
+    """
+    try:
+        service = FundoInvestimentoService()
+        resultado = service.abrir_conteudo_arquivo(db, fundo_id, arquivo_id)
+        
+        if not resultado:
+            raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+        
+        arquivo, conteudo = resultado
+        return StreamingResponse(
+            conteudo,
+            media_type="application/xml",
+            headers={"Content-Disposition": f'attachment; filename="{arquivo.nm_arquivo}"'}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao baixar arquivo {arquivo_id} do fundo {fundo_id}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
 @fundo_routes.delete("/{fundo_id}")
-async def deletar_fundo(
+def deletar_fundo(
     fundo_id: int,
     db: Session = Depends(get_db)
 ):
@@ -104,16 +145,32 @@ async def deletar_fundo(
     Deleta um fundo de investimento e todos os seus dados
     """
     try:
-        from app.persiste.util.fundo_investimento import get_fundo_by_id
+        from app.persiste.util.fundo_investimento import get_fundo_by_id, get_hashes_blob_do_fundo
+        from app.provider import get_blob_store
+        from app.persiste.util.versao_dados import incrementar_versao_dados
+        from app.models.versao_dados import escopos_do_fundo
         
         fundo = get_fundo_by_id(db, fundo_id)
         if not fundo:
             raise HTTPException(status_code=404, detail="Fundo não encontrado")
         
+        # Blobs dos arquivos: o cascade só remove as linhas
+        hashes_blob = get_hashes_blob_do_fundo(db, fundo_id)
+        
         # Deletar fundo (cascade deletará ativos, posições, etc.)
         db.delete(fundo)
+        incrementar_versao_dados(db, escopos_do_fundo(fundo_id))
         db.commit()
         
+        # Só depois do commit: com rollback os arquivos continuam referenciados
+        blob_store = get_blob_store()
+        if blob_store:
+            for hash_arquivo in hashes_blob:
+                try:
+                    blob_store.remover(hash_arquivo)
+                except OSError as e:
+                    logger.warning(f"Blob {hash_arquivo} do fundo {fundo_id} não removido: {e}")
+        
         logger.info(f"Fundo {fundo_id} deletado com sucesso")
         return {"mensagem": "Fundo deletado com sucesso"}
         
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.config import get_db
+from app.controllers.etag import etag_global
 from app.services.history import get_file_history_service, get_file_details_service, get_file_analytics_service
 from app.schemas.history import FileHistoryResponse, FileDetailsResponse, FileAnalyticsResponse
 from typing import Optional
@@ -10,8 +11,8 @@ logger = logging.getLogger(__name__)
 
 history_routes = APIRouter(prefix="/history", tags=["History"])
 
-@history_routes.get("/files", response_model=FileHistoryResponse)
-async def get_file_history(
+@history_routes.get("/files", response_model=FileHistoryResponse, dependencies=[Depends(etag_global)])
+def get_file_history(
     db: Session = Depends(get_db),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0)
@@ -23,25 +24,29 @@ async def get_file_history(
         logger.error(f"Erro ao buscar histórico de arquivos: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno do servidor ao buscar histórico")
 
-@history_routes.get("/files/{lote_id}", response_model=FileDetailsResponse)
-async def get_file_details(
+@history_routes.get("/files/{lote_id}", response_model=FileDetailsResponse, dependencies=[Depends(etag_global)])
+def get_file_details(
     lote_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=1000, description="Ativos por página"),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior")
 ):
-    """Retorna detalhes de um arquivo específico"""
+    """Retorna detalhes de um arquivo específico (estatísticas do lote + página de ativos)"""
     try:
-        result = get_file_details_service(db, lote_id)
+        result = get_file_details_service(db, lote_id, limit, cursor)
         if not result:
             raise HTTPException(status_code=404, detail="Arquivo não encontrado")
         return result
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Erro ao buscar detalhes do arquivo {lote_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno do servidor ao buscar detalhes do arquivo")
 
-@history_routes.get("/files/{lote_id}/analytics", response_model=FileAnalyticsResponse)
-async def get_file_analytics(
+@history_routes.get("/files/{lote_id}/analytics", response_model=FileAnalyticsResponse, dependencies=[Depends(etag_global)])
+def get_file_analytics(
     lote_id: int,
     db: Session = Depends(get_db)
 ):
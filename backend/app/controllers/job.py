@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+import logging
+
+from app.config import get_db
+from app.services.ingestao_job import get_job_status_service
+from app.schemas.job import JobStatusResponse
+
+logger = logging.getLogger(__name__)
+
+job_routes = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+@job_routes.get("/{id_job}", response_model=JobStatusResponse)
+def get_job_status(
+    id_job: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Status e progresso de um job de ingestão (linhas lidas, persistidas e erros)
+    """
+    try:
+        job = get_job_status_service(db, id_job)
+        
+        if not job:
+            raise HTTPException(status_code=404, detail="Job não encontrado")
+        
+        return job
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao buscar job {id_job}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
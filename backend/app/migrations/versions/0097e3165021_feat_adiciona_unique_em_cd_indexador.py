@@ -0,0 +1,52 @@
+"""feat: adiciona unique em cd_indexador da tabela tb_indexador
+
+Revision ID: 0097e3165021
+Revises: 0096e3165020
+Create Date: 2025-09-15 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0097e3165021'
+down_revision: Union[str, Sequence[str], None] = '0096e3165020'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Normaliza os códigos (a ingestão já comparava com strip)
+    op.execute("UPDATE tb_indexador SET cd_indexador = btrim(cd_indexador) WHERE cd_indexador <> btrim(cd_indexador)")
+
+    # Reaponta os ativos para o menor id de cada cd_indexador...
+    op.execute("""
+        UPDATE tb_ativo a
+           SET id_indexador = d.id_canonico
+          FROM (
+                SELECT id_indexador,
+                       MIN(id_indexador) OVER (PARTITION BY cd_indexador) AS id_canonico
+                  FROM tb_indexador
+               ) d
+         WHERE a.id_indexador = d.id_indexador
+           AND d.id_indexador <> d.id_canonico
+    """)
+
+    # ...e remove as linhas duplicadas
+    op.execute("""
+        DELETE FROM tb_indexador i
+         USING tb_indexador c
+         WHERE i.cd_indexador = c.cd_indexador
+           AND i.id_indexador > c.id_indexador
+    """)
+
+    op.create_unique_constraint('uq_tb_indexador_cd_indexador', 'tb_indexador', ['cd_indexador'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_tb_indexador_cd_indexador', 'tb_indexador', type_='unique')
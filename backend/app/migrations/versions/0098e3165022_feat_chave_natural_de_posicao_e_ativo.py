@@ -0,0 +1,43 @@
+"""feat: chave natural de posicao (id_ativo, dt_posicao) e índice de ativo por fundo
+
+Revision ID: 0098e3165022
+Revises: 0097e3165021
+Create Date: 2025-09-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0098e3165022'
+down_revision: Union[str, Sequence[str], None] = '0097e3165021'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Mantém só a posição mais recente de cada (id_ativo, dt_posicao)
+    op.execute("""
+        DELETE FROM tb_posicao p
+         USING tb_posicao p2
+         WHERE p.id_ativo   = p2.id_ativo
+           AND p.dt_posicao = p2.dt_posicao
+           AND p.id_posicao < p2.id_posicao
+    """)
+
+    op.create_unique_constraint(
+        'uq_tb_posicao_id_ativo_dt_posicao', 'tb_posicao', ['id_ativo', 'dt_posicao']
+    )
+
+    # Busca dos ativos existentes do fundo na ingestão em modo upsert
+    op.create_index('ix_tb_ativo_id_fundo_cd_ativo', 'tb_ativo', ['id_fundo', 'cd_ativo'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tb_ativo_id_fundo_cd_ativo', table_name='tb_ativo')
+    op.drop_constraint('uq_tb_posicao_id_ativo_dt_posicao', 'tb_posicao', type_='unique')
@@ -0,0 +1,53 @@
+"""feat: índices secundários das consultas de analytics, histórico e fundos
+
+Revision ID: 0099e3165023
+Revises: 0098e3165022
+Create Date: 2025-09-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0099e3165023'
+down_revision: Union[str, Sequence[str], None] = '0098e3165022'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # tb_ativo: filtro por fundo (+ agrupamento por indexador) e joins com lote/indexador
+    op.create_index('ix_tb_ativo_id_fundo_id_indexador', 'tb_ativo', ['id_fundo', 'id_indexador'])
+    op.create_index('ix_tb_ativo_id_lote', 'tb_ativo', ['id_lote'])
+    op.create_index('ix_tb_ativo_id_indexador', 'tb_ativo', ['id_indexador'])
+
+    # tb_posicao: join por ativo já trazendo os valores somados (index-only scan),
+    # filtro por período e top N por valor
+    op.create_index(
+        'ix_tb_posicao_id_ativo_cobertura', 'tb_posicao', ['id_ativo'],
+        postgresql_include=['vl_principal', 'dt_posicao'],
+    )
+    op.create_index('ix_tb_posicao_dt_posicao', 'tb_posicao', ['dt_posicao'])
+    op.create_index('ix_tb_posicao_vl_principal', 'tb_posicao', ['vl_principal'])
+
+    # Histórico ordenado por data de envio e arquivos por fundo
+    op.create_index('ix_tb_lote_created_at', 'tb_lote', ['created_at'])
+    op.create_index(
+        'ix_tb_arquivo_original_id_fundo_investimento', 'tb_arquivo_original', ['id_fundo_investimento']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tb_arquivo_original_id_fundo_investimento', table_name='tb_arquivo_original')
+    op.drop_index('ix_tb_lote_created_at', table_name='tb_lote')
+    op.drop_index('ix_tb_posicao_vl_principal', table_name='tb_posicao')
+    op.drop_index('ix_tb_posicao_dt_posicao', table_name='tb_posicao')
+    op.drop_index('ix_tb_posicao_id_ativo_cobertura', table_name='tb_posicao')
+    op.drop_index('ix_tb_ativo_id_indexador', table_name='tb_ativo')
+    op.drop_index('ix_tb_ativo_id_lote', table_name='tb_ativo')
+    op.drop_index('ix_tb_ativo_id_fundo_id_indexador', table_name='tb_ativo')
@@ -0,0 +1,40 @@
+"""feat: índices trigram (pg_trgm) em cd_ativo e cd_isin da tabela tb_ativo
+
+Revision ID: 0100e3165024
+Revises: 0099e3165023
+Create Date: 2025-09-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0100e3165024'
+down_revision: Union[str, Sequence[str], None] = '0099e3165023'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Busca por substring (ILIKE '%...%') do filtro codigo_ativo
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_index(
+        'ix_tb_ativo_cd_ativo_trgm', 'tb_ativo', ['cd_ativo'],
+        postgresql_using='gin', postgresql_ops={'cd_ativo': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_tb_ativo_cd_isin_trgm', 'tb_ativo', ['cd_isin'],
+        postgresql_using='gin', postgresql_ops={'cd_isin': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tb_ativo_cd_isin_trgm', table_name='tb_ativo')
+    op.drop_index('ix_tb_ativo_cd_ativo_trgm', table_name='tb_ativo')
+    # A extensão pg_trgm é mantida (pode ser usada por outros objetos)
@@ -0,0 +1,97 @@
+"""feat: conteúdo compactado (gzip) e local de armazenamento na tabela tb_arquivo_original
+
+Revision ID: 0101e3165025
+Revises: 0100e3165024
+Create Date: 2025-09-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+import gzip
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0101e3165025'
+down_revision: Union[str, Sequence[str], None] = '0100e3165024'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Linhas convertidas por vez (evita carregar todos os XMLs em memória)
+BATCH_SIZE = 100
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tb_arquivo_original', sa.Column('ds_armazenamento', sa.String(length=20), nullable=False, server_default=sa.text("'banco'")))
+    op.add_column('tb_arquivo_original', sa.Column('conteudo_compactado', sa.LargeBinary(), nullable=True))
+
+    # Compacta o conteúdo existente em lotes
+    conn = op.get_bind()
+    ultimo_id = 0
+    while True:
+        linhas = conn.execute(
+            sa.text("""
+                SELECT id_arquivo_original, conteudo_arquivo
+                  FROM tb_arquivo_original
+                 WHERE id_arquivo_original > :ultimo_id
+                 ORDER BY id_arquivo_original
+                 LIMIT :limite
+            """),
+            {"ultimo_id": ultimo_id, "limite": BATCH_SIZE},
+        ).all()
+        if not linhas:
+            break
+        conn.execute(
+            sa.text("UPDATE tb_arquivo_original SET conteudo_compactado = :conteudo WHERE id_arquivo_original = :id"),
+            [
+                {"id": id_arquivo, "conteudo": gzip.compress((conteudo or "").encode("utf-8"), compresslevel=6)}
+                for id_arquivo, conteudo in linhas
+            ],
+        )
+        ultimo_id = linhas[-1][0]
+
+    op.drop_column('tb_arquivo_original', 'conteudo_arquivo')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('tb_arquivo_original', sa.Column('conteudo_arquivo', sa.Text(), nullable=True))
+
+    # Arquivos que estão no BlobStore são lidos do diretório configurado
+    blob_dir = os.environ.get("ARQUIVO_BLOB_DIR")
+    conn = op.get_bind()
+    ultimo_id = 0
+    while True:
+        linhas = conn.execute(
+            sa.text("""
+                SELECT id_arquivo_original, hash_arquivo, ds_armazenamento, conteudo_compactado
+                  FROM tb_arquivo_original
+                 WHERE id_arquivo_original > :ultimo_id
+                 ORDER BY id_arquivo_original
+                 LIMIT :limite
+            """),
+            {"ultimo_id": ultimo_id, "limite": BATCH_SIZE},
+        ).all()
+        if not linhas:
+            break
+        valores = []
+        for id_arquivo, hash_arquivo, armazenamento, conteudo in linhas:
+            if armazenamento == "blob":
+                if not blob_dir:
+                    raise RuntimeError("Há arquivos no BlobStore: defina ARQUIVO_BLOB_DIR para o downgrade")
+                caminho = os.path.join(blob_dir, hash_arquivo[:2], hash_arquivo[2:4], f"{hash_arquivo}.gz")
+                with open(caminho, "rb") as arquivo:
+                    conteudo = arquivo.read()
+            valores.append({"id": id_arquivo, "conteudo": gzip.decompress(conteudo).decode("utf-8") if conteudo else ""})
+        conn.execute(
+            sa.text("UPDATE tb_arquivo_original SET conteudo_arquivo = :conteudo WHERE id_arquivo_original = :id"),
+            valores,
+        )
+        ultimo_id = linhas[-1][0]
+
+    op.alter_column('tb_arquivo_original', 'conteudo_arquivo', nullable=False)
+    op.drop_column('tb_arquivo_original', 'conteudo_compactado')
+    op.drop_column('tb_arquivo_original', 'ds_armazenamento')
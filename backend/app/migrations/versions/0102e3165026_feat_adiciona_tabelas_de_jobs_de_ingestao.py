@@ -0,0 +1,67 @@
+"""feat: adiciona as tabelas tb_ingestao_job e tb_ingestao_job_arquivo
+
+Revision ID: 0102e3165026
+Revises: 0101e3165025
+Create Date: 2025-09-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0102e3165026'
+down_revision: Union[str, Sequence[str], None] = '0101e3165025'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tb_ingestao_job',
+    sa.Column('id_job', sa.Integer(), nullable=False),
+    sa.Column('ds_status', sa.String(length=20), server_default=sa.text("'pendente'"), nullable=False),
+    sa.Column('id_fundo', sa.Integer(), nullable=True),
+    sa.Column('id_arquivo_original', sa.Integer(), nullable=True),
+    sa.Column('fl_enriquecer', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.Column('qtd_arquivos', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('qtd_linhas_lidas', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('qtd_linhas_persistidas', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('qtd_erros', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('ds_erro', sa.Text(), nullable=True),
+    sa.Column('nr_tentativas', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('dt_inicio', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('dt_fim', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('dt_heartbeat', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['id_fundo'], ['tb_fundo_investimento.id_fundo_investimento'], ),
+    sa.ForeignKeyConstraint(['id_arquivo_original'], ['tb_arquivo_original.id_arquivo_original'], ),
+    sa.PrimaryKeyConstraint('id_job')
+    )
+    op.create_index(
+        'ix_tb_ingestao_job_fila', 'tb_ingestao_job', ['id_job'],
+        postgresql_where=sa.text("ds_status IN ('pendente', 'processando')"),
+    )
+
+    op.create_table('tb_ingestao_job_arquivo',
+    sa.Column('id_job_arquivo', sa.Integer(), nullable=False),
+    sa.Column('id_job', sa.Integer(), nullable=False),
+    sa.Column('nm_arquivo', sa.String(length=255), nullable=False),
+    sa.Column('conteudo_compactado', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['id_job'], ['tb_ingestao_job.id_job'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_job_arquivo')
+    )
+    op.create_index('ix_tb_ingestao_job_arquivo_id_job', 'tb_ingestao_job_arquivo', ['id_job'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tb_ingestao_job_arquivo_id_job', table_name='tb_ingestao_job_arquivo')
+    op.drop_table('tb_ingestao_job_arquivo')
+    op.drop_index('ix_tb_ingestao_job_fila', table_name='tb_ingestao_job')
+    op.drop_table('tb_ingestao_job')
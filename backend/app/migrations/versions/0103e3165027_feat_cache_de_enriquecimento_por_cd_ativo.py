@@ -0,0 +1,67 @@
+"""feat: adiciona tb_cache_enriquecimento e alinha tb_ativo_enriquecido ao modelo
+
+Revision ID: 0103e3165027
+Revises: 0102e3165026
+Create Date: 2025-09-21 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0103e3165027'
+down_revision: Union[str, Sequence[str], None] = '0102e3165026'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tb_cache_enriquecimento',
+    sa.Column('cd_ativo', sa.String(length=100), nullable=False),
+    sa.Column('serie', sa.String(length=100), nullable=True),
+    sa.Column('emissao', sa.String(length=100), nullable=True),
+    sa.Column('devedor', sa.Text(), nullable=True),
+    sa.Column('securitizadora', sa.Text(), nullable=True),
+    sa.Column('resgate_antecipado', sa.Boolean(), nullable=True),
+    sa.Column('agente_fiduciario', sa.Text(), nullable=True),
+    sa.Column('fl_erro', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.Column('ds_erro', sa.Text(), nullable=True),
+    sa.Column('dt_busca', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('cd_ativo')
+    )
+
+    # tb_ativo_enriquecido foi criada (0096) sem dt_ultimo_enriquecimento e com tipos
+    # diferentes do modelo; o enriquecimento a partir do cache grava essas colunas
+    op.execute("ALTER TABLE tb_ativo_enriquecido ADD COLUMN IF NOT EXISTS dt_ultimo_enriquecimento DATE")
+    op.alter_column(
+        'tb_ativo_enriquecido', 'resgate_antecipado',
+        type_=sa.Boolean(), existing_type=sa.String(length=50),
+        postgresql_using=(
+            "CASE WHEN lower(resgate_antecipado) IN ('sim', 'true', 's', '1') THEN true "
+            "WHEN lower(resgate_antecipado) IN ('não', 'nao', 'false', 'n', '0') THEN false END"
+        ),
+    )
+    for coluna in ('devedor', 'securitizadora', 'agente_fiduciario'):
+        op.alter_column('tb_ativo_enriquecido', coluna, type_=sa.Text(), existing_type=sa.String(length=200))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for coluna in ('devedor', 'securitizadora', 'agente_fiduciario'):
+        op.alter_column(
+            'tb_ativo_enriquecido', coluna, type_=sa.String(length=200), existing_type=sa.Text(),
+            postgresql_using=f"left({coluna}, 200)",
+        )
+    op.alter_column(
+        'tb_ativo_enriquecido', 'resgate_antecipado',
+        type_=sa.String(length=50), existing_type=sa.Boolean(),
+        postgresql_using="CASE WHEN resgate_antecipado THEN 'sim' WHEN NOT resgate_antecipado THEN 'não' END",
+    )
+    op.drop_column('tb_ativo_enriquecido', 'dt_ultimo_enriquecimento')
+    op.drop_table('tb_cache_enriquecimento')
@@ -0,0 +1,53 @@
+"""feat: adiciona a tabela tb_fila_enriquecimento
+
+Revision ID: 0104e3165028
+Revises: 0103e3165027
+Create Date: 2025-09-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0104e3165028'
+down_revision: Union[str, Sequence[str], None] = '0103e3165027'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tb_fila_enriquecimento',
+    sa.Column('id_item', sa.Integer(), nullable=False),
+    sa.Column('id_ativo', sa.Integer(), nullable=False),
+    sa.Column('ds_status', sa.String(length=20), server_default=sa.text("'pendente'"), nullable=False),
+    sa.Column('nr_prioridade', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('nr_tentativas', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('dt_proxima_tentativa', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('ds_erro', sa.Text(), nullable=True),
+    sa.Column('dt_heartbeat', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('dt_fim', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['id_ativo'], ['tb_ativo.id_ativo'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_item')
+    )
+    op.create_index(
+        'uq_tb_fila_enriquecimento_id_ativo_ativo', 'tb_fila_enriquecimento', ['id_ativo'], unique=True,
+        postgresql_where=sa.text("ds_status IN ('pendente', 'processando')"),
+    )
+    op.create_index(
+        'ix_tb_fila_enriquecimento_fila', 'tb_fila_enriquecimento',
+        [sa.text('nr_prioridade DESC'), 'dt_proxima_tentativa', 'id_item'],
+        postgresql_where=sa.text("ds_status = 'pendente'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tb_fila_enriquecimento_fila', table_name='tb_fila_enriquecimento')
+    op.drop_index('uq_tb_fila_enriquecimento_id_ativo_ativo', table_name='tb_fila_enriquecimento')
+    op.drop_table('tb_fila_enriquecimento')
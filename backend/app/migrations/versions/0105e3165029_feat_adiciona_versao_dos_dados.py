@@ -0,0 +1,34 @@
+"""feat: adiciona a tabela tb_versao_dados
+
+Revision ID: 0105e3165029
+Revises: 0104e3165028
+Create Date: 2025-09-23 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0105e3165029'
+down_revision: Union[str, Sequence[str], None] = '0104e3165028'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tb_versao_dados',
+    sa.Column('ds_escopo', sa.String(length=50), nullable=False),
+    sa.Column('nr_versao', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('ds_escopo')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('tb_versao_dados')
@@ -0,0 +1,32 @@
+"""feat: índice da paginação em keyset da listagem de ativos
+
+Revision ID: 0106e3165030
+Revises: 0105e3165029
+Create Date: 2025-09-24 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0106e3165030'
+down_revision: Union[str, Sequence[str], None] = '0105e3165029'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (vl_principal, id_posicao) atende a ordenação estável da listagem (varrido de trás
+    # para frente) e o seek do cursor; substitui o índice só por vl_principal (top N)
+    op.create_index('ix_tb_posicao_vl_principal_id_posicao', 'tb_posicao', ['vl_principal', 'id_posicao'])
+    op.drop_index('ix_tb_posicao_vl_principal', table_name='tb_posicao')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_tb_posicao_vl_principal', 'tb_posicao', ['vl_principal'])
+    op.drop_index('ix_tb_posicao_vl_principal_id_posicao', table_name='tb_posicao')
@@ -0,0 +1,35 @@
+"""feat: origem dos itens da fila de enriquecimento
+
+Revision ID: 0107e3165031
+Revises: 0106e3165030
+Create Date: 2025-09-25 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0107e3165031'
+down_revision: Union[str, Sequence[str], None] = '0106e3165030'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tb_fila_enriquecimento',
+    sa.Column('ds_origem', sa.String(length=20), server_default=sa.text("'manual'"), nullable=False)
+    )
+    # Itens existentes: a origem mais provável pela prioridade (upload = 100, agendador = 0)
+    op.execute("""
+        UPDATE tb_fila_enriquecimento
+           SET ds_origem = CASE nr_prioridade WHEN 100 THEN 'upload' WHEN 0 THEN 'agendador' ELSE 'manual' END
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tb_fila_enriquecimento', 'ds_origem')
@@ -8,6 +8,10 @@ from .relacao_ativo_securitizadora import RelacaoAtivoSecuritizadora
 from .securitizadora import Securitizadora
 from .ativo_enriquecido import AtivoEnriquecido
 from .arquivo_original import ArquivoOriginal
+from .ingestao_job import IngestaoJob, IngestaoJobArquivo
+from .cache_enriquecimento import CacheEnriquecimento
+from .fila_enriquecimento import FilaEnriquecimento
+from .versao_dados import VersaoDados
 
 __all__ = [
     "Lote",
@@ -19,5 +23,10 @@ __all__ = [
     "RelacaoAtivoSecuritizadora",
     "Securitizadora",
     "AtivoEnriquecido",
-    "ArquivoOriginal"
+    "ArquivoOriginal",
+    "IngestaoJob",
+    "IngestaoJobArquivo",
+    "CacheEnriquecimento",
+    "FilaEnriquecimento",
+    "VersaoDados"
 ]
@@ -1,6 +1,6 @@
 from .utils import BaseModel, TimestampMixin
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Text, ForeignKey, Boolean
+from sqlalchemy import Integer, String, Text, ForeignKey, Boolean, LargeBinary, text
 from typing import TYPE_CHECKING, Optional
 import hashlib
 
@@ -11,15 +11,19 @@ class ArquivoOriginal(BaseModel, TimestampMixin):
     __tablename__ = "tb_arquivo_original"
 
     id_arquivo_original: Mapped[int] = mapped_column(Integer, primary_key=True)
-    id_fundo_investimento: Mapped[int] = mapped_column(Integer, ForeignKey("tb_fundo_investimento.id_fundo_investimento"), nullable=False)
+    id_fundo_investimento: Mapped[int] = mapped_column(Integer, ForeignKey("tb_fundo_investimento.id_fundo_investimento"), nullable=False, index=True)
     
     # Dados do arquivo
     nm_arquivo: Mapped[str] = mapped_column(String(255), nullable=False)
     nm_arquivo_original: Mapped[str] = mapped_column(String(255), nullable=False)
-    conteudo_arquivo: Mapped[str] = mapped_column(Text, nullable=False)
     hash_arquivo: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
     tamanho_arquivo: Mapped[int] = mapped_column(Integer, nullable=False)
     
+    # Conteúdo (gzip): no banco ("banco") ou no BlobStore pelo hash ("blob").
+    # Deferred: só é lido quando acessado explicitamente (ver abrir_conteudo_arquivo)
+    ds_armazenamento: Mapped[str] = mapped_column(String(20), nullable=False, server_default=text("'banco'"))
+    conteudo_compactado: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    
     # Controle
     fl_processado: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     fl_erro_processamento: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
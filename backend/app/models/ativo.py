@@ -1,6 +1,6 @@
 from .utils import BaseModel, TimestampMixin
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Numeric, Date, Boolean, ForeignKey, Float, text
+from sqlalchemy import Integer, String, Numeric, Date, Boolean, ForeignKey, Float, Index, text
 from datetime import date
 from decimal import Decimal
 from typing import TYPE_CHECKING, Optional
@@ -15,6 +15,14 @@ if TYPE_CHECKING:
 
 class Ativo(BaseModel, TimestampMixin):
     __tablename__ = "tb_ativo"
+    __table_args__ = (
+        Index("ix_tb_ativo_id_fundo_cd_ativo", "id_fundo", "cd_ativo"),
+        Index("ix_tb_ativo_id_fundo_id_indexador", "id_fundo", "id_indexador"),
+        Index("ix_tb_ativo_id_lote", "id_lote"),
+        Index("ix_tb_ativo_id_indexador", "id_indexador"),
+        Index("ix_tb_ativo_cd_ativo_trgm", "cd_ativo", postgresql_using="gin", postgresql_ops={"cd_ativo": "gin_trgm_ops"}),
+        Index("ix_tb_ativo_cd_isin_trgm", "cd_isin", postgresql_using="gin", postgresql_ops={"cd_isin": "gin_trgm_ops"}),
+    )
 
     id_ativo      : Mapped[int]           = mapped_column(Integer, primary_key=True)
     id_fundo      : Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("tb_fundo_investimento.id_fundo_investimento"), nullable=True)
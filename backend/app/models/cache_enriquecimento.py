@@ -0,0 +1,24 @@
+from .utils import BaseModel, TimestampMixin
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Text, Boolean, DateTime, func
+from datetime import datetime
+from typing import Optional
+
+class CacheEnriquecimento(BaseModel, TimestampMixin):
+    """Características da ANBIMA por código de ativo, compartilhadas por todos os fundos/uploads"""
+    __tablename__ = "tb_cache_enriquecimento"
+
+    cd_ativo          : Mapped[str]                = mapped_column(String(100), primary_key=True)
+
+    # Dados da ANBIMA (mesmos campos de AtivoEnriquecido)
+    serie             : Mapped[Optional[str]]      = mapped_column(String(100), nullable=True)
+    emissao           : Mapped[Optional[str]]      = mapped_column(String(100), nullable=True)
+    devedor           : Mapped[Optional[str]]      = mapped_column(Text, nullable=True)
+    securitizadora    : Mapped[Optional[str]]      = mapped_column(Text, nullable=True)
+    resgate_antecipado: Mapped[Optional[bool]]     = mapped_column(Boolean, nullable=True)
+    agente_fiduciario : Mapped[Optional[str]]      = mapped_column(Text, nullable=True)
+
+    # Resultado da busca: erros também ficam em cache (com TTL menor)
+    fl_erro           : Mapped[bool]               = mapped_column(Boolean, nullable=False, default=False)
+    ds_erro           : Mapped[Optional[str]]      = mapped_column(Text, nullable=True)
+    dt_busca          : Mapped[datetime]           = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,40 @@
+from .utils import BaseModel, TimestampMixin
+from .ingestao_job import JOB_PENDENTE
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Text, ForeignKey, DateTime, Index, func, text
+from datetime import datetime
+from typing import Optional
+
+# Prioridades (maior sai primeiro): ativos de uploads novos antes de pedidos manuais e de atualizações
+PRIORIDADE_UPLOAD      = 100
+PRIORIDADE_MANUAL      = 50
+PRIORIDADE_ATUALIZACAO = 0
+
+# Origem do item: gravada ao enfileirar e nunca alterada (a prioridade pode subir depois)
+ORIGEM_UPLOAD    = "upload"
+ORIGEM_MANUAL    = "manual"
+ORIGEM_AGENDADOR = "agendador"
+
+class FilaEnriquecimento(BaseModel, TimestampMixin):
+    """Fila persistente de enriquecimento (ANBIMA), consumida por `worker.py enriquecimento`"""
+    __tablename__ = "tb_fila_enriquecimento"
+    __table_args__ = (
+        # Um item ativo por ativo: enfileirar de novo só ajusta a prioridade
+        Index("uq_tb_fila_enriquecimento_id_ativo_ativo", "id_ativo", unique=True,
+              postgresql_where=text("ds_status IN ('pendente', 'processando')")),
+        # Ordem de consumo da fila (só os pendentes entram no índice)
+        Index("ix_tb_fila_enriquecimento_fila", text("nr_prioridade DESC"), "dt_proxima_tentativa", "id_item",
+              postgresql_where=text("ds_status = 'pendente'")),
+    )
+
+    id_item             : Mapped[int]                = mapped_column(Integer, primary_key=True)
+    id_ativo            : Mapped[int]                = mapped_column(Integer, ForeignKey("tb_ativo.id_ativo", ondelete="CASCADE"), nullable=False)
+    ds_status           : Mapped[str]                = mapped_column(String(20), nullable=False, server_default=text(f"'{JOB_PENDENTE}'"))
+    nr_prioridade       : Mapped[int]                = mapped_column(Integer, nullable=False, server_default=text("0"))
+    ds_origem           : Mapped[str]                = mapped_column(String(20), nullable=False, server_default=text(f"'{ORIGEM_MANUAL}'"))
+    nr_tentativas       : Mapped[int]                = mapped_column(Integer, nullable=False, server_default=text("0"))
+    # Backoff: o item só volta a ser consumido a partir desta data
+    dt_proxima_tentativa: Mapped[datetime]           = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    ds_erro             : Mapped[Optional[str]]      = mapped_column(Text, nullable=True)
+    dt_heartbeat        : Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    dt_fim              : Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
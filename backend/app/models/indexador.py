@@ -10,7 +10,7 @@ class Indexador(BaseModel, TimestampMixin):
     __tablename__ = "tb_indexador"
 
     id_indexador : Mapped[int]           = mapped_column(Integer, primary_key=True)
-    cd_indexador : Mapped[str]           = mapped_column(String(100), nullable=False)
+    cd_indexador : Mapped[str]           = mapped_column(String(100), nullable=False, unique=True)
     sgl_indexador: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
 
     ativos: Mapped[list["Ativo"]] = relationship("Ativo", back_populates="indexador")
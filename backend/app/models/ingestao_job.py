@@ -0,0 +1,47 @@
+from .utils import BaseModel, TimestampMixin
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Integer, String, Text, Boolean, ForeignKey, DateTime, LargeBinary, Index, text
+from datetime import datetime
+from typing import Optional
+
+# Estados do job
+JOB_PENDENTE    = "pendente"
+JOB_PROCESSANDO = "processando"
+JOB_CONCLUIDO   = "concluido"
+JOB_ERRO        = "erro"
+
+class IngestaoJob(BaseModel, TimestampMixin):
+    __tablename__ = "tb_ingestao_job"
+    __table_args__ = (
+        # Fila: só os jobs ainda não finalizados entram no índice
+        Index("ix_tb_ingestao_job_fila", "id_job", postgresql_where=text("ds_status IN ('pendente', 'processando')")),
+    )
+
+    id_job                : Mapped[int]                = mapped_column(Integer, primary_key=True)
+    ds_status             : Mapped[str]                = mapped_column(String(20), nullable=False, server_default=text(f"'{JOB_PENDENTE}'"))
+    id_fundo              : Mapped[Optional[int]]      = mapped_column(Integer, ForeignKey("tb_fundo_investimento.id_fundo_investimento"), nullable=True)
+    id_arquivo_original   : Mapped[Optional[int]]      = mapped_column(Integer, ForeignKey("tb_arquivo_original.id_arquivo_original"), nullable=True)
+    fl_enriquecer         : Mapped[bool]               = mapped_column(Boolean, nullable=False, server_default=text("false"))
+    qtd_arquivos          : Mapped[int]                = mapped_column(Integer, nullable=False, server_default=text("0"))
+    qtd_linhas_lidas      : Mapped[int]                = mapped_column(Integer, nullable=False, server_default=text("0"))
+    qtd_linhas_persistidas: Mapped[int]                = mapped_column(Integer, nullable=False, server_default=text("0"))
+    qtd_erros             : Mapped[int]                = mapped_column(Integer, nullable=False, server_default=text("0"))
+    ds_erro               : Mapped[Optional[str]]      = mapped_column(Text, nullable=True)
+    nr_tentativas         : Mapped[int]                = mapped_column(Integer, nullable=False, server_default=text("0"))
+    dt_inicio             : Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    dt_fim                : Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    dt_heartbeat          : Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    arquivos: Mapped[list["IngestaoJobArquivo"]] = relationship("IngestaoJobArquivo", back_populates="job", cascade="all, delete-orphan")
+
+
+class IngestaoJobArquivo(BaseModel, TimestampMixin):
+    __tablename__ = "tb_ingestao_job_arquivo"
+
+    id_job_arquivo     : Mapped[int]             = mapped_column(Integer, primary_key=True)
+    id_job             : Mapped[int]             = mapped_column(Integer, ForeignKey("tb_ingestao_job.id_job", ondelete="CASCADE"), nullable=False, index=True)
+    nm_arquivo         : Mapped[str]             = mapped_column(String(255), nullable=False)
+    # XML enviado, compactado (gzip); deferred para não ser lido ao consultar o job
+    conteudo_compactado: Mapped[bytes]           = mapped_column(LargeBinary, nullable=False, deferred=True)
+
+    job: Mapped["IngestaoJob"] = relationship("IngestaoJob", back_populates="arquivos")
@@ -1,6 +1,6 @@
 from .utils import BaseModel, TimestampMixin
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Date, Integer, Numeric  
+from sqlalchemy import Date, Integer, Numeric, Index
 from decimal import Decimal
 from typing import TYPE_CHECKING
 from datetime import date
@@ -10,6 +10,9 @@ if TYPE_CHECKING:
 
 class Lote(BaseModel, TimestampMixin):
     __tablename__ = "tb_lote"
+    __table_args__ = (
+        Index("ix_tb_lote_created_at", "created_at"),
+    )
 
     id_lote     : Mapped[int]     = mapped_column(Integer, primary_key=True)
     vl_pu_compra: Mapped[Decimal] = mapped_column(Numeric(24, 9), nullable=False)
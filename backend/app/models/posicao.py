@@ -1,6 +1,6 @@
 from .utils import BaseModel, TimestampMixin
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, Numeric, Date, ForeignKey
+from sqlalchemy import Integer, Numeric, Date, ForeignKey, UniqueConstraint, Index
 from datetime import date
 from decimal import Decimal
 from typing import TYPE_CHECKING
@@ -10,6 +10,12 @@ if TYPE_CHECKING:
 
 class Posicao(BaseModel, TimestampMixin):
     __tablename__ = "tb_posicao"
+    __table_args__ = (
+        UniqueConstraint("id_ativo", "dt_posicao", name="uq_tb_posicao_id_ativo_dt_posicao"),
+        Index("ix_tb_posicao_id_ativo_cobertura", "id_ativo", postgresql_include=["vl_principal", "dt_posicao"]),
+        Index("ix_tb_posicao_dt_posicao", "dt_posicao"),
+        Index("ix_tb_posicao_vl_principal_id_posicao", "vl_principal", "id_posicao"),
+    )
 
     id_posicao               : Mapped[int]     = mapped_column(Integer, primary_key=True)
     id_ativo                 : Mapped[int]     = mapped_column(Integer, ForeignKey("tb_ativo.id_ativo"), nullable=False)
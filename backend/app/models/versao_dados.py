@@ -0,0 +1,22 @@
+from .utils import BaseModel, TimestampMixin
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, BigInteger, text
+from typing import Optional
+
+# Escopos de versão: dados de todos os fundos, de um fundo e o enriquecimento (ANBIMA)
+ESCOPO_GLOBAL         = "global"
+ESCOPO_ENRIQUECIMENTO  = "enriquecimento"
+
+def escopo_fundo(fundo_id: int) -> str:
+    return f"fundo:{fundo_id}"
+
+def escopos_do_fundo(fundo_id: Optional[int]) -> list[str]:
+    """Escopos alterados por uma ingestão/exclusão: sempre o global e, se houver, o do fundo"""
+    return [ESCOPO_GLOBAL] + ([escopo_fundo(fundo_id)] if fundo_id else [])
+
+class VersaoDados(BaseModel, TimestampMixin):
+    """Versão dos dados por escopo: incrementada a cada ingestão/enriquecimento, invalida o cache do analytics"""
+    __tablename__ = "tb_versao_dados"
+
+    ds_escopo: Mapped[str] = mapped_column(String(50), primary_key=True)
+    nr_versao: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("0"))
@@ -1,6 +1,7 @@
-from .persistence_file import persist_bundles
+from .persistence_file import persist_bundles, persist_bundles_bulk
 
 
 __all__ = [
-    "persist_bundles"
+    "persist_bundles",
+    "persist_bundles_bulk"
 ]
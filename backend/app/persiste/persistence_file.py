@@ -1,34 +1,50 @@
 from __future__ import annotations
-from typing import List, Dict
+from typing import Callable, Iterable, List, Dict, Optional
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 import traceback
 
 from app.DTOs import ParsedBundleDTO
-from app.models import Indexador, Lote, Ativo, Posicao
+from app.models import Lote, Ativo, Posicao
 
 # funções que acessam o banco
 from app.persiste.util import (
-    insert_indexador,
+    upsert_indexador,
+    publicar_indexadores,
     insert_lote,
     insert_ativo,
     insert_posicao,
+    bulk_insert_lotes,
+    bulk_insert_ativos,
+    bulk_insert_posicoes,
+    get_ativos_por_chave_natural,
+    bulk_update_lotes,
+    bulk_upsert_posicoes,
+    incrementar_versao_dados,
 )
+from app.models.versao_dados import escopos_do_fundo
+from app.utils import chunked
+
+# Namespace do pg_advisory_xact_lock(namespace, id_fundo) da ingestão em modo upsert
+ADVISORY_LOCK_INGESTAO = 4_01
 
 def persist_bundles(
     db: Session,
-    bundles: List[ParsedBundleDTO],
+    bundles: Iterable[ParsedBundleDTO],
     fundo_id: int = None,
 ) -> List[ParsedBundleDTO]:
     """
     Persiste todos os bundles em uma única transação.
 
-    - Deduplica Indexador via cache local + insert_indexador.
+    - `bundles` pode ser um gerador (ex: parser em streaming): cada bundle é
+      inserido assim que é produzido, sem esperar a leitura do arquivo inteiro.
+    - Resolve o Indexador via upsert_indexador (cache do processo + ON CONFLICT).
     - Insere Lote, Ativo e Posicao (nessa ordem).
-    - Reaponta ativo.indexador para a instância deduplicada.
     - Commit único; rollback em erro.
     """
-    cache_indexador: Dict[str, Indexador] = {}
+    indexadores_pendentes: Dict[str, int] = {}
+    persistidos: List[ParsedBundleDTO] = []
 
     try:
         # Não comitamos nas funções individuais; comitamos tudo no final
@@ -38,13 +54,10 @@ def persist_bundles(
             indexador = bundle.indexador
             posicao   = bundle.posicao
 
-            # 1) Indexador (dedup por cache local da execução)
-            # Converter DTO para modelo
-            indexador_model = Indexador(
-                cd_indexador=indexador.cd_indexador,
-                sgl_indexador=indexador.sgl_indexador
+            # 1) Indexador (upsert; códigos já conhecidos não vão ao banco)
+            indexador.id_indexador = upsert_indexador(
+                db, indexador.cd_indexador, indexador.sgl_indexador, indexadores_pendentes
             )
-            indexador = insert_indexador(db, indexador_model, cache_indexador, commit=False)
 
             # 2) Lote - Converter DTO para modelo
             lote_model = Lote(
@@ -65,7 +78,7 @@ def persist_bundles(
                 dt_emissao=ativo.dt_emissao,
                 dt_vencimento=ativo.dt_vencimento,
                 lote=lote,
-                indexador=indexador
+                id_indexador=indexador.id_indexador
             )
             ativo = insert_ativo(db, ativo_model, commit=False)
 
@@ -84,10 +97,13 @@ def persist_bundles(
             bundle.indexador = indexador
             bundle.ativo     = ativo
             bundle.posicao   = posicao
+            persistidos.append(bundle)
 
-        # Commit único (tudo-ou-nada)
+        # Commit único (tudo-ou-nada); a nova versão invalida o cache do analytics junto
+        incrementar_versao_dados(db, escopos_do_fundo(fundo_id))
         db.commit()
-        return bundles
+        publicar_indexadores(indexadores_pendentes)
+        return persistidos
 
     except SQLAlchemyError as e:
         db.rollback()
@@ -100,3 +116,154 @@ def persist_bundles(
         print(f"Erro inesperado na persistência: {e}")
         print(f"Stack trace: {traceback.format_exc()}")
         raise RuntimeError("Falha inesperada ao persistir bundles.") from e
+
+
+def persist_bundles_bulk(
+    db: Session,
+    bundles: Iterable[ParsedBundleDTO],
+    fundo_id: int = None,
+    chunk_size: int = 1000,
+    upsert: bool = False,
+    ao_persistir_chunk: Optional[Callable[[int], None]] = None,
+) -> List[ParsedBundleDTO]:
+    """
+    Persiste os bundles em lotes (set-based), em uma única transação.
+
+    - Consome `bundles` em chunks de `chunk_size` (funciona com geradores).
+    - Para cada chunk: um INSERT multi-linha com RETURNING para Lote, outro para
+      Ativo e outro para Posicao, ligando as FKs pelos ids retornados.
+    - Resolve o Indexador via upsert_indexador (cache do processo + ON CONFLICT).
+    - Com `upsert=True`, reaproveita Ativo/Lote já existentes no fundo (ver `_persistir_chunk_upsert`).
+    - Preenche os ids gerados nos próprios DTOs do bundle.
+    - `ao_persistir_chunk(qtd)` é chamado após cada chunk com o total já gravado
+      na transação (progresso de jobs).
+    - Commit único; rollback em erro.
+
+    Alternativa a `persist_bundles` (linha a linha), que continua disponível como fallback.
+    """
+    indexadores_pendentes: Dict[str, int] = {}
+    persistidos: List[ParsedBundleDTO] = []
+
+    try:
+        if upsert:
+            # Serializa ingestões concorrentes do mesmo fundo (busca + insert de Ativo/Lote)
+            db.execute(select(func.pg_advisory_xact_lock(ADVISORY_LOCK_INGESTAO, fundo_id or 0)))
+
+        for chunk in chunked(bundles, chunk_size):
+            # 1) Indexador (poucos valores distintos; códigos já conhecidos não vão ao banco)
+            for bundle in chunk:
+                bundle.indexador.id_indexador = upsert_indexador(
+                    db, bundle.indexador.cd_indexador, bundle.indexador.sgl_indexador, indexadores_pendentes
+                )
+
+            # 2) Lote, Ativo e Posicao
+            if upsert:
+                _persistir_chunk_upsert(db, chunk, fundo_id)
+            else:
+                _persistir_chunk_append(db, chunk, fundo_id)
+
+            persistidos.extend(chunk)
+            if ao_persistir_chunk:
+                ao_persistir_chunk(len(persistidos))
+
+        # Commit único (tudo-ou-nada); a nova versão invalida o cache do analytics junto
+        incrementar_versao_dados(db, escopos_do_fundo(fundo_id))
+        db.commit()
+        publicar_indexadores(indexadores_pendentes)
+        return persistidos
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Erro SQLAlchemy: {e}")
+        print(f"Stack trace: {traceback.format_exc()}")
+        raise RuntimeError("Falha ao persistir bundles em lote.") from e
+    except Exception as e:
+        db.rollback()
+        print(f"Erro inesperado na persistência em lote: {e}")
+        print(f"Stack trace: {traceback.format_exc()}")
+        raise RuntimeError("Falha inesperada ao persistir bundles em lote.") from e
+
+
+def _persistir_chunk_append(db: Session, chunk: List[ParsedBundleDTO], fundo_id: int | None) -> None:
+    """Insere um Lote, um Ativo e uma Posicao novos para cada bundle do chunk."""
+    ids_lote = bulk_insert_lotes(db, [
+        bundle.lote.model_dump(exclude={"id_lote"}) for bundle in chunk
+    ])
+
+    ids_ativo = bulk_insert_ativos(db, [
+        _ativo_row(bundle, fundo_id, id_lote) for bundle, id_lote in zip(chunk, ids_lote)
+    ])
+
+    ids_posicao = bulk_insert_posicoes(db, [
+        _posicao_row(bundle, id_ativo) for bundle, id_ativo in zip(chunk, ids_ativo)
+    ])
+
+    for bundle, id_lote, id_ativo, id_posicao in zip(chunk, ids_lote, ids_ativo, ids_posicao):
+        bundle.lote.id_lote       = id_lote
+        bundle.ativo.id_ativo     = id_ativo
+        bundle.posicao.id_posicao = id_posicao
+
+
+def _persistir_chunk_upsert(db: Session, chunk: List[ParsedBundleDTO], fundo_id: int | None) -> None:
+    """
+    Persiste o chunk reaproveitando as dimensões já existentes no fundo.
+
+    - Ativo é identificado por (id_fundo, cd_ativo, cd_isin) + o seu Lote (dt_operacao, vl_pu_compra).
+      Se já existir, só a quantidade do Lote é atualizada; senão Lote e Ativo são inseridos.
+    - Posicao recebe uma linha por (id_ativo, dt_posicao); reprocessar a mesma data atualiza os valores.
+    """
+    def chave(bundle: ParsedBundleDTO) -> tuple:
+        return (bundle.ativo.cd_ativo, bundle.ativo.cd_isin, bundle.lote.dt_operacao, bundle.lote.vl_pu_compra)
+
+    existentes = get_ativos_por_chave_natural(db, fundo_id, {bundle.ativo.cd_ativo for bundle in chunk})
+
+    # Chaves novas (sem repetir as que aparecem mais de uma vez no mesmo chunk)
+    novos: Dict[tuple, ParsedBundleDTO] = {}
+    for bundle in chunk:
+        if chave(bundle) not in existentes:
+            novos.setdefault(chave(bundle), bundle)
+
+    ids_lote = bulk_insert_lotes(db, [
+        bundle.lote.model_dump(exclude={"id_lote"}) for bundle in novos.values()
+    ])
+    ids_ativo = bulk_insert_ativos(db, [
+        _ativo_row(bundle, fundo_id, id_lote) for bundle, id_lote in zip(novos.values(), ids_lote)
+    ])
+    for key, id_ativo, id_lote in zip(novos.keys(), ids_ativo, ids_lote):
+        existentes[key] = (id_ativo, id_lote)
+
+    for bundle in chunk:
+        bundle.ativo.id_ativo, bundle.lote.id_lote = existentes[chave(bundle)]
+
+    # Quantidade disponível dos lotes reaproveitados muda de um arquivo para o outro
+    bulk_update_lotes(db, list({
+        bundle.lote.id_lote: {"id_lote": bundle.lote.id_lote, "qtd_comprada": bundle.lote.qtd_comprada}
+        for bundle in chunk
+        if chave(bundle) not in novos or novos[chave(bundle)] is not bundle
+    }.values()))
+
+    # Uma linha por (id_ativo, dt_posicao); se repetir no chunk, vale a última
+    posicoes: Dict[tuple, ParsedBundleDTO] = {
+        (bundle.ativo.id_ativo, bundle.posicao.dt_posicao): bundle for bundle in chunk
+    }
+    ids_posicao = bulk_upsert_posicoes(db, [
+        _posicao_row(bundle, bundle.ativo.id_ativo) for bundle in posicoes.values()
+    ])
+    ids_por_chave = dict(zip(posicoes.keys(), ids_posicao))
+    for bundle in chunk:
+        bundle.posicao.id_posicao = ids_por_chave[(bundle.ativo.id_ativo, bundle.posicao.dt_posicao)]
+
+
+def _ativo_row(bundle: ParsedBundleDTO, fundo_id: int | None, id_lote: int) -> dict:
+    """Colunas de `Ativo` para o insert em lote (relaciona ao Lote, Indexador e Fundo)."""
+    return {
+        **bundle.ativo.model_dump(exclude={"id_ativo"}),
+        "id_fundo": fundo_id,
+        "id_lote": id_lote,
+        "id_indexador": bundle.indexador.id_indexador,
+    }
+
+
+def _posicao_row(bundle: ParsedBundleDTO, id_ativo: int) -> dict:
+    """Colunas de `Posicao` para o insert em lote (relaciona ao Ativo)."""
+    return {**bundle.posicao.model_dump(exclude={"id_posicao"}), "id_ativo": id_ativo}
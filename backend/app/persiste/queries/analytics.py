@@ -1,87 +1,82 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select, case, literal, null, union_all
 from app.models import Ativo, Indexador, Lote, Posicao, AtivoEnriquecido
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
+from .filters import aplicar_filtros
+from .paginacao import Cursor, CONTAGEM_EXATA, CONTAGEM_ESTIMADA, paginar_por_cursor, contar_total
 
 
-def get_overview_data(
-    db: Session, 
+# Colunas de AtivoEnriquecido devolvidas no top N quando enriched=True
+_COLUNAS_ENRIQUECIDAS = ("serie", "emissao", "devedor", "securitizadora", "resgate_antecipado", "agente_fiduciario")
+
+
+def get_overview_agregado(
+    db: Session,
     enriched: bool = False,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     indexador: Optional[str] = None,
-    codigo_ativo: Optional[str] = None
+    codigo_ativo: Optional[str] = None,
+    fundo_id: Optional[int] = None,
+    top_n: int = 5
 ) -> Dict[str, Any]:
-    """Busca dados do overview geral"""
-    from datetime import datetime
-    
-    # Construir query base com joins necessários
-    base_query = db.query(Ativo).join(Posicao, Ativo.id_ativo == Posicao.id_ativo).join(Indexador, Ativo.id_indexador == Indexador.id_indexador)
-    
-    # Aplicar filtros
-    if date_from:
-        try:
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-            base_query = base_query.filter(Posicao.dt_posicao >= date_from_obj)
-        except ValueError:
-            pass  # Ignorar data inválida
-    
-    if date_to:
-        try:
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-            base_query = base_query.filter(Posicao.dt_posicao <= date_to_obj)
-        except ValueError:
-            pass  # Ignorar data inválida
-    
-    if indexador:
-        base_query = base_query.filter(Indexador.cd_indexador == indexador)
-    
-    if codigo_ativo:
-        base_query = base_query.filter(Ativo.cd_ativo.ilike(f'%{codigo_ativo}%'))
-    
-    # Total de ativos (com filtros aplicados)
-    total_ativos = base_query.count()
-    
-    # Total de indexadores únicos (com filtros aplicados)
-    total_indexadores = base_query.with_entities(Indexador.id_indexador).distinct().count()
-    
-    # Valor total (soma das posições com filtros aplicados)
-    valor_total = base_query.with_entities(func.sum(Posicao.vl_principal)).scalar() or 0
-    
-    # Indexadores com contagem (aplicar filtros)
-    indexadores_query = base_query.with_entities(
-        Indexador.cd_indexador,
-        func.count(Ativo.id_ativo).label('quantidade')
-    ).group_by(Indexador.cd_indexador)
-    indexadores_stats = indexadores_query.all()
-    
-    # Top 5 ativos por valor (aplicar filtros)
+    """
+    Totais, distribuição por indexador e top N por valor em uma única consulta.
+
+    - CTE `base` com o join filtrado (Ativo x Posicao x Indexador), lido uma vez só.
+    - `GROUP BY ROLLUP(cd_indexador)` devolve as linhas por indexador e a linha de total.
+    - O top N vem da mesma CTE via UNION ALL; `tipo` identifica cada linha
+      (colunas que não se aplicam ao tipo vêm NULL).
+    - `fundo_id` restringe aos ativos do fundo (usado pelo analytics do fundo).
+    """
+    base = select(
+        Ativo.id_ativo,
+        Ativo.cd_ativo,
+        Posicao.vl_principal,
+        Indexador.cd_indexador
+    ).select_from(Ativo).join(Posicao, Ativo.id_ativo == Posicao.id_ativo).join(Indexador, Ativo.id_indexador == Indexador.id_indexador)
+    base = aplicar_filtros(base, date_from, date_to, indexador, codigo_ativo)
+    if fundo_id is not None:
+        base = base.where(Ativo.id_fundo == fundo_id)
+    base = base.cte("base")
+
+    colunas_enriquecidas = [getattr(AtivoEnriquecido, nome) for nome in _COLUNAS_ENRIQUECIDAS] if enriched else []
+
+    # Totais (grouping = 1) e contagem/soma por indexador (grouping = 0)
+    agregados = select(
+        case((func.grouping(base.c.cd_indexador) == 1, literal("total")), else_=literal("indexador")).label("tipo"),
+        base.c.cd_indexador,
+        func.count().label("quantidade"),
+        func.coalesce(func.sum(base.c.vl_principal), 0).label("valor"),
+        null().label("cd_ativo"),
+        *[null().label(coluna.key) for coluna in colunas_enriquecidas]
+    ).group_by(func.rollup(base.c.cd_indexador))
+
+    # Top N por valor
+    top = select(
+        literal("top").label("tipo"),
+        base.c.cd_indexador,
+        null().label("quantidade"),
+        base.c.vl_principal.label("valor"),
+        base.c.cd_ativo,
+        *colunas_enriquecidas
+    ).select_from(base)
     if enriched:
-        top_ativos_query = base_query.with_entities(
-            Ativo.cd_ativo,
-            Posicao.vl_principal,
-            Indexador.cd_indexador,
-            AtivoEnriquecido.serie,
-            AtivoEnriquecido.emissao,
-            AtivoEnriquecido.devedor,
-            AtivoEnriquecido.securitizadora,
-            AtivoEnriquecido.resgate_antecipado,
-            AtivoEnriquecido.agente_fiduciario
-        ).outerjoin(AtivoEnriquecido, Ativo.id_ativo == AtivoEnriquecido.id_ativo).order_by(desc(Posicao.vl_principal)).limit(5)
-        top_ativos = top_ativos_query.all()
-    else:
-        top_ativos_query = base_query.with_entities(
-            Ativo.cd_ativo,
-            Posicao.vl_principal,
-            Indexador.cd_indexador
-        ).order_by(desc(Posicao.vl_principal)).limit(5)
-        top_ativos = top_ativos_query.all()
-    
+        top = top.outerjoin(AtivoEnriquecido, base.c.id_ativo == AtivoEnriquecido.id_ativo)
+    top = top.order_by(desc(base.c.vl_principal)).limit(top_n)
+
+    linhas = db.execute(union_all(agregados, top)).all()
+
+    total = next((linha for linha in linhas if linha.tipo == "total"), None)
+    total_ativos = total.quantidade if total else 0
+    indexadores_stats = [linha for linha in linhas if linha.tipo == "indexador"]
+    top_ativos = sorted((linha for linha in linhas if linha.tipo == "top"), key=lambda linha: linha.valor, reverse=True)
+
     return {
         "total_ativos": total_ativos,
-        "total_indexadores": total_indexadores,
-        "valor_total": float(valor_total),
+        "total_indexadores": len(indexadores_stats),
+        "valor_total": float(total.valor) if total else 0.0,
         "indexadores": [
             {
                 "nome": item.cd_indexador,
@@ -93,15 +88,27 @@ def get_overview_data(
         "top_ativos": [
             {
                 "codigo": ativo.cd_ativo,
-                "valor": float(ativo.vl_principal),
+                "valor": float(ativo.valor),
                 "indexador": ativo.cd_indexador,
-                **({"serie": ativo.serie, "emissao": ativo.emissao, "devedor": ativo.devedor, "securitizadora": ativo.securitizadora, "resgate_antecipado": ativo.resgate_antecipado, "agente_fiduciario": ativo.agente_fiduciario} if enriched else {})
+                **({nome: getattr(ativo, nome) for nome in _COLUNAS_ENRIQUECIDAS} if enriched else {})
             }
             for ativo in top_ativos
         ]
     }
 
 
+def get_overview_data(
+    db: Session, 
+    enriched: bool = False,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    indexador: Optional[str] = None,
+    codigo_ativo: Optional[str] = None
+) -> Dict[str, Any]:
+    """Busca dados do overview geral (uma única consulta, ver get_overview_agregado)"""
+    return get_overview_agregado(db, enriched, date_from, date_to, indexador, codigo_ativo)
+
+
 def get_indexadores_data(db: Session) -> Dict[str, Any]:
     """Busca dados dos indexadores"""
     indexadores = db.query(
@@ -138,57 +145,33 @@ def get_ativos_data(
     enriched: bool = False,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    codigo_ativo: Optional[str] = None
+    codigo_ativo: Optional[str] = None,
+    cursor: Optional[Cursor] = None,
+    contagem: str = CONTAGEM_EXATA
 ) -> Dict[str, Any]:
-    """Busca dados dos ativos com filtros"""
-    from datetime import datetime
-    
+    """
+    Busca dados dos ativos com filtros
+
+    Paginação em keyset por (vl_principal DESC, id_posicao DESC): `cursor` (vindo do
+    `next_cursor` da página anterior) tem precedência sobre `offset`. O total é
+    exato, estimado pelo planner ou omitido conforme `contagem`.
+    """
     if enriched:
         enriched_query = db.query(Ativo, Posicao, Indexador, AtivoEnriquecido).select_from(Ativo).join(Posicao, Ativo.id_ativo == Posicao.id_ativo).join(Indexador, Ativo.id_indexador == Indexador.id_indexador).outerjoin(AtivoEnriquecido, Ativo.id_ativo == AtivoEnriquecido.id_ativo)
         
         # Aplicar filtros
-        if indexador:
-            enriched_query = enriched_query.filter(Indexador.cd_indexador == indexador)
-        if date_from:
-            try:
-                date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-                enriched_query = enriched_query.filter(Posicao.dt_posicao >= date_from_obj)
-            except ValueError:
-                pass
-        if date_to:
-            try:
-                date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-                enriched_query = enriched_query.filter(Posicao.dt_posicao <= date_to_obj)
-            except ValueError:
-                pass
-        if codigo_ativo:
-            enriched_query = enriched_query.filter(Ativo.cd_ativo.ilike(f'%{codigo_ativo}%'))
+        enriched_query = aplicar_filtros(enriched_query, date_from, date_to, indexador, codigo_ativo)
             
-        ativos_enriched = enriched_query.offset(offset).limit(limit).all()
-        total = enriched_query.count()
+        ativos_enriched, next_cursor = paginar_por_cursor(enriched_query, limit, offset, cursor)
+        total = contar_total(db, enriched_query, contagem)
     else:
         simple_query = db.query(Ativo, Posicao, Indexador).select_from(Ativo).join(Posicao, Ativo.id_ativo == Posicao.id_ativo).join(Indexador, Ativo.id_indexador == Indexador.id_indexador)
         
         # Aplicar filtros
-        if indexador:
-            simple_query = simple_query.filter(Indexador.cd_indexador == indexador)
-        if date_from:
-            try:
-                date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-                simple_query = simple_query.filter(Posicao.dt_posicao >= date_from_obj)
-            except ValueError:
-                pass
-        if date_to:
-            try:
-                date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-                simple_query = simple_query.filter(Posicao.dt_posicao <= date_to_obj)
-            except ValueError:
-                pass
-        if codigo_ativo:
-            simple_query = simple_query.filter(Ativo.cd_ativo.ilike(f'%{codigo_ativo}%'))
+        simple_query = aplicar_filtros(simple_query, date_from, date_to, indexador, codigo_ativo)
             
-        ativos_simple = simple_query.offset(offset).limit(limit).all()
-        total = simple_query.count()
+        ativos_simple, next_cursor = paginar_por_cursor(simple_query, limit, offset, cursor)
+        total = contar_total(db, simple_query, contagem)
     
     if enriched:
         return {
@@ -208,8 +191,10 @@ def get_ativos_data(
                 for ativo, posicao, indexador, ativo_enriquecido in ativos_enriched
             ],
             "total": total,
+            "total_estimado": contagem == CONTAGEM_ESTIMADA,
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": next_cursor
         }
     else:
         return {
@@ -223,8 +208,10 @@ def get_ativos_data(
                 for ativo, posicao, indexador in ativos_simple
             ],
             "total": total,
+            "total_estimado": contagem == CONTAGEM_ESTIMADA,
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": next_cursor
         }
 
 
@@ -237,8 +224,6 @@ def get_evolucao_mensal_data(
     codigo_ativo: Optional[str] = None
 ) -> Dict[str, Any]:
     """Busca dados da evolução mensal"""
-    from datetime import datetime
-    
     # Construir query base com joins necessários
     query = db.query(
         func.extract('month', Lote.dt_operacao).label('mes'),
@@ -252,25 +237,7 @@ def get_evolucao_mensal_data(
     if ano:
         query = query.filter(func.extract('year', Lote.dt_operacao) == ano)
     
-    if date_from:
-        try:
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-            query = query.filter(Posicao.dt_posicao >= date_from_obj)
-        except ValueError:
-            pass  # Ignorar data inválida
-    
-    if date_to:
-        try:
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-            query = query.filter(Posicao.dt_posicao <= date_to_obj)
-        except ValueError:
-            pass  # Ignorar data inválida
-    
-    if indexador:
-        query = query.filter(Indexador.cd_indexador == indexador)
-    
-    if codigo_ativo:
-        query = query.filter(Ativo.cd_ativo.ilike(f'%{codigo_ativo}%'))
+    query = aplicar_filtros(query, date_from, date_to, indexador, codigo_ativo)
     
     evolucao = query.all()
     
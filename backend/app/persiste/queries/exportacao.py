@@ -0,0 +1,70 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models import Ativo, Indexador, Posicao, AtivoEnriquecido
+from typing import Iterator, Optional, Sequence, Any
+from .filters import aplicar_filtros
+
+
+# Colunas exportadas (nome na saída -> coluna); a ordem é a das colunas do arquivo
+COLUNAS_EXPORTACAO = (
+    ("id_fundo"                , Ativo.id_fundo),
+    ("codigo"                  , Ativo.cd_ativo),
+    ("isin"                    , Ativo.cd_isin),
+    ("indexador"               , Indexador.cd_indexador),
+    ("perc_indexador"          , Ativo.perc_indexador),
+    ("perc_cupom"              , Ativo.perc_cupom),
+    ("data_emissao"            , Ativo.dt_emissao),
+    ("data_vencimento"         , Ativo.dt_vencimento),
+    ("data_posicao"            , Posicao.dt_posicao),
+    ("pu_posicao"              , Posicao.vl_pu_posicao),
+    ("valor_principal"         , Posicao.vl_principal),
+    ("financeiro_disponivel"   , Posicao.vl_financeiro_disponivel),
+)
+
+COLUNAS_EXPORTACAO_ENRIQUECIDAS = (
+    ("serie"                   , AtivoEnriquecido.serie),
+    ("emissao"                 , AtivoEnriquecido.emissao),
+    ("devedor"                 , AtivoEnriquecido.devedor),
+    ("securitizadora"          , AtivoEnriquecido.securitizadora),
+    ("resgate_antecipado"      , AtivoEnriquecido.resgate_antecipado),
+    ("agente_fiduciario"       , AtivoEnriquecido.agente_fiduciario),
+    ("dt_ultimo_enriquecimento", AtivoEnriquecido.dt_ultimo_enriquecimento),
+)
+
+
+def colunas_exportacao(enriched: bool = False) -> tuple:
+    """(nome, coluna) exportados, com as colunas da ANBIMA quando `enriched`"""
+    return COLUNAS_EXPORTACAO + (COLUNAS_EXPORTACAO_ENRIQUECIDAS if enriched else ())
+
+
+def iter_posicoes_exportacao(
+    db          : Session,
+    tamanho_lote: int,
+    fundo_id    : Optional[int] = None,
+    enriched    : bool = False,
+    date_from   : Optional[str] = None,
+    date_to     : Optional[str] = None,
+    indexador   : Optional[str] = None,
+    codigo_ativo: Optional[str] = None
+) -> Iterator[Sequence[Sequence[Any]]]:
+    """
+    Posições filtradas em lotes de até `tamanho_lote` linhas (tuplas na ordem de `colunas_exportacao`).
+
+    - `yield_per` abre um cursor no servidor (named cursor do psycopg2): só um lote fica
+      em memória por vez, qualquer que seja o tamanho do resultado.
+    - Sem ORDER BY: a ordenação obrigaria o Postgres a ordenar tudo antes da primeira linha.
+    - Lê colunas (não entidades ORM), então não há identity map crescendo na sessão.
+    - A sessão precisa continuar aberta enquanto o iterador é consumido.
+    """
+    stmt = select(*[coluna.label(nome) for nome, coluna in colunas_exportacao(enriched)]).select_from(Ativo).join(
+        Posicao, Ativo.id_ativo == Posicao.id_ativo
+    ).join(Indexador, Ativo.id_indexador == Indexador.id_indexador)
+    if enriched:
+        stmt = stmt.outerjoin(AtivoEnriquecido, Ativo.id_ativo == AtivoEnriquecido.id_ativo)
+    stmt = aplicar_filtros(stmt, date_from, date_to, indexador, codigo_ativo)
+    if fundo_id is not None:
+        stmt = stmt.where(Ativo.id_fundo == fundo_id)
+
+    resultado = db.execute(stmt.execution_options(yield_per=tamanho_lote))
+    for lote in resultado.partitions():
+        yield lote
@@ -0,0 +1,62 @@
+from sqlalchemy import or_
+from app.models import Ativo, Indexador, Posicao
+from typing import Optional
+from datetime import date, datetime
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """Converte 'YYYY-MM-DD' em date; datas vazias ou inválidas viram None (filtro ignorado)"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def escape_like(value: str) -> str:
+    """Escapa os curingas do LIKE (%, _ e a própria barra) para busca literal"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def filtro_codigo_ativo(codigo_ativo: str):
+    """
+    Busca por substring em `cd_ativo` ou `cd_isin` (sem diferenciar maiúsculas).
+
+    O ILIKE '%...%' é atendido pelos índices GIN trigram (pg_trgm) das duas colunas.
+    """
+    padrao = f'%{escape_like(codigo_ativo.strip())}%'
+    return or_(
+        Ativo.cd_ativo.ilike(padrao, escape='\\'),
+        Ativo.cd_isin.ilike(padrao, escape='\\'),
+    )
+
+
+def aplicar_filtros(
+    query,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    indexador: Optional[str] = None,
+    codigo_ativo: Optional[str] = None
+):
+    """
+    Aplica os filtros comuns dos endpoints de analytics e de fundos.
+
+    - `query` precisa já ter Ativo, Posicao e Indexador no FROM (join).
+    - Funciona com `Query` (db.query) e com `Select` (select()).
+    """
+    dt_from = parse_date(date_from)
+    if dt_from:
+        query = query.filter(Posicao.dt_posicao >= dt_from)
+
+    dt_to = parse_date(date_to)
+    if dt_to:
+        query = query.filter(Posicao.dt_posicao <= dt_to)
+
+    if indexador:
+        query = query.filter(Indexador.cd_indexador == indexador)
+
+    if codigo_ativo and codigo_ativo.strip():
+        query = query.filter(filtro_codigo_ativo(codigo_ativo))
+
+    return query
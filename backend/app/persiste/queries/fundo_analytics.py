@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func
 from app.models import Ativo, Indexador, Lote, Posicao, AtivoEnriquecido, FundoInvestimento
 from typing import Dict, Any, Optional
 from decimal import Decimal
+from .filters import aplicar_filtros
+from .analytics import get_overview_agregado
+from .paginacao import Cursor, CONTAGEM_EXATA, CONTAGEM_ESTIMADA, paginar_por_cursor, contar_total
 
 def get_fundo_analytics_data(
     db: Session, 
@@ -25,8 +28,6 @@ def get_fundo_analytics_data(
         Dict com dados de analytics do fundo
     """
     try:
-        from datetime import datetime
-        
         # Verificar se fundo existe
         fundo = db.query(FundoInvestimento).filter(
             FundoInvestimento.id_fundo_investimento == fundo_id
@@ -35,70 +36,11 @@ def get_fundo_analytics_data(
         if not fundo:
             return {}
         
-        # Construir query base com joins necessários
-        base_query = db.query(Ativo).join(Posicao, Ativo.id_ativo == Posicao.id_ativo).join(Indexador, Ativo.id_indexador == Indexador.id_indexador).filter(
-            Ativo.id_fundo == fundo_id
+        # Totais, indexadores e top 5 do fundo em uma única consulta
+        overview = get_overview_agregado(
+            db, enriched, date_from, date_to, indexador, codigo_ativo, fundo_id=fundo_id
         )
         
-        # Aplicar filtros
-        if date_from:
-            try:
-                date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-                base_query = base_query.filter(Posicao.dt_posicao >= date_from_obj)
-            except ValueError:
-                pass  # Ignorar data inválida
-        
-        if date_to:
-            try:
-                date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-                base_query = base_query.filter(Posicao.dt_posicao <= date_to_obj)
-            except ValueError:
-                pass  # Ignorar data inválida
-        
-        if indexador:
-            base_query = base_query.filter(Indexador.cd_indexador == indexador)
-        
-        if codigo_ativo:
-            base_query = base_query.filter(Ativo.cd_ativo.ilike(f'%{codigo_ativo}%'))
-        
-        # Total de ativos do fundo (com filtros aplicados)
-        total_ativos = base_query.count()
-        
-        # Total de indexadores únicos do fundo (com filtros aplicados)
-        total_indexadores = base_query.with_entities(Indexador.id_indexador).distinct().count()
-        
-        # Valor total do fundo (soma das posições com filtros aplicados)
-        valor_total = base_query.with_entities(func.sum(Posicao.vl_principal)).scalar() or 0
-        
-        # Indexadores com contagem do fundo (aplicar filtros)
-        indexadores_query = base_query.with_entities(
-            Indexador.cd_indexador,
-            func.count(Ativo.id_ativo).label('quantidade')
-        ).group_by(Indexador.cd_indexador)
-        indexadores_stats = indexadores_query.all()
-        
-        # Top 5 ativos por valor do fundo (aplicar filtros)
-        if enriched:
-            top_ativos_query = base_query.with_entities(
-                Ativo.cd_ativo,
-                Posicao.vl_principal,
-                Indexador.cd_indexador,
-                AtivoEnriquecido.serie,
-                AtivoEnriquecido.emissao,
-                AtivoEnriquecido.devedor,
-                AtivoEnriquecido.securitizadora,
-                AtivoEnriquecido.resgate_antecipado,
-                AtivoEnriquecido.agente_fiduciario
-            ).outerjoin(AtivoEnriquecido, Ativo.id_ativo == AtivoEnriquecido.id_ativo).order_by(desc(Posicao.vl_principal)).limit(5)
-            top_ativos = top_ativos_query.all()
-        else:
-            top_ativos_query = base_query.with_entities(
-                Ativo.cd_ativo,
-                Posicao.vl_principal,
-                Indexador.cd_indexador
-            ).order_by(desc(Posicao.vl_principal)).limit(5)
-            top_ativos = top_ativos_query.all()
-        
         # Evolução mensal do fundo
         evolucao_mensal = db.query(
             func.extract('month', Lote.dt_operacao).label('mes'),
@@ -122,28 +64,7 @@ def get_fundo_analytics_data(
         return {
             "fundo_id": fundo_id,
             "fundo_nome": fundo.nm_fundo_investimento,
-            "total_ativos": total_ativos,
-            "total_indexadores": total_indexadores,
-            "valor_total": float(valor_total),
-            "indexadores": [
-                {
-                    "nome": item.cd_indexador,
-                    "quantidade": item.quantidade,
-                    "percentual": round((item.quantidade / total_ativos * 100), 1) if total_ativos > 0 else 0
-                }
-                for item in indexadores_stats
-            ],
-            "top_ativos": [
-                {
-                    "codigo": ativo.cd_ativo,
-                    "valor": float(ativo.vl_principal),
-                    "indexador": ativo.cd_indexador,
-                    **({"serie": ativo.serie, "emissao": ativo.emissao, "devedor": ativo.devedor, 
-                        "securitizadora": ativo.securitizadora, "resgate_antecipado": ativo.resgate_antecipado, 
-                        "agente_fiduciario": ativo.agente_fiduciario} if enriched else {})
-                }
-                for ativo in top_ativos
-            ],
+            **overview,
             "evolucao_mensal": [
                 {
                     "mes": meses_nomes.get(int(item.mes), f"Mês {int(item.mes)}"),
@@ -167,7 +88,9 @@ def get_fundo_ativos_data(
     enriched: bool = False,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    codigo_ativo: Optional[str] = None
+    codigo_ativo: Optional[str] = None,
+    cursor: Optional[Cursor] = None,
+    contagem: str = CONTAGEM_EXATA
 ) -> Dict[str, Any]:
     """
     Busca dados dos ativos de um fundo específico
@@ -177,15 +100,15 @@ def get_fundo_ativos_data(
         fundo_id: ID do fundo
         indexador: Filtro por indexador
         limit: Limite de resultados
-        offset: Offset para paginação
+        offset: Offset para paginação (ignorado quando há `cursor`)
         enriched: Se deve incluir dados enriquecidos
+        cursor: Chave de ordenação decodificada do `next_cursor` da página anterior
+        contagem: Modo do total (exata, estimada ou nenhuma)
         
     Returns:
         Dict com dados dos ativos do fundo
     """
     try:
-        from datetime import datetime
-        
         if enriched:
             enriched_query = db.query(Ativo, Posicao, Indexador, AtivoEnriquecido).select_from(Ativo).join(
                 Posicao, Ativo.id_ativo == Posicao.id_ativo
@@ -201,45 +124,13 @@ def get_fundo_ativos_data(
         
         # Aplicar filtros
         if enriched:
-            if indexador:
-                enriched_query = enriched_query.filter(Indexador.cd_indexador == indexador)
-            if date_from:
-                try:
-                    date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-                    enriched_query = enriched_query.filter(Posicao.dt_posicao >= date_from_obj)
-                except ValueError:
-                    pass
-            if date_to:
-                try:
-                    date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-                    enriched_query = enriched_query.filter(Posicao.dt_posicao <= date_to_obj)
-                except ValueError:
-                    pass
-            if codigo_ativo:
-                enriched_query = enriched_query.filter(Ativo.cd_ativo.ilike(f'%{codigo_ativo}%'))
-            
-            ativos_enriched = enriched_query.offset(offset).limit(limit).all()
-            total = enriched_query.count()
+            enriched_query = aplicar_filtros(enriched_query, date_from, date_to, indexador, codigo_ativo)
+            ativos_enriched, next_cursor = paginar_por_cursor(enriched_query, limit, offset, cursor)
+            total = contar_total(db, enriched_query, contagem)
         else:
-            if indexador:
-                simple_query = simple_query.filter(Indexador.cd_indexador == indexador)
-            if date_from:
-                try:
-                    date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-                    simple_query = simple_query.filter(Posicao.dt_posicao >= date_from_obj)
-                except ValueError:
-                    pass
-            if date_to:
-                try:
-                    date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-                    simple_query = simple_query.filter(Posicao.dt_posicao <= date_to_obj)
-                except ValueError:
-                    pass
-            if codigo_ativo:
-                simple_query = simple_query.filter(Ativo.cd_ativo.ilike(f'%{codigo_ativo}%'))
-            
-            ativos_simple = simple_query.offset(offset).limit(limit).all()
-            total = simple_query.count()
+            simple_query = aplicar_filtros(simple_query, date_from, date_to, indexador, codigo_ativo)
+            ativos_simple, next_cursor = paginar_por_cursor(simple_query, limit, offset, cursor)
+            total = contar_total(db, simple_query, contagem)
         
         if enriched:
             return {
@@ -259,8 +150,10 @@ def get_fundo_ativos_data(
                     for ativo, posicao, indexador, ativo_enriquecido in ativos_enriched
                 ],
                 "total": total,
+                "total_estimado": contagem == CONTAGEM_ESTIMADA,
                 "limit": limit,
-                "offset": offset
+                "offset": offset,
+                "next_cursor": next_cursor
             }
         else:
             return {
@@ -274,11 +167,13 @@ def get_fundo_ativos_data(
                     for ativo, posicao, indexador in ativos_simple
                 ],
                 "total": total,
+                "total_estimado": contagem == CONTAGEM_ESTIMADA,
                 "limit": limit,
-                "offset": offset
+                "offset": offset,
+                "next_cursor": next_cursor
             }
             
     except Exception as e:
         print(f"Erro ao buscar ativos do fundo {fundo_id}: {e}")
-        return {"ativos": [], "total": 0, "limit": limit, "offset": offset}
+        return {"ativos": [], "total": 0, "limit": limit, "offset": offset, "next_cursor": None}
 
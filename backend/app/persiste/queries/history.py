@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select, distinct
 from app.models import Lote, Ativo, Indexador, Posicao
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
+from .paginacao import Cursor, paginar_por_cursor
 
 
 def get_file_history(
@@ -10,49 +11,59 @@ def get_file_history(
     limit: int = 10, 
     offset: int = 0
 ) -> Dict[str, Any]:
-    """Busca histórico de arquivos com paginação"""
-    # Buscar lotes com informações básicas
-    lotes = (
-        db.query(Lote)
-        .order_by(desc(Lote.created_at))
+    """
+    Busca histórico de arquivos com paginação (uma única consulta por página)
+
+    - Subconsulta `pagina`: lotes da página (mais recentes primeiro) e o total de
+      lotes via `count(*) OVER ()`, calculado antes do LIMIT.
+    - As estatísticas de cada lote (qtd de ativos, soma das posições, indexadores
+      distintos com `array_agg(DISTINCT ...)`) vêm de um LEFT JOIN + GROUP BY id_lote.
+    """
+    pagina = (
+        select(
+            Lote.id_lote,
+            Lote.created_at,
+            func.count().over().label("total_lotes")
+        )
+        .order_by(desc(Lote.created_at), desc(Lote.id_lote))
         .offset(offset)
         .limit(limit)
-        .all()
+        .subquery("pagina")
     )
-    
-    # Para cada lote, buscar estatísticas
-    history_data = []
-    for lote in lotes:
-        # Contar ativos e valor total do lote
-        ativos_count = db.query(Ativo).filter(Ativo.id_lote == lote.id_lote).count()
-        valor_total = (
-            db.query(func.sum(Posicao.vl_principal))
-            .join(Ativo)
-            .filter(Ativo.id_lote == lote.id_lote)
-            .scalar() or 0
-        )
-        
-        # Buscar indexadores únicos
-        indexadores = (
-            db.query(Indexador.cd_indexador)
-            .join(Ativo)
-            .filter(Ativo.id_lote == lote.id_lote)
-            .distinct()
-            .all()
+
+    query = (
+        select(
+            pagina.c.id_lote,
+            pagina.c.created_at,
+            pagina.c.total_lotes,
+            func.count(distinct(Ativo.id_ativo)).label("quantidade_ativos"),
+            func.coalesce(func.sum(Posicao.vl_principal), 0).label("valor_total"),
+            func.array_remove(func.array_agg(distinct(Indexador.cd_indexador)), None).label("indexadores")
         )
-        
-        history_data.append({
+        .select_from(pagina)
+        .outerjoin(Ativo, Ativo.id_lote == pagina.c.id_lote)
+        .outerjoin(Posicao, Posicao.id_ativo == Ativo.id_ativo)
+        .outerjoin(Indexador, Indexador.id_indexador == Ativo.id_indexador)
+        .group_by(pagina.c.id_lote, pagina.c.created_at, pagina.c.total_lotes)
+        .order_by(desc(pagina.c.created_at), desc(pagina.c.id_lote))
+    )
+    lotes = db.execute(query).all()
+    
+    history_data = [
+        {
             "id_lote": lote.id_lote,
             "nome_arquivo": f"lote_{lote.id_lote}.xml",
             "data_envio": lote.created_at.isoformat(),
-            "quantidade_ativos": ativos_count,
-            "valor_total": float(valor_total),
-            "indexadores": [idx.cd_indexador for idx in indexadores],
+            "quantidade_ativos": lote.quantidade_ativos,
+            "valor_total": float(lote.valor_total),
+            "indexadores": list(lote.indexadores or []),
             "status": "processado"
-        })
+        }
+        for lote in lotes
+    ]
     
-    # Contar total de lotes
-    total_lotes = db.query(Lote).count()
+    # Página vazia (offset além do fim) não traz o total na janela
+    total_lotes = lotes[0].total_lotes if lotes else db.scalar(select(func.count()).select_from(Lote))
     
     return {
         "files": history_data,
@@ -62,38 +73,45 @@ def get_file_history(
     }
 
 
-def get_file_details(db: Session, lote_id: int) -> Optional[Dict[str, Any]]:
-    """Busca detalhes de um arquivo específico"""
+def get_file_details(
+    db: Session,
+    lote_id: int,
+    limit: int = 100,
+    cursor: Optional[Cursor] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Busca detalhes de um arquivo específico
+
+    - Estatísticas (quantidade, soma e indexadores distintos) em uma única agregação no banco,
+      sem trazer as posições do lote.
+    - Ativos paginados em keyset por (vl_principal DESC, id_posicao DESC), só com as colunas
+      exibidas (sem entidades ORM); `next_cursor` leva à página seguinte.
+    """
     # Buscar lote
     lote = db.query(Lote).filter(Lote.id_lote == lote_id).first()
     if not lote:
         return None
     
-    # Buscar ativos do lote
-    ativos = (
-        db.query(Ativo, Posicao, Indexador)
-        .join(Posicao)
-        .join(Indexador)
+    estatisticas = db.execute(
+        select(
+            func.count().label("total_ativos"),
+            func.coalesce(func.sum(Posicao.vl_principal), 0).label("valor_total"),
+            func.array_agg(distinct(Indexador.cd_indexador)).label("indexadores")
+        )
+        .select_from(Ativo)
+        .join(Posicao, Ativo.id_ativo == Posicao.id_ativo)
+        .join(Indexador, Ativo.id_indexador == Indexador.id_indexador)
+        .where(Ativo.id_lote == lote_id)
+    ).one()
+    
+    ativos_query = (
+        db.query(Ativo.cd_ativo, Ativo.dt_vencimento, Posicao.id_posicao, Posicao.vl_principal, Indexador.cd_indexador)
+        .select_from(Ativo)
+        .join(Posicao, Ativo.id_ativo == Posicao.id_ativo)
+        .join(Indexador, Ativo.id_indexador == Indexador.id_indexador)
         .filter(Ativo.id_lote == lote_id)
-        .all()
     )
-    
-    # Organizar dados
-    ativos_data = []
-    for ativo, posicao, indexador in ativos:
-        ativos_data.append({
-            "codigo": ativo.cd_ativo,
-            "valor_principal": float(posicao.vl_principal),
-            "indexador": indexador.cd_indexador,
-            "data_vencimento": ativo.dt_vencimento.isoformat() if ativo.dt_vencimento else None
-        })
-    
-    # Estatísticas do lote
-    total_ativos = len(ativos_data)
-    valor_total = sum(ativo["valor_principal"] for ativo in ativos_data)
-    
-    # Indexadores únicos
-    indexadores_unicos = list(set(ativo["indexador"] for ativo in ativos_data))
+    ativos, next_cursor = paginar_por_cursor(ativos_query, limit, cursor=cursor)
     
     return {
         "lote": {
@@ -103,11 +121,20 @@ def get_file_details(db: Session, lote_id: int) -> Optional[Dict[str, Any]]:
             "status": "processado"
         },
         "estatisticas": {
-            "total_ativos": total_ativos,
-            "valor_total": valor_total,
-            "indexadores": indexadores_unicos
+            "total_ativos": estatisticas.total_ativos,
+            "valor_total": float(estatisticas.valor_total),
+            "indexadores": list(estatisticas.indexadores or [])
         },
-        "ativos": ativos_data
+        "ativos": [
+            {
+                "codigo": ativo.cd_ativo,
+                "valor_principal": float(ativo.vl_principal),
+                "indexador": ativo.cd_indexador,
+                "data_vencimento": ativo.dt_vencimento.isoformat() if ativo.dt_vencimento else None
+            }
+            for ativo in ativos
+        ],
+        "next_cursor": next_cursor
     }
 
 
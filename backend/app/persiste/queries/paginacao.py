@@ -0,0 +1,92 @@
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, Query
+from app.models import Posicao
+from typing import Optional, Tuple, List, Any
+from decimal import Decimal, InvalidOperation
+import base64
+import json
+
+
+# Modos de contagem do total na listagem de ativos
+CONTAGEM_EXATA    = "exata"
+CONTAGEM_ESTIMADA = "estimada"
+CONTAGEM_NENHUMA  = "nenhuma"
+MODOS_CONTAGEM    = (CONTAGEM_EXATA, CONTAGEM_ESTIMADA, CONTAGEM_NENHUMA)
+
+# Chave de ordenação estável da listagem: (vl_principal DESC, id_posicao DESC)
+Cursor = Tuple[Decimal, int]
+
+
+def codificar_cursor(vl_principal: Decimal, id_posicao: int) -> str:
+    """Cursor opaco (base64 url-safe) com a chave de ordenação da última linha da página"""
+    bruto = json.dumps([str(vl_principal), id_posicao], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Cursor:
+    """
+    Converte o cursor recebido do cliente na chave de ordenação.
+
+    Raises:
+        ValueError: cursor malformado (vira 400 no controller)
+    """
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        vl_principal, id_posicao = json.loads(bruto)
+        return Decimal(vl_principal), int(id_posicao)
+    except (ValueError, TypeError, InvalidOperation) as e:
+        raise ValueError("Cursor de paginação inválido") from e
+
+
+def paginar_por_cursor(
+    query : Query,
+    limit : int,
+    offset: int = 0,
+    cursor: Optional[Cursor] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Página da listagem em keyset (seek) sobre (vl_principal DESC, id_posicao DESC).
+
+    - Com `cursor`, começa logo depois dele (`offset` é ignorado): o custo por página é
+      constante, atendido pelo índice ix_tb_posicao_vl_principal_id_posicao.
+    - Sem `cursor`, mantém o `offset` (compatibilidade com a paginação antiga).
+    - Busca `limit + 1` linhas só para saber se há próxima página; `next_cursor` é None na última.
+    - Serve para consultas de entidades (com Posicao) ou de colunas (com `vl_principal` e `id_posicao`).
+
+    Returns:
+        (linhas da página, next_cursor)
+    """
+    query = query.order_by(Posicao.vl_principal.desc(), Posicao.id_posicao.desc())
+    if cursor is not None:
+        query = query.filter(tuple_(Posicao.vl_principal, Posicao.id_posicao) < tuple_(*cursor))
+    elif offset:
+        query = query.offset(offset)
+
+    linhas = query.limit(limit + 1).all()
+    if len(linhas) <= limit:
+        return linhas, None
+
+    linhas = linhas[:limit]
+    ultima = linhas[-1]
+    ultima = next((entidade for entidade in ultima if isinstance(entidade, Posicao)), ultima)
+    return linhas, codificar_cursor(ultima.vl_principal, ultima.id_posicao)
+
+
+def contar_total(db: Session, query: Query, contagem: str) -> Optional[int]:
+    """
+    Total da listagem conforme o modo pedido.
+
+    - exata: COUNT(*) sobre o join filtrado (custa uma varredura completa).
+    - estimada: linhas previstas pelo planner (EXPLAIN, sem executar a consulta).
+    - nenhuma: None.
+    """
+    if contagem == CONTAGEM_NENHUMA:
+        return None
+    if contagem == CONTAGEM_EXATA:
+        return query.order_by(None).count()
+
+    compilado = query.order_by(None).statement.compile(dialect=db.get_bind().dialect)
+    plano = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compilado}", compilado.params).scalar()
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return int(plano[0]["Plan"]["Plan Rows"])
@@ -1,11 +1,55 @@
-from .ativo import insert_ativo
-from .indexador import insert_indexador
-from .lote import insert_lote
-from .posicao import insert_posicao
+from .ativo import insert_ativo, bulk_insert_ativos, get_ativos_por_chave_natural
+from .indexador import upsert_indexador, publicar_indexadores, warm_indexador_cache
+from .lote import insert_lote, bulk_insert_lotes, bulk_update_lotes
+from .posicao import insert_posicao, bulk_insert_posicoes, bulk_upsert_posicoes
+from .ingestao_job import (
+    insert_ingestao_job,
+    claim_proximo_job,
+    encerrar_jobs_abandonados,
+    atualizar_job,
+    get_ingestao_job,
+    get_conteudo_job_arquivo,
+    remover_arquivos_job,
+)
+from .cache_enriquecimento import get_cache_enriquecimento, upsert_cache_enriquecimento
+from .fila_enriquecimento import (
+    enfileirar_ativos,
+    claim_lote_enriquecimento,
+    concluir_itens_enriquecimento,
+    registrar_falhas_enriquecimento,
+    contar_fila_enriquecimento,
+    contar_enfileirados_desde,
+)
+from .versao_dados import incrementar_versao_dados, get_versoes_dados
 
 __all__ = [
     "insert_ativo",
-    "insert_indexador",
+    "upsert_indexador",
+    "publicar_indexadores",
+    "warm_indexador_cache",
     "insert_lote",
-    "insert_posicao"
+    "insert_posicao",
+    "bulk_insert_ativos",
+    "bulk_insert_lotes",
+    "bulk_insert_posicoes",
+    "get_ativos_por_chave_natural",
+    "bulk_update_lotes",
+    "bulk_upsert_posicoes",
+    "insert_ingestao_job",
+    "claim_proximo_job",
+    "encerrar_jobs_abandonados",
+    "atualizar_job",
+    "get_ingestao_job",
+    "get_conteudo_job_arquivo",
+    "remover_arquivos_job",
+    "get_cache_enriquecimento",
+    "upsert_cache_enriquecimento",
+    "enfileirar_ativos",
+    "claim_lote_enriquecimento",
+    "concluir_itens_enriquecimento",
+    "registrar_falhas_enriquecimento",
+    "contar_fila_enriquecimento",
+    "contar_enfileirados_desde",
+    "incrementar_versao_dados",
+    "get_versoes_dados"
 ]
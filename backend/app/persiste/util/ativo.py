@@ -1,6 +1,7 @@
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from app.models import Ativo
+from app.models import Ativo, Lote
 
 def insert_ativo(
     db     : Session,
@@ -31,3 +32,49 @@ def insert_ativo(
             raise RuntimeError(f"Erro ao inserir Ativo: {ativo}") from e
 
     return ativo
+
+
+def bulk_insert_ativos(
+    db  : Session,
+    rows: list[dict],
+) -> list[int]:
+    """
+    Insere vários `Ativo` de uma vez (INSERT multi-linha com RETURNING).
+
+    - `rows` são dicts com as colunas de `Ativo`.
+    - Retorna os `id_ativo` gerados na mesma ordem de `rows`.
+    - Não faz commit; a transação deve ser controlada fora desta função.
+    """
+    if not rows:
+        return []
+
+    stmt = insert(Ativo).returning(Ativo.id_ativo, sort_by_parameter_order=True)
+    return list(db.scalars(stmt, rows))
+
+
+def get_ativos_por_chave_natural(
+    db       : Session,
+    fundo_id : int | None,
+    cd_ativos: set[str],
+) -> dict[tuple, tuple[int, int]]:
+    """
+    Busca os `Ativo` já existentes do fundo para os `cd_ativos` informados.
+
+    - Retorna {(cd_ativo, cd_isin, dt_operacao, vl_pu_compra): (id_ativo, id_lote)}.
+    - A chave natural inclui o lote do ativo (data e PU de compra), já que é o
+      `Ativo` que referencia o `Lote`.
+    """
+    if not cd_ativos:
+        return {}
+
+    filtro_fundo = Ativo.id_fundo == fundo_id if fundo_id is not None else Ativo.id_fundo.is_(None)
+    rows = db.execute(
+        select(Ativo.cd_ativo, Ativo.cd_isin, Lote.dt_operacao, Lote.vl_pu_compra, Ativo.id_ativo, Ativo.id_lote)
+        .join(Lote, Ativo.id_lote == Lote.id_lote)
+        .where(filtro_fundo, Ativo.cd_ativo.in_(cd_ativos))
+    ).all()
+
+    return {
+        (row.cd_ativo, row.cd_isin, row.dt_operacao, row.vl_pu_compra): (row.id_ativo, row.id_lote)
+        for row in rows
+    }
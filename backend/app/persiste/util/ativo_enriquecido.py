@@ -1,7 +1,10 @@
+from sqlalchemy import func, select, exists, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from app.models import AtivoEnriquecido
 from app.DTOs.ativo_enriquecido import AtivoEnriquecidoDTO
-from typing import Optional
+from typing import Optional, List
+from datetime import date
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,20 +45,60 @@ def insert_ativo_enriquecido(
             existing.fl_erro_enriquecimento = ativo_enriquecido.fl_erro_enriquecimento
             existing.ds_erro_enriquecimento = ativo_enriquecido.ds_erro_enriquecimento
             
-            db.flush()
+            if commit:
+                db.commit()
+            else:
+                db.flush()
             logger.info(f"Dados enriquecidos atualizados para ativo {ativo_enriquecido.id_ativo}")
             return existing
         else:
             # Inserir novos dados
             db.add(ativo_enriquecido)
-            db.flush()
+            if commit:
+                db.commit()
+            else:
+                db.flush()
             logger.info(f"Dados enriquecidos inseridos para ativo {ativo_enriquecido.id_ativo}")
             return ativo_enriquecido
             
     except Exception as e:
         logger.error(f"Erro ao persistir dados enriquecidos para ativo {ativo_enriquecido.id_ativo}: {e}")
+        if commit:
+            db.rollback()
         raise
 
+def bulk_upsert_ativos_enriquecidos(
+    db: Session,
+    rows: list[dict],
+    colunas_atualizadas: Optional[List[str]] = None,
+) -> None:
+    """
+    Insere ou atualiza os dados enriquecidos de vários ativos em uma única instrução
+    (INSERT ... ON CONFLICT (id_ativo) DO UPDATE)
+    
+    Args:
+        db: Sessão do banco de dados
+        rows: Linhas com as colunas de AtivoEnriquecido (sem repetir `id_ativo`)
+        colunas_atualizadas: Colunas sobrescritas quando o ativo já existe
+            (padrão: todas as de `rows`); as demais ficam como estão
+        
+    Obs: não faz commit; a transação deve ser controlada fora desta função.
+    """
+    if not rows:
+        return
+    
+    stmt = pg_insert(AtivoEnriquecido).values(rows)
+    colunas = colunas_atualizadas or [coluna for coluna in rows[0] if coluna != "id_ativo"]
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[AtivoEnriquecido.id_ativo],
+            set_={
+                **{coluna: stmt.excluded[coluna] for coluna in colunas},
+                "updated_at": func.now(),
+            },
+        )
+    )
+
 def get_ativo_enriquecido_by_ativo_id(
     db: Session,
     id_ativo: int
@@ -108,3 +151,58 @@ def get_ativos_para_enriquecimento(
         logger.error(f"Erro ao buscar ativos para enriquecimento: {e}")
         return []
 
+def get_ativos_desatualizados(
+    db: Session,
+    limite: int,
+    enriquecidos_antes_de: date
+) -> List[int]:
+    """
+    Busca ativos com dados enriquecidos antigos para atualização
+    
+    - Antigos: `dt_ultimo_enriquecimento` anterior a `enriquecidos_antes_de` (ou nula).
+    - Ordem: valor (vl_principal) da posição mais recente do ativo, maior primeiro;
+      empate pelo enriquecimento mais antigo.
+    - Ativos que já estão na fila de enriquecimento (pendente/processando) ficam de fora.
+    
+    Args:
+        db: Sessão do banco de dados
+        limite: Quantidade máxima de ativos
+        enriquecidos_antes_de: Data de corte do último enriquecimento
+        
+    Returns:
+        Lista de id_ativo
+    """
+    from app.models import Posicao, FilaEnriquecimento
+    from app.models.ingestao_job import JOB_PENDENTE, JOB_PROCESSANDO
+    
+    if limite <= 0:
+        return []
+    
+    valor_posicao = (
+        select(Posicao.vl_principal)
+        .where(Posicao.id_ativo == AtivoEnriquecido.id_ativo)
+        .order_by(Posicao.dt_posicao.desc())
+        .limit(1)
+        .correlate(AtivoEnriquecido)
+        .scalar_subquery()
+    )
+    na_fila = exists().where(
+        FilaEnriquecimento.id_ativo == AtivoEnriquecido.id_ativo,
+        FilaEnriquecimento.ds_status.in_([JOB_PENDENTE, JOB_PROCESSANDO])
+    )
+    
+    return list(db.scalars(
+        select(AtivoEnriquecido.id_ativo)
+        .where(
+            or_(
+                AtivoEnriquecido.dt_ultimo_enriquecimento < enriquecidos_antes_de,
+                AtivoEnriquecido.dt_ultimo_enriquecimento.is_(None)
+            ),
+            ~na_fila
+        )
+        .order_by(
+            func.coalesce(valor_posicao, 0).desc(),
+            AtivoEnriquecido.dt_ultimo_enriquecimento.asc().nulls_first()
+        )
+        .limit(limite)
+    ))
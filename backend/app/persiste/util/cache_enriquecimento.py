@@ -0,0 +1,49 @@
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models import CacheEnriquecimento
+
+def get_cache_enriquecimento(
+    db       : Session,
+    cd_ativos: list[str],
+) -> dict[str, CacheEnriquecimento]:
+    """
+    Busca as entradas do cache de enriquecimento para os códigos informados.
+
+    - Retorna {cd_ativo: CacheEnriquecimento}; a validade (TTL) é decidida por quem chama.
+    """
+    if not cd_ativos:
+        return {}
+
+    linhas = db.scalars(
+        select(CacheEnriquecimento).where(CacheEnriquecimento.cd_ativo.in_(set(cd_ativos)))
+    )
+    return {linha.cd_ativo: linha for linha in linhas}
+
+
+def upsert_cache_enriquecimento(
+    db  : Session,
+    rows: list[dict],
+) -> None:
+    """
+    Insere ou atualiza várias entradas do cache pela chave `cd_ativo` (uma única instrução).
+
+    - `dt_busca` é sempre renovado (now()), inclusive para resultados com erro.
+    - `rows` não pode repetir o mesmo `cd_ativo`.
+    - Não faz commit; a transação deve ser controlada fora desta função.
+    """
+    if not rows:
+        return
+
+    stmt = pg_insert(CacheEnriquecimento).values(rows)
+    colunas = ("serie", "emissao", "devedor", "securitizadora", "resgate_antecipado", "agente_fiduciario", "fl_erro", "ds_erro")
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CacheEnriquecimento.cd_ativo],
+            set_={
+                **{coluna: stmt.excluded[coluna] for coluna in colunas},
+                "dt_busca"  : func.now(),
+                "updated_at": func.now(),
+            },
+        )
+    )
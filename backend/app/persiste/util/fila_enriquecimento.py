@@ -0,0 +1,172 @@
+from sqlalchemy import select, update, func, or_, and_, bindparam, literal, Interval, case, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models import FilaEnriquecimento
+from app.models.ingestao_job import JOB_PENDENTE, JOB_PROCESSANDO, JOB_CONCLUIDO, JOB_ERRO
+from datetime import datetime, timedelta
+
+def enfileirar_ativos(
+    db        : Session,
+    ativo_ids : list[int],
+    prioridade: int,
+    origem    : str,
+) -> None:
+    """
+    Enfileira o enriquecimento dos ativos (uma única instrução).
+
+    - Ativo que já está na fila (pendente/processando) não é duplicado: só fica
+      com a maior das prioridades; a origem continua a do primeiro enfileiramento.
+    - Não faz commit; a transação deve ser controlada fora desta função.
+    """
+    ativo_ids = list(dict.fromkeys(ativo_ids))
+    if not ativo_ids:
+        return
+
+    stmt = pg_insert(FilaEnriquecimento).values(
+        [{"id_ativo": id_ativo, "nr_prioridade": prioridade, "ds_origem": origem} for id_ativo in ativo_ids]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[FilaEnriquecimento.id_ativo],
+            # Literal (não parâmetro): o Postgres precisa casar o predicado com o do índice parcial
+            index_where=text(f"ds_status IN ('{JOB_PENDENTE}', '{JOB_PROCESSANDO}')"),
+            set_={
+                "nr_prioridade": func.greatest(FilaEnriquecimento.nr_prioridade, stmt.excluded.nr_prioridade),
+                "updated_at"   : func.now(),
+            },
+        )
+    )
+
+
+def claim_lote_enriquecimento(
+    db     : Session,
+    tamanho: int,
+    timeout: timedelta,
+) -> list[tuple[int, int]]:
+    """
+    Reserva até `tamanho` itens da fila para este worker; retorna [(id_item, id_ativo)].
+
+    - Ordem: maior prioridade, depois a tentativa mais antiga.
+    - `FOR UPDATE SKIP LOCKED`: workers concorrentes nunca pegam o mesmo item.
+    - Também retoma itens "processando" sem heartbeat há mais de `timeout` (worker que morreu).
+
+    Obs: faça o commit logo em seguida para liberar o lock das linhas.
+    """
+    candidatos = (
+        select(FilaEnriquecimento.id_item)
+        .where(
+            or_(
+                and_(
+                    FilaEnriquecimento.ds_status == JOB_PENDENTE,
+                    FilaEnriquecimento.dt_proxima_tentativa <= func.now(),
+                ),
+                and_(
+                    FilaEnriquecimento.ds_status == JOB_PROCESSANDO,
+                    FilaEnriquecimento.dt_heartbeat < func.now() - timeout,
+                ),
+            )
+        )
+        .order_by(
+            FilaEnriquecimento.nr_prioridade.desc(),
+            FilaEnriquecimento.dt_proxima_tentativa,
+            FilaEnriquecimento.id_item,
+        )
+        .limit(tamanho)
+        .with_for_update(skip_locked=True)
+    )
+
+    linhas = db.execute(
+        update(FilaEnriquecimento)
+        .where(FilaEnriquecimento.id_item.in_(candidatos.scalar_subquery()))
+        .values(
+            ds_status     = JOB_PROCESSANDO,
+            nr_tentativas = FilaEnriquecimento.nr_tentativas + 1,
+            dt_heartbeat  = func.now(),
+            updated_at    = func.now(),
+        )
+        .returning(FilaEnriquecimento.id_item, FilaEnriquecimento.id_ativo)
+    )
+    return [tuple(linha) for linha in linhas]
+
+
+def concluir_itens_enriquecimento(
+    db      : Session,
+    id_itens: list[int],
+) -> None:
+    """Marca os itens como concluídos (sem commit)."""
+    if not id_itens:
+        return
+
+    db.execute(
+        update(FilaEnriquecimento)
+        .where(FilaEnriquecimento.id_item.in_(id_itens))
+        .values(ds_status=JOB_CONCLUIDO, ds_erro=None, dt_fim=func.now(), updated_at=func.now())
+    )
+
+
+def registrar_falhas_enriquecimento(
+    db            : Session,
+    falhas        : dict[int, str],
+    max_tentativas: int,
+    backoff       : timedelta,
+    definitivas   : set[int] = frozenset(),
+) -> None:
+    """
+    Registra falhas de itens reservados (sem commit).
+
+    - Com tentativas restantes, o item volta a "pendente" com `dt_proxima_tentativa`
+      em backoff exponencial com jitter: backoff * 2^(tentativas - 1) * [0.5, 1).
+    - Sem tentativas restantes, ou se o id estiver em `definitivas`, vai para "erro".
+    """
+    if not falhas:
+        return
+
+    fila = FilaEnriquecimento.__table__
+    esgotado = or_(fila.c.nr_tentativas >= max_tentativas, bindparam("b_definitiva"))
+    espera = literal(backoff, Interval) * func.power(2, fila.c.nr_tentativas - 1) * (0.5 + func.random() / 2)
+
+    stmt = (
+        update(fila)
+        .where(fila.c.id_item == bindparam("b_id_item"))
+        .values(
+            ds_status            = case((esgotado, JOB_ERRO), else_=JOB_PENDENTE),
+            dt_proxima_tentativa = case((esgotado, fila.c.dt_proxima_tentativa), else_=func.now() + espera),
+            dt_fim               = case((esgotado, func.now()), else_=None),
+            ds_erro              = bindparam("b_ds_erro"),
+            updated_at           = func.now(),
+        )
+    )
+    db.connection().execute(stmt, [
+        {"b_id_item": id_item, "b_ds_erro": erro, "b_definitiva": id_item in definitivas}
+        for id_item, erro in falhas.items()
+    ])
+
+
+def contar_fila_enriquecimento(db: Session) -> dict[str, int]:
+    """Quantidade de itens por status."""
+    linhas = db.execute(
+        select(FilaEnriquecimento.ds_status, func.count())
+        .group_by(FilaEnriquecimento.ds_status)
+    )
+    return {status: quantidade for status, quantidade in linhas}
+
+
+def contar_enfileirados_desde(
+    db    : Session,
+    origem: str,
+    desde : datetime,
+) -> int:
+    """
+    Quantidade de itens da origem informada enfileirados a partir de `desde` (qualquer status).
+
+    Conta pela origem, não pela prioridade: um item do agendador que depois recebe um
+    pedido manual/upload (prioridade maior) continua gasto no orçamento.
+    """
+    return db.scalar(
+        select(func.count())
+        .select_from(FilaEnriquecimento)
+        .where(
+            FilaEnriquecimento.ds_origem == origem,
+            FilaEnriquecimento.created_at >= desde,
+        )
+    )
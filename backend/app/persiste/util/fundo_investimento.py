@@ -1,7 +1,11 @@
 from sqlalchemy.orm import Session
-from app.models import FundoInvestimento, ArquivoOriginal
+from sqlalchemy import select, func, distinct, true
+from sqlalchemy.engine import Row
+from app.models import FundoInvestimento, ArquivoOriginal, Ativo, Posicao
 from app.DTOs.fundo_investimento import FundoInvestimentoDTO, ArquivoOriginalDTO
-from typing import Optional, List
+from app.utils import BlobStore, compactar, iter_descompactado, iter_blocos
+from app.utils.blob_store import CHUNK_SIZE
+from typing import Optional, List, Iterator
 import logging
 
 logger = logging.getLogger(__name__)
@@ -72,6 +76,92 @@ def insert_arquivo_original(
             db.rollback()
         raise
 
+def armazenar_conteudo_arquivo(
+    arquivo: ArquivoOriginal,
+    conteudo: str,
+    blob_store: Optional[BlobStore] = None
+) -> ArquivoOriginal:
+    """
+    Compacta (gzip) o conteúdo e o guarda no BlobStore, se configurado, ou na própria linha
+    
+    Args:
+        arquivo: Instância do ArquivoOriginal (com hash_arquivo preenchido)
+        conteudo: Conteúdo do arquivo como string
+        blob_store: BlobStore local (None = conteúdo no banco)
+        
+    Returns:
+        O mesmo ArquivoOriginal, pronto para ser inserido
+    """
+    dados = compactar(conteudo)
+    if blob_store is not None:
+        blob_store.salvar(arquivo.hash_arquivo, dados)
+        arquivo.ds_armazenamento = "blob"
+        arquivo.conteudo_compactado = None
+    else:
+        arquivo.ds_armazenamento = "banco"
+        arquivo.conteudo_compactado = dados
+    return arquivo
+
+def iter_conteudo_arquivo(
+    db: Session,
+    arquivo: ArquivoOriginal,
+    blob_store: Optional[BlobStore] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Lê o conteúdo original (descompactado) de um arquivo em blocos
+    
+    - No banco: busca o bytea em fatias com `substring`, sem trazer a coluna inteira.
+    - No BlobStore: lê o blob do disco em blocos.
+    - A sessão precisa continuar aberta enquanto o iterador é consumido.
+    
+    Args:
+        db: Sessão do banco de dados
+        arquivo: ArquivoOriginal (o conteúdo pode estar deferred/não carregado)
+        blob_store: BlobStore local (obrigatório se ds_armazenamento == "blob")
+        chunk_size: Tamanho das fatias lidas
+        
+    Returns:
+        Iterador de bytes do XML original
+    """
+    if arquivo.ds_armazenamento == "blob":
+        if blob_store is None:
+            raise RuntimeError("Arquivo armazenado no BlobStore, mas ARQUIVO_BLOB_DIR não está configurado")
+        return iter_descompactado(iter_blocos(blob_store.abrir(arquivo.hash_arquivo), chunk_size))
+
+    def fatias() -> Iterator[bytes]:
+        tamanho = db.scalar(
+            select(func.octet_length(ArquivoOriginal.conteudo_compactado))
+            .where(ArquivoOriginal.id_arquivo_original == arquivo.id_arquivo_original)
+        ) or 0
+        for inicio in range(1, tamanho + 1, chunk_size):
+            yield db.scalar(
+                select(func.substring(ArquivoOriginal.conteudo_compactado, inicio, chunk_size))
+                .where(ArquivoOriginal.id_arquivo_original == arquivo.id_arquivo_original)
+            )
+
+    return iter_descompactado(fatias())
+
+def get_arquivo_original(
+    db: Session,
+    arquivo_id: int
+) -> Optional[ArquivoOriginal]:
+    """
+    Busca um arquivo original por ID (sem o conteúdo, que é deferred)
+    
+    Args:
+        db: Sessão do banco de dados
+        arquivo_id: ID do arquivo
+        
+    Returns:
+        Instância do ArquivoOriginal ou None se não encontrado
+    """
+    try:
+        return db.get(ArquivoOriginal, arquivo_id)
+    except Exception as e:
+        logger.error(f"Erro ao buscar arquivo {arquivo_id}: {e}")
+        return None
+
 def get_fundo_by_id(
     db: Session,
     fundo_id: int
@@ -119,28 +209,61 @@ def get_fundo_by_hash_arquivo(
         logger.error(f"Erro ao buscar fundo por hash {hash_arquivo}: {e}")
         return None
 
-def get_all_fundos(
+def get_fundos_com_estatisticas(
     db: Session,
     limit: int = 50,
-    offset: int = 0
-) -> List[FundoInvestimento]:
+    offset: int = 0,
+    fundo_id: Optional[int] = None
+) -> List[Row]:
     """
-    Busca todos os fundos com paginação
+    Busca fundos com paginação já com `total_ativos` e `valor_total` calculados no banco
+    
+    - Subconsulta com a página de fundos (mais recentes primeiro) e um
+      LEFT JOIN LATERAL que agrega só os ativos/posições de cada fundo da página.
+    - Não materializa objetos ORM: o custo não cresce com o nº de posições por fundo.
     
     Args:
         db: Sessão do banco de dados
         limit: Limite de resultados
         offset: Offset para paginação
+        fundo_id: Restringe a um único fundo (ignora a paginação)
         
     Returns:
-        Lista de fundos
+        Linhas com as colunas do fundo + total_ativos e valor_total
     """
     try:
-        return db.query(FundoInvestimento).order_by(
-            FundoInvestimento.created_at.desc()
-        ).offset(offset).limit(limit).all()
+        pagina = select(
+            FundoInvestimento.id_fundo_investimento,
+            FundoInvestimento.nm_fundo_investimento,
+            FundoInvestimento.ds_fundo_investimento,
+            FundoInvestimento.created_at,
+            FundoInvestimento.updated_at
+        )
+        if fundo_id is not None:
+            pagina = pagina.where(FundoInvestimento.id_fundo_investimento == fundo_id)
+        else:
+            pagina = pagina.order_by(FundoInvestimento.created_at.desc()).offset(offset).limit(limit)
+        pagina = pagina.subquery("pagina")
+        
+        estatisticas = (
+            select(
+                func.count(distinct(Ativo.id_ativo)).label("total_ativos"),
+                func.coalesce(func.sum(Posicao.vl_principal), 0).label("valor_total")
+            )
+            .select_from(Ativo)
+            .outerjoin(Posicao, Posicao.id_ativo == Ativo.id_ativo)
+            .where(Ativo.id_fundo == pagina.c.id_fundo_investimento)
+            .lateral("estatisticas")
+        )
+        
+        return db.execute(
+            select(pagina, estatisticas.c.total_ativos, estatisticas.c.valor_total)
+            .select_from(pagina)
+            .outerjoin(estatisticas, true())
+            .order_by(pagina.c.created_at.desc())
+        ).all()
     except Exception as e:
-        logger.error(f"Erro ao buscar fundos: {e}")
+        logger.error(f"Erro ao buscar fundos com estatísticas: {e}")
         return []
 
 def count_fundos(db: Session) -> int:
@@ -181,3 +304,18 @@ def get_arquivo_by_hash(
         logger.error(f"Erro ao buscar arquivo por hash {hash_arquivo}: {e}")
         return None
 
+
+def get_hashes_blob_do_fundo(db: Session, fundo_id: int) -> List[str]:
+    """
+    Hashes dos arquivos do fundo guardados no BlobStore
+    
+    Usado antes de excluir o fundo: o cascade remove as linhas, mas os blobs ficam no
+    disco (hash_arquivo é único, então nenhum outro arquivo aponta para o mesmo blob).
+    """
+    return list(db.scalars(
+        select(ArquivoOriginal.hash_arquivo)
+        .where(
+            ArquivoOriginal.id_fundo_investimento == fundo_id,
+            ArquivoOriginal.ds_armazenamento == "blob",
+        )
+    ))
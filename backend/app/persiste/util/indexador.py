@@ -1,50 +1,68 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
 from app.models import Indexador
+import threading
 
-def insert_indexador(
-    db       : Session,
-    indexador: Indexador,
-    cache    : dict[str, Indexador],
-    *,
-    commit   : bool = False,
-) -> Indexador:
+# Cache do processo: cd_indexador -> id_indexador (só contém ids já commitados)
+_cache_indexador: dict[str, int] = {}
+_cache_lock = threading.Lock()
+
+
+def upsert_indexador(
+    db           : Session,
+    cd_indexador : str | None,
+    sgl_indexador: str | None,
+    pendentes    : dict[str, int],
+) -> int:
     """
-    Insere um Indexador garantindo deduplicação por `cd_indexador`.
-
-    - Usa cache local para evitar consultas/reinserções na mesma chamada.
-    - Se já existir no cache, retorna o objeto.
-    - Se não existir, adiciona à session e faz `flush()` para obter PK.
-    - Se `commit=True`, tenta commitar e faz rollback em caso de erro.
-    - Sempre armazena o resultado em cache.
-    
-    Obs: A transação deve ser controlada preferencialmente fora desta função.
+    Retorna o `id_indexador` de `cd_indexador`, inserindo-o se ainda não existir.
+
+    - Read-through: consulta primeiro o cache do processo e depois `pendentes`
+      (ids obtidos na transação corrente); só vai ao banco para códigos desconhecidos.
+    - No banco usa `INSERT ... ON CONFLICT DO NOTHING RETURNING`; se o código já
+      existia (inclusive inserido por outra requisição), busca o id existente.
+    - Ids novos ficam em `pendentes` até o commit; publique-os com
+      `publicar_indexadores` depois do commit.
+
+    Obs: A transação deve ser controlada fora desta função.
     """
 
     # Normaliza e valida o código
-    cd_indexador = (indexador.cd_indexador or "").strip()
+    cd_indexador = (cd_indexador or "").strip()
     if not cd_indexador:
         raise ValueError("cd_indexador vazio ou None")
 
-    # Retorna do cache, se já existir
-    if cd_indexador in cache:
-        obj = cache[cd_indexador]
+    id_indexador = _cache_indexador.get(cd_indexador) or pendentes.get(cd_indexador)
+    if id_indexador is not None:
+        return id_indexador
+
+    id_indexador = db.scalar(
+        insert(Indexador)
+        .values(cd_indexador=cd_indexador, sgl_indexador=sgl_indexador)
+        .on_conflict_do_nothing(index_elements=[Indexador.cd_indexador])
+        .returning(Indexador.id_indexador)
+    )
+    if id_indexador is None:
+        id_indexador = db.scalar(
+            select(Indexador.id_indexador).where(Indexador.cd_indexador == cd_indexador)
+        )
 
-        return obj
+    pendentes[cd_indexador] = id_indexador
+    return id_indexador
 
-    # Adiciona na session e garante PK com flush
-    db.add(indexador)
-    db.flush()
 
-    # Commit opcional
-    if commit:
-        try:
-            db.commit()
-        except SQLAlchemyError as e:
-            db.rollback()
-            raise RuntimeError(f"Erro ao inserir o Indexador: {indexador}") from e
+def publicar_indexadores(pendentes: dict[str, int]) -> None:
+    """Leva para o cache do processo os ids obtidos em uma transação já commitada."""
+    if pendentes:
+        with _cache_lock:
+            _cache_indexador.update(pendentes)
 
-    # Guarda no cache e retorna
-    cache[cd_indexador] = indexador
 
-    return indexador
+def warm_indexador_cache(db: Session) -> int:
+    """Carrega todos os indexadores do banco no cache do processo. Retorna quantos foram carregados."""
+    rows = db.execute(select(Indexador.cd_indexador, Indexador.id_indexador)).all()
+    with _cache_lock:
+        _cache_indexador.clear()
+        _cache_indexador.update({cd: id_indexador for cd, id_indexador in rows})
+    return len(rows)
@@ -0,0 +1,163 @@
+from sqlalchemy import select, update, delete, func, or_, and_
+from sqlalchemy.orm import Session
+from app.models import IngestaoJob, IngestaoJobArquivo
+from app.models.ingestao_job import JOB_PENDENTE, JOB_PROCESSANDO, JOB_ERRO
+from typing import Optional
+from datetime import timedelta
+
+def insert_ingestao_job(
+    db      : Session,
+    job     : IngestaoJob,
+    *,
+    commit  : bool = False,
+) -> IngestaoJob:
+    """
+    Insere um novo `IngestaoJob` (com os `arquivos` já associados, se houver).
+
+    - Usa `flush()` para garantir a geração da PK.
+    - Se `commit=True`, faz o commit (o job fica visível para os workers).
+    """
+    db.add(job)
+    db.flush()
+
+    if commit:
+        db.commit()
+
+    return job
+
+
+def claim_proximo_job(
+    db            : Session,
+    timeout       : timedelta,
+    max_tentativas: int,
+) -> Optional[int]:
+    """
+    Reserva o próximo job da fila para este worker e retorna o seu `id_job` (ou None).
+
+    - `SELECT ... FOR UPDATE SKIP LOCKED`: workers concorrentes nunca pegam o mesmo job
+      e não ficam esperando uns pelos outros.
+    - Também retoma jobs "processando" sem heartbeat há mais de `timeout`
+      (worker que morreu no meio), até `max_tentativas`.
+
+    Obs: faça o commit logo em seguida para liberar o lock da linha.
+    """
+    candidato = (
+        select(IngestaoJob.id_job)
+        .where(
+            IngestaoJob.nr_tentativas < max_tentativas,
+            or_(
+                IngestaoJob.ds_status == JOB_PENDENTE,
+                and_(
+                    IngestaoJob.ds_status == JOB_PROCESSANDO,
+                    IngestaoJob.dt_heartbeat < func.now() - timeout,
+                ),
+            ),
+        )
+        .order_by(IngestaoJob.id_job)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+    return db.scalar(
+        update(IngestaoJob)
+        .where(IngestaoJob.id_job == candidato)
+        .values(
+            ds_status     = JOB_PROCESSANDO,
+            nr_tentativas = IngestaoJob.nr_tentativas + 1,
+            dt_inicio     = func.now(),
+            dt_heartbeat  = func.now(),
+            ds_erro       = None,
+        )
+        .returning(IngestaoJob.id_job)
+    )
+
+
+def encerrar_jobs_abandonados(
+    db            : Session,
+    timeout       : timedelta,
+    max_tentativas: int,
+) -> list[tuple[int, Optional[int], Optional[int]]]:
+    """
+    Marca como "erro" os jobs "processando" sem heartbeat há mais de `timeout` que já
+    esgotaram `max_tentativas` (o claim não os retoma mais: o worker morreu em todas).
+
+    Retorna [(id_job, id_fundo, id_arquivo_original)] dos jobs encerrados.
+    Não faz commit; a transação deve ser controlada fora desta função.
+    """
+    linhas = db.execute(
+        update(IngestaoJob)
+        .where(
+            IngestaoJob.ds_status == JOB_PROCESSANDO,
+            IngestaoJob.dt_heartbeat < func.now() - timeout,
+            IngestaoJob.nr_tentativas >= max_tentativas,
+        )
+        .values(
+            ds_status  = JOB_ERRO,
+            ds_erro    = f"Processamento interrompido {max_tentativas} vezes (worker sem heartbeat); tentativas esgotadas",
+            qtd_erros  = IngestaoJob.qtd_erros + 1,
+            dt_fim     = func.now(),
+            updated_at = func.now(),
+        )
+        .returning(IngestaoJob.id_job, IngestaoJob.id_fundo, IngestaoJob.id_arquivo_original)
+    )
+    return [tuple(linha) for linha in linhas]
+
+
+def atualizar_job(
+    db    : Session,
+    id_job: int,
+    *,
+    commit: bool = True,
+    **valores,
+) -> None:
+    """
+    Atualiza colunas do job (progresso, status...) e renova o heartbeat.
+
+    - Progresso: use uma sessão própria (com commit), para ficar visível antes
+      do commit da ingestão.
+    - Conclusão: `commit=False` na sessão da ingestão, para o status mudar
+      na mesma transação dos dados.
+    """
+    db.execute(
+        update(IngestaoJob)
+        .where(IngestaoJob.id_job == id_job)
+        .values(dt_heartbeat=func.now(), updated_at=func.now(), **valores)
+    )
+    if commit:
+        db.commit()
+
+
+def get_ingestao_job(
+    db    : Session,
+    id_job: int,
+) -> Optional[IngestaoJob]:
+    """Busca um job pelo id (os conteúdos dos arquivos são deferred)."""
+    return db.get(IngestaoJob, id_job)
+
+
+def get_conteudo_job_arquivo(
+    db            : Session,
+    id_job_arquivo: int,
+) -> Optional[bytes]:
+    """Lê o conteúdo (gzip) de um arquivo do job."""
+    return db.scalar(
+        select(IngestaoJobArquivo.conteudo_compactado)
+        .where(IngestaoJobArquivo.id_job_arquivo == id_job_arquivo)
+    )
+
+
+def remover_arquivos_job(
+    db    : Session,
+    id_job: int,
+) -> int:
+    """
+    Remove os arquivos (conteúdo gzip) de um job; retorna a quantidade removida.
+
+    Chamado quando o job conclui: os dados já estão nas tabelas (e, nos uploads de
+    fundo, o XML fica no ArquivoOriginal), então o payload só ocuparia espaço.
+    Não faz commit.
+    """
+    return db.execute(
+        delete(IngestaoJobArquivo).where(IngestaoJobArquivo.id_job == id_job)
+    ).rowcount
@@ -1,3 +1,4 @@
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.models import Lote
@@ -31,3 +32,35 @@ def insert_lote(
             raise RuntimeError(f"Erro ao inserir Lote: {lote}") from e
 
     return lote
+
+
+def bulk_insert_lotes(
+    db  : Session,
+    rows: list[dict],
+) -> list[int]:
+    """
+    Insere vários `Lote` de uma vez (INSERT multi-linha com RETURNING).
+
+    - `rows` são dicts com as colunas de `Lote`.
+    - Retorna os `id_lote` gerados na mesma ordem de `rows`.
+    - Não faz commit; a transação deve ser controlada fora desta função.
+    """
+    if not rows:
+        return []
+
+    stmt = insert(Lote).returning(Lote.id_lote, sort_by_parameter_order=True)
+    return list(db.scalars(stmt, rows))
+
+
+def bulk_update_lotes(
+    db  : Session,
+    rows: list[dict],
+) -> None:
+    """
+    Atualiza vários `Lote` de uma vez (UPDATE em lote pela PK).
+
+    - Cada dict de `rows` deve conter `id_lote` e as colunas a atualizar.
+    - Não faz commit; a transação deve ser controlada fora desta função.
+    """
+    if rows:
+        db.execute(update(Lote), rows)
@@ -1,3 +1,5 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.models import Posicao
@@ -31,3 +33,48 @@ def insert_posicao(
             raise RuntimeError(f"Erro ao inserir Posicao: {posicao}") from e
 
     return posicao
+
+
+def bulk_insert_posicoes(
+    db  : Session,
+    rows: list[dict],
+) -> list[int]:
+    """
+    Insere várias `Posicao` de uma vez (INSERT multi-linha com RETURNING).
+
+    - `rows` são dicts com as colunas de `Posicao`.
+    - Retorna os `id_posicao` gerados na mesma ordem de `rows`.
+    - Não faz commit; a transação deve ser controlada fora desta função.
+    """
+    if not rows:
+        return []
+
+    stmt = insert(Posicao).returning(Posicao.id_posicao, sort_by_parameter_order=True)
+    return list(db.scalars(stmt, rows))
+
+
+def bulk_upsert_posicoes(
+    db  : Session,
+    rows: list[dict],
+) -> list[int]:
+    """
+    Insere ou atualiza várias `Posicao` de uma vez, pela chave (`id_ativo`, `dt_posicao`).
+
+    - Uma posição por ativo e data: reprocessar a mesma data atualiza os valores.
+    - `rows` não pode repetir a mesma chave (o Postgres não atualiza a mesma linha duas vezes).
+    - Retorna os `id_posicao` na mesma ordem de `rows`.
+    - Não faz commit; a transação deve ser controlada fora desta função.
+    """
+    if not rows:
+        return []
+
+    stmt = pg_insert(Posicao)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Posicao.id_ativo, Posicao.dt_posicao],
+        set_={
+            "vl_pu_posicao"           : stmt.excluded.vl_pu_posicao,
+            "vl_principal"            : stmt.excluded.vl_principal,
+            "vl_financeiro_disponivel": stmt.excluded.vl_financeiro_disponivel,
+        },
+    ).returning(Posicao.id_posicao, sort_by_parameter_order=True)
+    return list(db.scalars(stmt, rows))
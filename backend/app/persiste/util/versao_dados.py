@@ -0,0 +1,56 @@
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Iterable, Optional
+from app.models import VersaoDados
+
+# Canal do LISTEN/NOTIFY: payload "<escopo>:<versão>", entregue aos ouvintes no commit
+CANAL_VERSAO_DADOS = "versao_dados"
+
+def incrementar_versao_dados(
+    db     : Session,
+    escopos: Iterable[str],
+) -> dict[str, int]:
+    """
+    Incrementa a versão dos escopos e avisa os outros processos (pg_notify).
+
+    - O NOTIFY só é entregue no commit da transação de quem chama, junto com os dados;
+      num rollback, nem a versão nem o aviso valem.
+    - Escopos em ordem fixa: transações concorrentes travam as linhas na mesma ordem.
+    - Não faz commit; chame logo antes do commit que grava os dados (a linha fica travada até ele).
+
+    Retorna {escopo: nova versão}.
+    """
+    escopos = sorted(set(escopos))
+    if not escopos:
+        return {}
+
+    stmt = pg_insert(VersaoDados).values([{"ds_escopo": escopo, "nr_versao": 1} for escopo in escopos])
+    versoes = dict(db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[VersaoDados.ds_escopo],
+            set_={"nr_versao": VersaoDados.nr_versao + 1, "updated_at": func.now()},
+        )
+        .returning(VersaoDados.ds_escopo, VersaoDados.nr_versao)
+    ).all())
+
+    db.execute(select(*(
+        func.pg_notify(CANAL_VERSAO_DADOS, f"{escopo}:{versao}") for escopo, versao in versoes.items()
+    )))
+    return versoes
+
+
+def get_versoes_dados(
+    db     : Session,
+    escopos: Optional[Iterable[str]] = None,
+) -> dict[str, int]:
+    """Versão atual dos escopos (todos, se `escopos` for None); escopo sem linha ainda não mudou (versão 0)."""
+    consulta = select(VersaoDados.ds_escopo, VersaoDados.nr_versao)
+    if escopos is not None:
+        escopos = set(escopos)
+        if not escopos:
+            return {}
+        consulta = consulta.where(VersaoDados.ds_escopo.in_(escopos))
+
+    versoes = dict(db.execute(consulta).all())
+    return {escopo: versoes.get(escopo, 0) for escopo in escopos} if escopos is not None else versoes
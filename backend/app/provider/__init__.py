@@ -1,7 +1,20 @@
 from .file import get_file_loader
 from .parser import get_file_parser
+from .process_pool import get_process_pool, shutdown_process_pool
+from .blob_store import get_blob_store
+from .http_fetcher import get_anbima_rate_limiter, get_anbima_circuit_breaker, get_anbima_fetcher, get_anbima_extrator
+from .cache import get_cache_enriquecimento_lru, get_cache_analytics
 
 __all__ = [
     "get_file_loader",
-    "get_file_parser"
+    "get_file_parser",
+    "get_process_pool",
+    "shutdown_process_pool",
+    "get_blob_store",
+    "get_anbima_rate_limiter",
+    "get_anbima_circuit_breaker",
+    "get_anbima_fetcher",
+    "get_anbima_extrator",
+    "get_cache_enriquecimento_lru",
+    "get_cache_analytics"
 ]
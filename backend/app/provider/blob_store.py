@@ -0,0 +1,10 @@
+from functools import lru_cache
+from typing import Optional
+from app.config import get_settings
+from app.utils import BlobStore
+
+@lru_cache
+def get_blob_store() -> Optional[BlobStore]:
+    # Sem ARQUIVO_BLOB_DIR o conteúdo dos arquivos fica no banco (compactado)
+    base_dir = get_settings().ARQUIVO_BLOB_DIR
+    return BlobStore(base_dir) if base_dir else None
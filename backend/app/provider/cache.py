@@ -0,0 +1,16 @@
+from functools import lru_cache
+from app.config import get_settings
+from app.utils import CacheLRU
+
+@lru_cache
+def get_cache_enriquecimento_lru() -> CacheLRU:
+    # Na frente de tb_cache_enriquecimento; cada item expira junto com a linha do banco
+    settings = get_settings()
+    return CacheLRU(settings.ANBIMA_CACHE_LRU_TAMANHO, settings.ANBIMA_CACHE_TTL_HORAS * 3600)
+
+
+@lru_cache
+def get_cache_analytics() -> CacheLRU:
+    # Respostas do analytics; a chave inclui a versão dos dados, então o TTL é só uma rede de segurança
+    settings = get_settings()
+    return CacheLRU(settings.ANALYTICS_CACHE_TAMANHO, settings.ANALYTICS_CACHE_TTL_SEGUNDOS)
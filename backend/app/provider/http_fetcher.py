@@ -0,0 +1,40 @@
+from functools import lru_cache
+from typing import Optional
+from app.config import get_settings
+from app.utils import AsyncFetcher, TokenBucket, CircuitBreaker, ExtratorAnbima, criar_extrator
+
+@lru_cache
+def get_anbima_rate_limiter() -> TokenBucket:
+    # Um bucket por processo: o limite vale para todos os lotes de enriquecimento em andamento
+    settings = get_settings()
+    return TokenBucket(settings.ANBIMA_RATE_POR_SEGUNDO, settings.ANBIMA_RATE_RAJADA)
+
+
+@lru_cache
+def get_anbima_circuit_breaker() -> CircuitBreaker:
+    # Por processo, como o bucket: a ANBIMA fora do ar derruba todos os lotes, não só o atual
+    settings = get_settings()
+    return CircuitBreaker(settings.ANBIMA_CIRCUITO_FALHAS, settings.ANBIMA_CIRCUITO_ABERTO_SEGUNDOS)
+
+
+def get_anbima_fetcher(headers: Optional[dict] = None) -> AsyncFetcher:
+    # Novo a cada lote: o AsyncClient (pool de conexões) pertence ao event loop que o abriu
+    settings = get_settings()
+    return AsyncFetcher(
+        max_concorrencia     = settings.ANBIMA_MAX_CONCORRENCIA,
+        rate_limiter         = get_anbima_rate_limiter(),
+        timeout              = settings.ANBIMA_TIMEOUT_SEGUNDOS,
+        max_tentativas       = settings.ANBIMA_MAX_TENTATIVAS,
+        backoff_base         = settings.ANBIMA_BACKOFF_BASE,
+        backoff_max          = settings.ANBIMA_BACKOFF_MAX,
+        headers              = headers,
+        circuit_breaker      = get_anbima_circuit_breaker(),
+        concorrencia_inicial = settings.ANBIMA_CONCORRENCIA_INICIAL,
+        latencia_alvo        = settings.ANBIMA_LATENCIA_ALVO_SEGUNDOS,
+    )
+
+
+@lru_cache
+def get_anbima_extrator() -> ExtratorAnbima:
+    # Sem estado entre páginas (os XPaths do lxml são compilados uma vez): uma instância por processo
+    return criar_extrator(get_settings().ANBIMA_EXTRATOR)
@@ -0,0 +1,17 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import multiprocessing
+from app.config import get_settings
+
+@lru_cache
+def get_process_pool() -> ProcessPoolExecutor:
+    # "spawn" evita herdar por fork as conexões do pool do SQLAlchemy e as threads do servidor
+    return ProcessPoolExecutor(
+        max_workers=get_settings().PARSER_MAX_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+def shutdown_process_pool() -> None:
+    if get_process_pool.cache_info().currsize:
+        get_process_pool().shutdown(cancel_futures=True)
+        get_process_pool.cache_clear()
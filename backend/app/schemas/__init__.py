@@ -3,6 +3,7 @@ from .upload_files_response import UploadFilesResponse
 from .history import (
     FileHistoryItem, FileHistoryResponse, FileDetailsResponse, FileAnalyticsResponse
 )
+from .job import JobEnfileiradoResponse, JobStatusResponse
 from .analytics import (
     OverviewResponse, IndexadoresResponse, AtivosResponse, EvolucaoMensalResponse
 )
@@ -17,5 +18,7 @@ __all__ = [
     "OverviewResponse",
     "IndexadoresResponse",
     "AtivosResponse",
-    "EvolucaoMensalResponse"
+    "EvolucaoMensalResponse",
+    "JobEnfileiradoResponse",
+    "JobStatusResponse"
 ]
@@ -51,9 +51,11 @@ class AtivoDetail(BaseModel):
 class AtivosResponse(BaseModel):
     """Resposta da listagem de ativos"""
     ativos: List[AtivoDetail]
-    total: int
+    total: Optional[int] = None
+    total_estimado: bool = False
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
 
 
 class EvolucaoMensalItem(BaseModel):
@@ -43,3 +43,6 @@ class AtivoEnriquecidoResponse(BaseModel):
     fl_erro_enriquecimento: bool
     ds_erro_enriquecimento: Optional[str] = None
 
+
+class FilaEnriquecimentoStatusResponse(BaseModel):
+    por_status: Dict[str, int]
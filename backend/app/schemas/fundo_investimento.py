@@ -28,6 +28,7 @@ class UploadFundoResponse(BaseModel):
     fundo_id: Optional[int] = None
     arquivo_duplicado: bool = False
     fundo_existente: Optional[FundoInvestimentoResponse] = None
+    id_job: Optional[int] = None  # preenchido quando o processamento foi para a fila
 
 class FundoListResponse(BaseModel):
     fundos: List[FundoInvestimentoResponse]
@@ -28,6 +28,7 @@ class FileDetailsResponse(BaseModel):
     lote: dict
     estatisticas: dict
     ativos: List[dict]
+    next_cursor: Optional[str] = None
 
 
 class FileAnalyticsResponse(BaseModel):
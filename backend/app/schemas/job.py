@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class JobEnfileiradoResponse(BaseModel):
+    """Resposta (202) de um upload enviado para processamento em segundo plano"""
+    id_job: int
+    status: str
+    mensagem: str
+    url_status: str
+
+
+class JobStatusResponse(BaseModel):
+    """Status e progresso de um job de ingestão"""
+    id_job: int
+    status: str
+    id_fundo: Optional[int] = None
+    qtd_arquivos: int
+    qtd_linhas_lidas: int
+    qtd_linhas_persistidas: int
+    qtd_erros: int
+    ds_erro: Optional[str] = None
+    nr_tentativas: int
+    data_criacao: datetime
+    data_inicio: Optional[datetime] = None
+    data_fim: Optional[datetime] = None
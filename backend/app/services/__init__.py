@@ -1,6 +1,7 @@
 from .file import upload_files_service
 from .history import get_file_history_service, get_file_details_service, get_file_analytics_service
 from .analytics import get_overview_service, get_indexadores_service, get_ativos_service, get_evolucao_mensal_service
+from .exportacao import exportar_posicoes_service
 
 __all__ = [
     "upload_files_service",
@@ -10,5 +11,6 @@ __all__ = [
     "get_overview_service",
     "get_indexadores_service",
     "get_ativos_service",
-    "get_evolucao_mensal_service"
+    "get_evolucao_mensal_service",
+    "exportar_posicoes_service"
 ]
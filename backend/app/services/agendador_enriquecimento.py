@@ -0,0 +1,88 @@
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from typing import Optional, Tuple
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+import logging
+import math
+
+from app.config import get_settings
+from app.models.fila_enriquecimento import PRIORIDADE_ATUALIZACAO, ORIGEM_AGENDADOR
+from app.persiste.util.ativo_enriquecido import get_ativos_desatualizados
+from app.persiste.util.fila_enriquecimento import contar_enfileirados_desde
+from app.services.fila_enriquecimento import enfileirar_enriquecimento
+
+logger = logging.getLogger(__name__)
+
+# Chave do pg_try_advisory_xact_lock: uma rodada do agendador por vez, mesmo com vários processos
+ADVISORY_LOCK_AGENDADOR = 4_02
+
+
+def janela_atual(agora: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Janela fora do pico (ENRIQUECIMENTO_JANELA_*) que contém `agora`, ou None.
+
+    Se o fim for menor que o início, a janela cruza a meia-noite; início == fim = dia inteiro.
+    """
+    settings = get_settings()
+    fuso = ZoneInfo(settings.ENRIQUECIMENTO_FUSO)
+    agora = agora.astimezone(fuso)
+    duracao_horas = (settings.ENRIQUECIMENTO_JANELA_FIM_HORA - settings.ENRIQUECIMENTO_JANELA_INICIO_HORA) % 24 or 24
+
+    for dia in (agora.date() - timedelta(days=1), agora.date()):
+        inicio = datetime.combine(dia, time(settings.ENRIQUECIMENTO_JANELA_INICIO_HORA), tzinfo=fuso)
+        fim = inicio + timedelta(hours=duracao_horas)
+        if inicio <= agora < fim:
+            return inicio, fim
+    return None
+
+
+def cota_da_rodada(orcamento: int, inicio: datetime, fim: datetime, agora: datetime, ja_enfileirados: int) -> int:
+    """
+    Quantos ativos enfileirar agora para espalhar o orçamento de forma linear pela janela.
+
+    O esperado até `agora` é proporcional ao tempo decorrido; a cota é o que falta para chegar nele.
+    Rodadas perdidas (worker parado) são compensadas na rodada seguinte.
+    """
+    decorrido = (agora - inicio) / (fim - inicio)
+    esperado = min(orcamento, math.ceil(orcamento * decorrido))
+    return max(0, esperado - ja_enfileirados)
+
+
+def executar_agendamento(db: Session, agora: Optional[datetime] = None) -> int:
+    """
+    Uma rodada do agendador: enfileira (PRIORIDADE_ATUALIZACAO) os ativos com dados enriquecidos
+    mais antigos que ENRIQUECIMENTO_IDADE_MAXIMA_DIAS, começando pelas maiores posições.
+
+    - Só dentro da janela fora do pico e dentro de ENRIQUECIMENTO_ORCAMENTO_DIARIO por janela.
+    - O consumo do orçamento é contado na própria fila (itens de atualização criados na janela).
+
+    Retorna a quantidade de ativos enfileirados.
+    """
+    settings = get_settings()
+    agora = agora or datetime.now(ZoneInfo(settings.ENRIQUECIMENTO_FUSO))
+
+    janela = janela_atual(agora)
+    if not janela:
+        return 0
+    inicio, fim = janela
+
+    # Outra instância do agendador já está rodando esta rodada
+    if not db.scalar(select(func.pg_try_advisory_xact_lock(ADVISORY_LOCK_AGENDADOR))):
+        return 0
+
+    ja_enfileirados = contar_enfileirados_desde(db, ORIGEM_AGENDADOR, inicio)
+    cota = cota_da_rodada(settings.ENRIQUECIMENTO_ORCAMENTO_DIARIO, inicio, fim, agora, ja_enfileirados)
+    if cota <= 0:
+        db.rollback()
+        return 0
+
+    corte = agora.date() - timedelta(days=settings.ENRIQUECIMENTO_IDADE_MAXIMA_DIAS)
+    ativo_ids = get_ativos_desatualizados(db, cota, corte)
+    total = enfileirar_enriquecimento(db, ativo_ids, PRIORIDADE_ATUALIZACAO, ORIGEM_AGENDADOR)
+
+    logger.info(
+        f"Agendador: {total} ativos enfileirados para atualização "
+        f"({ja_enfileirados + total}/{settings.ENRIQUECIMENTO_ORCAMENTO_DIARIO} na janela)"
+    )
+    return total
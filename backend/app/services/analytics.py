@@ -11,6 +11,8 @@ from app.schemas.analytics import (
     AtivosResponse, 
     EvolucaoMensalResponse
 )
+from app.persiste.queries.paginacao import CONTAGEM_EXATA, CONTAGEM_NENHUMA, decodificar_cursor
+from app.services.cache_analytics import em_cache
 from typing import Optional
 import logging
 
@@ -26,24 +28,27 @@ def get_overview_service(
     indexador: Optional[str] = None,
     codigo_ativo: Optional[str] = None
 ) -> OverviewResponse:
-    """Service para buscar overview geral"""
-    try:
+    """Service para buscar overview geral (com cache por filtros + versão dos dados)"""
+    def calcular() -> OverviewResponse:
         if fundo_id:
             from app.persiste.queries.fundo_analytics import get_fundo_analytics_data
             data = get_fundo_analytics_data(db, fundo_id, enriched, date_from, date_to, indexador, codigo_ativo)
         else:
             data = get_overview_data(db, enriched, date_from, date_to, indexador, codigo_ativo)
         return OverviewResponse(**data)
+    
+    try:
+        filtros = dict(fundo_id=fundo_id, enriched=enriched, date_from=date_from, date_to=date_to, indexador=indexador, codigo_ativo=codigo_ativo)
+        return em_cache(db, "overview", filtros, calcular, fundo_id, enriched)
     except Exception as e:
         logger.error(f"Erro no service de overview: {e}")
         raise
 
 
 def get_indexadores_service(db: Session) -> IndexadoresResponse:
-    """Service para buscar dados dos indexadores"""
+    """Service para buscar dados dos indexadores (com cache pela versão dos dados)"""
     try:
-        data = get_indexadores_data(db)
-        return IndexadoresResponse(**data)
+        return em_cache(db, "indexadores", {}, lambda: IndexadoresResponse(**get_indexadores_data(db)))
     except Exception as e:
         logger.error(f"Erro no service de indexadores: {e}")
         raise
@@ -58,16 +63,31 @@ def get_ativos_service(
     enriched: bool = False,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    codigo_ativo: Optional[str] = None
+    codigo_ativo: Optional[str] = None,
+    cursor: Optional[str] = None,
+    contagem: Optional[str] = None
 ) -> AtivosResponse:
-    """Service para buscar dados dos ativos"""
-    try:
+    """
+    Service para buscar dados dos ativos (com cache por filtros + versão dos dados)
+
+    Sem `contagem`, a primeira página traz o total exato e as seguintes (com `cursor`)
+    não recontam. Cursor malformado levanta ValueError.
+    """
+    chave = decodificar_cursor(cursor) if cursor else None
+    contagem = contagem or (CONTAGEM_NENHUMA if cursor else CONTAGEM_EXATA)
+    
+    def calcular() -> AtivosResponse:
         if fundo_id:
             from app.persiste.queries.fundo_analytics import get_fundo_ativos_data
-            data = get_fundo_ativos_data(db, fundo_id, indexador, limit, offset, enriched, date_from, date_to, codigo_ativo)
+            data = get_fundo_ativos_data(db, fundo_id, indexador, limit, offset, enriched, date_from, date_to, codigo_ativo, chave, contagem)
         else:
-            data = get_ativos_data(db, indexador, limit, offset, enriched, date_from, date_to, codigo_ativo)
+            data = get_ativos_data(db, indexador, limit, offset, enriched, date_from, date_to, codigo_ativo, chave, contagem)
         return AtivosResponse(**data)
+    
+    try:
+        filtros = dict(fundo_id=fundo_id, indexador=indexador, limit=limit, offset=offset, enriched=enriched,
+                       date_from=date_from, date_to=date_to, codigo_ativo=codigo_ativo, cursor=cursor, contagem=contagem)
+        return em_cache(db, "ativos", filtros, calcular, fundo_id, enriched)
     except Exception as e:
         logger.error(f"Erro no service de ativos: {e}")
         raise
@@ -81,10 +101,13 @@ def get_evolucao_mensal_service(
     indexador: Optional[str] = None,
     codigo_ativo: Optional[str] = None
 ) -> EvolucaoMensalResponse:
-    """Service para buscar evolução mensal"""
+    """Service para buscar evolução mensal (com cache por filtros + versão dos dados)"""
     try:
-        data = get_evolucao_mensal_data(db, ano, date_from, date_to, indexador, codigo_ativo)
-        return EvolucaoMensalResponse(**data)
+        filtros = dict(ano=ano, date_from=date_from, date_to=date_to, indexador=indexador, codigo_ativo=codigo_ativo)
+        return em_cache(
+            db, "evolucao-mensal", filtros,
+            lambda: EvolucaoMensalResponse(**get_evolucao_mensal_data(db, ano, date_from, date_to, indexador, codigo_ativo))
+        )
     except Exception as e:
         logger.error(f"Erro no service de evolução mensal: {e}")
         raise
@@ -1,10 +1,11 @@
-import requests
-from bs4 import BeautifulSoup
+import httpx
+import asyncio
 import logging
 from typing import Optional, Dict, Any
 from datetime import date
-import time
-import re
+
+from app.utils import AsyncFetcher, TokenBucket, CircuitoAberto, STATUS_RETENTAVEIS, executar_sync, extrair_campos
+from app.provider import get_anbima_fetcher, get_anbima_extrator
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +15,13 @@ class AnbimaEnrichmentService:
     """
     
     BASE_URL = "https://data.anbima.com.br/certificado-de-recebiveis/{cod_ativo}/caracteristicas"
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, base_url: Optional[str] = None):
+        # base_url permite apontar para outro servidor (ex: stub local do benchmark)
+        self.base_url = base_url or self.BASE_URL
     
     def enrich_ativo(self, cod_ativo: str) -> Optional[Dict[str, Any]]:
         """
@@ -31,17 +33,31 @@ class AnbimaEnrichmentService:
         Returns:
             Dict com os dados enriquecidos ou None se houver erro
         """
+        return self.enrich_multiple_ativos([cod_ativo])[cod_ativo]
+    
+    async def _buscar_ativo(self, fetcher: AsyncFetcher, cod_ativo: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca e extrai os dados de um ativo usando o fetcher (pool, limite de taxa e retries)
+        
+        Args:
+            fetcher: AsyncFetcher já aberto
+            cod_ativo: Código do ativo
+            
+        Returns:
+            Dict com os dados enriquecidos, dict de erro ou None se a página não tiver dados
+            
+            O dict de erro traz 'transitorio': True quando vale tentar de novo mais tarde
+            (circuito aberto, erro de rede/timeout, 429 ou 5xx); 404 e afins são definitivos.
+        """
         try:
-            url = self.BASE_URL.format(cod_ativo=cod_ativo)
+            url = self.base_url.format(cod_ativo=cod_ativo)
             logger.info(f"Buscando dados para ativo {cod_ativo} na URL: {url}")
             
-            response = self.session.get(url, timeout=30)
+            response = await fetcher.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
             # Extrair dados da página
-            dados = self._extract_data_from_page(soup, cod_ativo)
+            dados = self._extract_data_from_page(response.content, cod_ativo)
             
             if dados:
                 logger.info(f"Dados enriquecidos obtidos para ativo {cod_ativo}: {dados}")
@@ -50,10 +66,25 @@ class AnbimaEnrichmentService:
                 
             return dados
             
-        except requests.exceptions.RequestException as e:
+        except CircuitoAberto as e:
+            logger.warning(f"Ativo {cod_ativo} não buscado: {e}")
+            return {
+                'erro': True,
+                'transitorio': True,
+                'mensagem': f"ANBIMA indisponível: {str(e)}"
+            }
+        except httpx.HTTPStatusError as e:
             logger.error(f"Erro na requisição para ativo {cod_ativo}: {e}")
             return {
                 'erro': True,
+                'transitorio': e.response.status_code in STATUS_RETENTAVEIS,
+                'mensagem': f"Erro na requisição: {str(e)}"
+            }
+        except httpx.HTTPError as e:
+            logger.error(f"Erro na requisição para ativo {cod_ativo}: {e}")
+            return {
+                'erro': True,
+                'transitorio': True,
                 'mensagem': f"Erro na requisição: {str(e)}"
             }
         except Exception as e:
@@ -63,79 +94,24 @@ class AnbimaEnrichmentService:
                 'mensagem': f"Erro inesperado: {str(e)}"
             }
     
-    def _extract_data_from_page(self, soup: BeautifulSoup, cod_ativo: str) -> Optional[Dict[str, Any]]:
+    def _extract_data_from_page(self, conteudo: bytes, cod_ativo: str) -> Optional[Dict[str, Any]]:
         """
         Extrai dados específicos da página da ANBIMA
         
+        O backend (lxml ou html.parser) vem de ANBIMA_EXTRATOR (ver `get_anbima_extrator`).
+        
         Args:
-            soup: Objeto BeautifulSoup da página
+            conteudo: HTML da página
             cod_ativo: Código do ativo
             
         Returns:
             Dict com os dados extraídos ou None
         """
         try:
-            dados = {
-                'serie': None,
-                'emissao': None,
-                'devedor': None,
-                'securitizadora': None,
-                'resgate_antecipado': None,
-                'agente_fiduciario': None,
-                'dt_ultimo_enriquecimento': None
-            }
-            
-            # Procurar por tabelas ou divs com os dados
-            # A estrutura da página pode variar, então vamos tentar diferentes seletores
-            
-            # Tentar encontrar dados em tabelas
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 2:
-                        label = cells[0].get_text(strip=True).lower()
-                        value = cells[1].get_text(strip=True)
-                        
-                        if 'série' in label or 'serie' in label:
-                            dados['serie'] = value
-                        elif 'emissão' in label or 'emissao' in label:
-                            dados['emissao'] = value
-                        elif 'devedor' in label:
-                            dados['devedor'] = value
-                        elif 'securitizadora' in label:
-                            dados['securitizadora'] = value
-                        elif 'resgate' in label and 'antecipado' in label:
-                            dados['resgate_antecipado'] = self._parse_boolean(value)
-                        elif 'agente' in label and 'fiduciário' in label:
-                            dados['agente_fiduciario'] = value
-            
-            # Tentar encontrar dados em divs com classes específicas
-            divs = soup.find_all('div', class_=re.compile(r'(info|data|field)', re.I))
-            for div in divs:
-                text = div.get_text(strip=True)
-                if ':' in text:
-                    parts = text.split(':', 1)
-                    if len(parts) == 2:
-                        label = parts[0].strip().lower()
-                        value = parts[1].strip()
-                        
-                        if 'série' in label or 'serie' in label:
-                            dados['serie'] = value
-                        elif 'emissão' in label or 'emissao' in label:
-                            dados['emissao'] = value
-                        elif 'devedor' in label:
-                            dados['devedor'] = value
-                        elif 'securitizadora' in label:
-                            dados['securitizadora'] = value
-                        elif 'resgate' in label and 'antecipado' in label:
-                            dados['resgate_antecipado'] = self._parse_boolean(value)
-                        elif 'agente' in label and 'fiduciário' in label:
-                            dados['agente_fiduciario'] = value
+            dados = extrair_campos(get_anbima_extrator(), conteudo)
             
             # Verificar se encontramos pelo menos um dado
-            if any(dados.values()):
+            if any(valor is not None and valor != '' for valor in dados.values()):
                 dados['dt_ultimo_enriquecimento'] = date.today()
                 return dados
             else:
@@ -146,48 +122,46 @@ class AnbimaEnrichmentService:
             logger.error(f"Erro ao extrair dados da página para ativo {cod_ativo}: {e}")
             return None
     
-    def _parse_boolean(self, value: str) -> Optional[bool]:
+    async def enrich_multiple_ativos_async(
+        self,
+        cod_ativos: list[str],
+        fetcher: Optional[AsyncFetcher] = None
+    ) -> Dict[str, Dict[str, Any]]:
         """
-        Converte string para boolean
+        Enriquece múltiplos ativos com requisições concorrentes
+        
+        Concorrência, taxa (token bucket), timeout e novas tentativas vêm das
+        settings ANBIMA_* (ver `get_anbima_fetcher`), a menos que `fetcher` seja informado.
         
         Args:
-            value: String a ser convertida
+            cod_ativos: Lista de códigos de ativos
+            fetcher: AsyncFetcher (ainda não aberto) a usar no lugar do padrão
             
         Returns:
-            Boolean ou None se não conseguir converter
+            Dict com códigos de ativos como chaves e dados como valores
         """
-        if not value:
-            return None
-            
-        value_lower = value.lower().strip()
-        if value_lower in ['sim', 'yes', 'true', '1', 's']:
-            return True
-        elif value_lower in ['não', 'nao', 'no', 'false', '0', 'n']:
-            return False
-        else:
-            return None
+        cod_ativos = list(dict.fromkeys(cod_ativos))
+        
+        async with (fetcher or get_anbima_fetcher(self.HEADERS)) as aberto:
+            resultados = await asyncio.gather(*(self._buscar_ativo(aberto, cod_ativo) for cod_ativo in cod_ativos))
+        
+        return dict(zip(cod_ativos, resultados))
     
-    def enrich_multiple_ativos(self, cod_ativos: list[str], delay: float = 1.0) -> Dict[str, Dict[str, Any]]:
+    def enrich_multiple_ativos(self, cod_ativos: list[str], delay: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
         """
-        Enriquece múltiplos ativos com delay entre requisições
+        Enriquece múltiplos ativos (versão síncrona de `enrich_multiple_ativos_async`)
         
         Args:
             cod_ativos: Lista de códigos de ativos
-            delay: Delay em segundos entre requisições
+            delay: Se informado, limita a uma requisição a cada `delay` segundos
+                   (no lugar do limite de taxa das settings)
             
         Returns:
             Dict com códigos de ativos como chaves e dados como valores
         """
-        resultados = {}
-        
-        for i, cod_ativo in enumerate(cod_ativos):
-            logger.info(f"Enriquecendo ativo {i+1}/{len(cod_ativos)}: {cod_ativo}")
-            
-            resultado = self.enrich_ativo(cod_ativo)
-            resultados[cod_ativo] = resultado
-            
-            # Delay entre requisições para não sobrecarregar o servidor
-            if i < len(cod_ativos) - 1:
-                time.sleep(delay)
+        fetcher = None
+        if delay:
+            fetcher = get_anbima_fetcher(self.HEADERS)
+            fetcher.rate_limiter = TokenBucket(1 / delay, 1)
         
-        return resultados
+        return executar_sync(self.enrich_multiple_ativos_async(cod_ativos, fetcher))
@@ -0,0 +1,178 @@
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, Iterable, Optional, TypeVar
+import logging
+import select
+import threading
+
+from app.config import get_settings
+from app.models.versao_dados import ESCOPO_GLOBAL, ESCOPO_ENRIQUECIMENTO, escopo_fundo
+from app.persiste.util.versao_dados import CANAL_VERSAO_DADOS, get_versoes_dados
+from app.provider import get_cache_analytics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class VersoesLocais:
+    """
+    Cópia em memória de tb_versao_dados, mantida pelo `OuvinteVersoesDados`.
+
+    Só é usada enquanto o ouvinte está conectado ("ao vivo"); fora disso as
+    versões são lidas do banco a cada requisição.
+    """
+    def __init__(self):
+        self._versoes: Dict[str, int] = {}
+        self._ao_vivo = False
+        self._lock = threading.Lock()
+
+    @property
+    def ao_vivo(self) -> bool:
+        return self._ao_vivo
+
+    def carregar(self, versoes: Dict[str, int]) -> None:
+        with self._lock:
+            self._versoes = dict(versoes)
+            self._ao_vivo = True
+
+    def desligar(self) -> None:
+        with self._lock:
+            self._ao_vivo = False
+
+    def atualizar(self, payload: str) -> None:
+        """Aplica um NOTIFY "<escopo>:<versão>" (versões só sobem: avisos fora de ordem não voltam atrás)"""
+        escopo, _, versao = payload.rpartition(":")
+        with self._lock:
+            self._versoes[escopo] = max(self._versoes.get(escopo, 0), int(versao))
+
+    def get(self, escopos: Iterable[str]) -> Dict[str, int]:
+        with self._lock:
+            return {escopo: self._versoes.get(escopo, 0) for escopo in escopos}
+
+
+_versoes_locais = VersoesLocais()
+
+
+class OuvinteVersoesDados(threading.Thread):
+    """
+    Thread que escuta o canal CANAL_VERSAO_DADOS (LISTEN/NOTIFY) e mantém `VersoesLocais`.
+
+    - Conexão própria, fora do pool do engine, em autocommit.
+    - A cada (re)conexão: LISTEN primeiro, depois recarrega a tabela inteira, para não
+      perder incrementos feitos enquanto estava desconectado.
+    - Em erro, desliga as versões locais (volta à leitura no banco) e reconecta.
+    """
+    def __init__(self, intervalo_reconexao: float = 5.0):
+        super().__init__(name="ouvinte-versao-dados", daemon=True)
+        self.intervalo_reconexao = intervalo_reconexao
+        self._parar = threading.Event()
+
+    def parar(self) -> None:
+        self._parar.set()
+
+    def _conectar(self):
+        from app.config.db import engine
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        conexao = engine.dialect.connect(*cargs, **cparams)
+        conexao.autocommit = True
+        return conexao
+
+    def run(self) -> None:
+        while not self._parar.is_set():
+            conexao = None
+            try:
+                conexao = self._conectar()
+                with conexao.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CANAL_VERSAO_DADOS}")
+                    cursor.execute("SELECT ds_escopo, nr_versao FROM tb_versao_dados")
+                    _versoes_locais.carregar(dict(cursor.fetchall()))
+                logger.info("Cache do analytics: ouvindo as versões dos dados (LISTEN/NOTIFY)")
+
+                while not self._parar.is_set():
+                    # Acorda de tempos em tempos para checar o pedido de parada
+                    if select.select([conexao], [], [], 1.0) == ([], [], []):
+                        continue
+                    conexao.poll()
+                    while conexao.notifies:
+                        _versoes_locais.atualizar(conexao.notifies.pop(0).payload)
+            except Exception as e:
+                _versoes_locais.desligar()
+                logger.warning(f"Cache do analytics: ouvinte de versões desconectado ({e}); nova tentativa em {self.intervalo_reconexao:.0f}s")
+                self._parar.wait(self.intervalo_reconexao)
+            finally:
+                _versoes_locais.desligar()
+                if conexao is not None:
+                    conexao.close()
+
+
+_ouvinte: Optional[OuvinteVersoesDados] = None
+
+
+def iniciar_ouvinte_versoes() -> None:
+    """Inicia o ouvinte do processo (lifespan da API), se ANALYTICS_CACHE_LISTEN"""
+    global _ouvinte
+    settings = get_settings()
+    if settings.ANALYTICS_CACHE_ATIVO and settings.ANALYTICS_CACHE_LISTEN and _ouvinte is None:
+        _ouvinte = OuvinteVersoesDados()
+        _ouvinte.start()
+
+
+def parar_ouvinte_versoes() -> None:
+    global _ouvinte
+    if _ouvinte is not None:
+        _ouvinte.parar()
+        _ouvinte.join(timeout=5)
+        _ouvinte = None
+
+
+def escopos_consulta(fundo_id: Optional[int] = None, enriched: bool = False) -> list[str]:
+    """Escopos de que uma consulta depende: o fundo (ou todos) e, com `enriched`, o enriquecimento"""
+    escopos = [escopo_fundo(fundo_id) if fundo_id else ESCOPO_GLOBAL]
+    if enriched:
+        escopos.append(ESCOPO_ENRIQUECIMENTO)
+    return escopos
+
+
+def versoes_dados(db: Session, escopos: Iterable[str]) -> Dict[str, int]:
+    """Versão atual dos escopos: da memória (ouvinte conectado) ou do banco"""
+    return _versoes_locais.get(escopos) if _versoes_locais.ao_vivo else get_versoes_dados(db, escopos)
+
+
+def _normalizar(valor: Any) -> Any:
+    if isinstance(valor, str):
+        return valor.strip() or None
+    return valor
+
+
+def em_cache(
+    db      : Session,
+    endpoint: str,
+    filtros : Dict[str, Any],
+    calcular: Callable[[], T],
+    fundo_id: Optional[int] = None,
+    enriched: bool = False,
+) -> T:
+    """
+    Resposta do analytics pelo cache: chave = endpoint + filtros normalizados + versão dos escopos.
+
+    Quando a ingestão/enriquecimento incrementa a versão, a chave muda e a resposta é
+    recalculada; as entradas antigas saem pelo LRU. Sem o ouvinte, a versão vem do banco
+    (uma consulta por chave primária, ainda bem mais barata que o analytics).
+    """
+    if not get_settings().ANALYTICS_CACHE_ATIVO:
+        return calcular()
+
+    escopos = escopos_consulta(fundo_id, enriched)
+    versoes = versoes_dados(db, escopos)
+    chave = (
+        endpoint,
+        tuple(sorted((nome, _normalizar(valor)) for nome, valor in filtros.items() if _normalizar(valor) is not None)),
+        tuple(sorted(versoes.items())),
+    )
+
+    cache = get_cache_analytics()
+    resposta = cache.get(chave)
+    if resposta is None:
+        resposta = calcular()
+        cache.set(chave, resposta)
+    return resposta
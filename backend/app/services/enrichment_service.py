@@ -1,19 +1,32 @@
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 
+from app.config import get_settings
 from app.services.anbima_enrichment import AnbimaEnrichmentService
 from app.persiste.util.ativo_enriquecido import (
     insert_ativo_enriquecido,
+    bulk_upsert_ativos_enriquecidos,
     get_ativo_enriquecido_by_ativo_id,
     get_ativos_para_enriquecimento
 )
-from app.models import AtivoEnriquecido
+from app.persiste.util.cache_enriquecimento import get_cache_enriquecimento, upsert_cache_enriquecimento
+from app.persiste.util.versao_dados import incrementar_versao_dados
+from app.models.versao_dados import ESCOPO_ENRIQUECIMENTO
+from app.provider import get_cache_enriquecimento_lru
+from app.utils import chunked
+from app.models import AtivoEnriquecido, CacheEnriquecimento
 from app.DTOs.ativo_enriquecido import AtivoEnriquecidoDTO
 
 logger = logging.getLogger(__name__)
 
+# Campos da página da ANBIMA guardados em tb_cache_enriquecimento / AtivoEnriquecido
+CAMPOS_ANBIMA = ('serie', 'emissao', 'devedor', 'securitizadora', 'resgate_antecipado', 'agente_fiduciario')
+
+# Erro definitivo ao atualizar um ativo que já tinha dados: só estas colunas mudam
+COLUNAS_ERRO_ATUALIZACAO = ['ds_erro_enriquecimento', 'dt_ultimo_enriquecimento']
+
 class EnrichmentService:
     """
     Serviço principal para enriquecimento de dados de ativos
@@ -52,44 +65,30 @@ class EnrichmentService:
                     'sucesso': True,
                     'mensagem': 'Ativo já possui dados enriquecidos',
                     'ativo_id': ativo_id,
-                    'dados': dados_existentes
+                    'dados': _dados_ativo_enriquecido(dados_existentes)
                 }
             
             # Buscar dados na ANBIMA
             logger.info(f"Iniciando enriquecimento do ativo {ativo.cd_ativo} (ID: {ativo_id})")
-            dados_anbima = self.anbima_service.enrich_ativo(ativo.cd_ativo)
-            
-            if not dados_anbima or dados_anbima.get('erro'):
-                # Erro na busca
-                ativo_enriquecido = AtivoEnriquecido(
-                    id_ativo=ativo_id,
-                    fl_enriquecido=False,
-                    fl_erro_enriquecimento=True,
-                    ds_erro_enriquecimento=dados_anbima.get('mensagem', 'Erro desconhecido') if dados_anbima else 'Nenhum dado encontrado',
-                    dt_ultimo_enriquecimento=date.today()
-                )
-            else:
-                # Sucesso na busca
-                ativo_enriquecido = AtivoEnriquecido(
-                    id_ativo=ativo_id,
-                    serie=dados_anbima.get('serie'),
-                    emissao=dados_anbima.get('emissao'),
-                    devedor=dados_anbima.get('devedor'),
-                    securitizadora=dados_anbima.get('securitizadora'),
-                    resgate_antecipado=dados_anbima.get('resgate_antecipado'),
-                    agente_fiduciario=dados_anbima.get('agente_fiduciario'),
-                    fl_enriquecido=True,
-                    fl_erro_enriquecimento=False,
-                    dt_ultimo_enriquecimento=date.today()
-                )
+            dados_anbima = self._buscar_dados_anbima(db, [ativo.cd_ativo])[ativo.cd_ativo]
+            if _erro_transitorio(dados_anbima):
+                # Não grava como erro do ativo: a ANBIMA é que está indisponível
+                return {
+                    'sucesso': False,
+                    'erro': dados_anbima.get('mensagem'),
+                    'transitorio': True,
+                    'ativo_id': ativo_id
+                }
+            ativo_enriquecido = AtivoEnriquecido(**self._linha_ativo_enriquecido(ativo_id, dados_anbima))
             
-            # Persistir dados
+            # Persistir dados (a nova versão invalida o cache do analytics no mesmo commit)
+            incrementar_versao_dados(db, [ESCOPO_ENRIQUECIMENTO])
             ativo_enriquecido_persistido = insert_ativo_enriquecido(db, ativo_enriquecido, commit=True)
             
             return {
                 'sucesso': True,
                 'ativo_id': ativo_id,
-                'dados': ativo_enriquecido_persistido,
+                'dados': _dados_ativo_enriquecido(ativo_enriquecido_persistido),
                 'enriquecido': not ativo_enriquecido.fl_erro_enriquecimento
             }
             
@@ -101,13 +100,114 @@ class EnrichmentService:
                 'ativo_id': ativo_id
             }
     
-    def enrich_multiple_ativos(self, db: Session, ativo_ids: List[int]) -> Dict[str, Any]:
+    def _linha_ativo_enriquecido(self, ativo_id: int, dados_anbima: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Monta a linha de tb_ativo_enriquecido a partir do retorno da ANBIMA (dados, erro ou None)
+        
+        Args:
+            ativo_id: ID do ativo
+            dados_anbima: Retorno de AnbimaEnrichmentService para o ativo
+            
+        Returns:
+            Dict com as colunas de AtivoEnriquecido
+        """
+        if not dados_anbima or dados_anbima.get('erro'):
+            # Erro na busca
+            return {
+                'id_ativo': ativo_id,
+                **{campo: None for campo in CAMPOS_ANBIMA},
+                'fl_enriquecido': False,
+                'fl_erro_enriquecimento': True,
+                'ds_erro_enriquecimento': dados_anbima.get('mensagem', 'Erro desconhecido') if dados_anbima else 'Nenhum dado encontrado',
+                'dt_ultimo_enriquecimento': date.today()
+            }
+        
+        # Sucesso na busca
+        return {
+            'id_ativo': ativo_id,
+            **{campo: dados_anbima.get(campo) for campo in CAMPOS_ANBIMA},
+            'fl_enriquecido': True,
+            'fl_erro_enriquecimento': False,
+            'ds_erro_enriquecimento': None,
+            'dt_ultimo_enriquecimento': dados_anbima.get('dt_ultimo_enriquecimento') or date.today()
+        }
+    
+    def _buscar_dados_anbima(self, db: Session, cod_ativos: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Dados da ANBIMA por código de ativo: LRU em memória -> tb_cache_enriquecimento -> HTTP
+        
+        O mesmo código em vários fundos/uploads é buscado na ANBIMA uma única vez por
+        janela de TTL (ANBIMA_CACHE_TTL_HORAS; erros valem ANBIMA_CACHE_TTL_ERRO_MINUTOS).
+        Erros transitórios (ANBIMA indisponível) não entram no cache.
+        
+        Args:
+            db: Sessão do banco de dados (faz commit das entradas novas do cache)
+            cod_ativos: Códigos dos ativos
+            
+        Returns:
+            Dict {cd_ativo: dados} no formato de AnbimaEnrichmentService (dados ou {'erro': True, ...})
+        """
+        settings = get_settings()
+        lru = get_cache_enriquecimento_lru()
+        ttl_dados = timedelta(hours=settings.ANBIMA_CACHE_TTL_HORAS)
+        ttl_erro = timedelta(minutes=settings.ANBIMA_CACHE_TTL_ERRO_MINUTOS)
+        
+        resultados: Dict[str, Dict[str, Any]] = {}
+        faltantes = []
+        for cod_ativo in dict.fromkeys(cod_ativos):
+            dados = lru.get(cod_ativo)
+            if dados is None:
+                faltantes.append(cod_ativo)
+            else:
+                resultados[cod_ativo] = dados
+        
+        # Cache no banco (compartilhado entre processos); só vale dentro do TTL
+        agora = datetime.now(timezone.utc)
+        for cod_ativo, linha in get_cache_enriquecimento(db, faltantes).items():
+            validade = linha.dt_busca + (ttl_erro if linha.fl_erro else ttl_dados)
+            if validade > agora:
+                resultados[cod_ativo] = _dados_do_cache(linha)
+                lru.set(cod_ativo, resultados[cod_ativo], (validade - agora).total_seconds())
+        
+        a_buscar = [cod_ativo for cod_ativo in faltantes if cod_ativo not in resultados]
+        logger.info(f"Enriquecimento: {len(resultados)} ativos em cache, {len(a_buscar)} a buscar na ANBIMA")
+        if not a_buscar:
+            return resultados
+        
+        buscados = self.anbima_service.enrich_multiple_ativos(a_buscar)
+        for cod_ativo in a_buscar:
+            resultados[cod_ativo] = buscados.get(cod_ativo) or {'erro': True, 'mensagem': 'Nenhum dado encontrado'}
+        
+        a_buscar = [cod_ativo for cod_ativo in a_buscar if not _erro_transitorio(resultados[cod_ativo])]
+        upsert_cache_enriquecimento(db, [_linha_cache(cod_ativo, resultados[cod_ativo]) for cod_ativo in a_buscar])
+        db.commit()
+        
+        for cod_ativo in a_buscar:
+            ttl = ttl_erro if resultados[cod_ativo].get('erro') else ttl_dados
+            lru.set(cod_ativo, resultados[cod_ativo], ttl.total_seconds())
+        
+        return resultados
+    
+    def enrich_multiple_ativos(
+        self,
+        db: Session,
+        ativo_ids: List[int],
+        idade_maxima: Optional[timedelta] = None
+    ) -> Dict[str, Any]:
         """
         Enriquece múltiplos ativos
         
+        As páginas da ANBIMA são buscadas de uma vez (cache + requisições concorrentes,
+        sem sessão do banco nas tarefas de busca); os resultados são gravados em lote,
+        um INSERT ... ON CONFLICT (id_ativo) e um commit por chunk. Ativos com erro
+        transitório (ANBIMA indisponível) não são gravados e voltam com 'transitorio': True.
+        Erro definitivo (404, página sem dados) na atualização de um ativo que já tinha dados
+        só registra o erro e a data da tentativa: os dados anteriores e fl_enriquecido ficam.
+        
         Args:
             db: Sessão do banco de dados
             ativo_ids: Lista de IDs dos ativos
+            idade_maxima: Se informada, dados enriquecidos mais antigos que isso são buscados de novo
             
         Returns:
             Dict com resultados do enriquecimento
@@ -120,8 +220,97 @@ class EnrichmentService:
             'falhas': 0
         }
         
+        from app.models import Ativo
+        
+        # Ativos existentes e os que já têm dados enriquecidos (sem erro)
+        ativos = {
+            ativo.id_ativo: ativo
+            for ativo in db.query(Ativo).filter(Ativo.id_ativo.in_(ativo_ids)).all()
+        }
+        consulta_enriquecidos = db.query(AtivoEnriquecido).filter(
+            AtivoEnriquecido.id_ativo.in_(ativo_ids),
+            AtivoEnriquecido.fl_erro_enriquecimento == False
+        )
+        if idade_maxima is not None:
+            consulta_enriquecidos = consulta_enriquecidos.filter(
+                AtivoEnriquecido.dt_ultimo_enriquecimento >= date.today() - idade_maxima
+            )
+        ja_enriquecidos = {dados.id_ativo: dados for dados in consulta_enriquecidos.all()}
+        
+        # Buscar (cache ou ANBIMA) todos os pendentes de uma vez
+        pendentes = [ativo for ativo_id, ativo in ativos.items() if ativo_id not in ja_enriquecidos]
+        dados_por_codigo = self._buscar_dados_anbima(db, [ativo.cd_ativo for ativo in pendentes])
+        
+        # Pendentes que já têm dados (atualização pelo agendador): um erro agora não os apaga
+        com_dados = {
+            dados.id_ativo: _dados_ativo_enriquecido(dados)
+            for dados in db.query(AtivoEnriquecido).filter(
+                AtivoEnriquecido.id_ativo.in_([ativo.id_ativo for ativo in pendentes]),
+                AtivoEnriquecido.fl_enriquecido == True
+            ).all()
+        }
+        
+        # Gravar em lote (menos os erros transitórios, que não dizem nada sobre o ativo)
+        transitorios: Dict[int, str] = {}
+        linhas: Dict[int, Dict[str, Any]] = {}
+        mantidos: Dict[int, Dict[str, Any]] = {}
+        for ativo in pendentes:
+            dados = dados_por_codigo.get(ativo.cd_ativo)
+            if _erro_transitorio(dados):
+                transitorios[ativo.id_ativo] = dados.get('mensagem')
+                continue
+            linha = self._linha_ativo_enriquecido(ativo.id_ativo, dados)
+            if linha['fl_erro_enriquecimento'] and ativo.id_ativo in com_dados:
+                mantidos[ativo.id_ativo] = {
+                    **com_dados[ativo.id_ativo],
+                    **{coluna: linha[coluna] for coluna in COLUNAS_ERRO_ATUALIZACAO}
+                }
+            linhas[ativo.id_ativo] = linha
+        erros_gravacao: Dict[int, str] = {}
+        for chunk in chunked(linhas.values(), get_settings().INGESTION_CHUNK_SIZE):
+            try:
+                bulk_upsert_ativos_enriquecidos(db, [linha for linha in chunk if linha['id_ativo'] not in mantidos])
+                bulk_upsert_ativos_enriquecidos(
+                    db,
+                    [linha for linha in chunk if linha['id_ativo'] in mantidos],
+                    colunas_atualizadas=COLUNAS_ERRO_ATUALIZACAO
+                )
+                incrementar_versao_dados(db, [ESCOPO_ENRIQUECIMENTO])
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Erro ao gravar dados enriquecidos de {len(chunk)} ativos: {e}")
+                erros_gravacao.update({linha['id_ativo']: str(e) for linha in chunk})
+        
         for ativo_id in ativo_ids:
-            resultado = self.enrich_single_ativo(db, ativo_id)
+            if ativo_id not in ativos:
+                resultado = {'sucesso': False, 'erro': 'Ativo não encontrado', 'ativo_id': ativo_id}
+            elif ativo_id in ja_enriquecidos:
+                resultado = {
+                    'sucesso': True,
+                    'mensagem': 'Ativo já possui dados enriquecidos',
+                    'ativo_id': ativo_id,
+                    'dados': _dados_ativo_enriquecido(ja_enriquecidos[ativo_id])
+                }
+            elif ativo_id in transitorios:
+                resultado = {'sucesso': False, 'erro': transitorios[ativo_id], 'transitorio': True, 'ativo_id': ativo_id}
+            elif ativo_id in erros_gravacao:
+                resultado = {'sucesso': False, 'erro': erros_gravacao[ativo_id], 'ativo_id': ativo_id}
+            elif ativo_id in mantidos:
+                resultado = {
+                    'sucesso': True,
+                    'mensagem': 'Erro na atualização; dados anteriores mantidos',
+                    'ativo_id': ativo_id,
+                    'dados': mantidos[ativo_id],
+                    'enriquecido': False
+                }
+            else:
+                resultado = {
+                    'sucesso': True,
+                    'ativo_id': ativo_id,
+                    'dados': linhas[ativo_id],
+                    'enriquecido': not linhas[ativo_id]['fl_erro_enriquecimento']
+                }
             
             if resultado['sucesso']:
                 resultados['sucessos'].append(resultado)
@@ -216,3 +405,42 @@ class EnrichmentService:
             return {
                 'erro': str(e)
             }
+
+
+def _erro_transitorio(dados: Optional[Dict[str, Any]]) -> bool:
+    """Erro de busca que vale tentar de novo (circuito aberto, rede, 429/5xx), sem gravar como erro do ativo"""
+    return bool(dados and dados.get('erro') and dados.get('transitorio'))
+
+
+def _dados_do_cache(linha: CacheEnriquecimento) -> Dict[str, Any]:
+    """Converte uma linha de tb_cache_enriquecimento no formato de AnbimaEnrichmentService"""
+    if linha.fl_erro:
+        return {'erro': True, 'mensagem': linha.ds_erro}
+    
+    return {
+        **{campo: getattr(linha, campo) for campo in CAMPOS_ANBIMA},
+        'dt_ultimo_enriquecimento': linha.dt_busca.date()
+    }
+
+
+def _linha_cache(cod_ativo: str, dados: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha de tb_cache_enriquecimento para o resultado de uma busca na ANBIMA"""
+    erro = bool(dados.get('erro'))
+    return {
+        'cd_ativo': cod_ativo,
+        **{campo: None if erro else dados.get(campo) for campo in CAMPOS_ANBIMA},
+        'fl_erro': erro,
+        'ds_erro': dados.get('mensagem') if erro else None
+    }
+
+
+def _dados_ativo_enriquecido(ativo_enriquecido: AtivoEnriquecido) -> Dict[str, Any]:
+    """Colunas de um AtivoEnriquecido como dict (serializável na resposta)"""
+    return {
+        'id_ativo': ativo_enriquecido.id_ativo,
+        **{campo: getattr(ativo_enriquecido, campo) for campo in CAMPOS_ANBIMA},
+        'fl_enriquecido': ativo_enriquecido.fl_enriquecido,
+        'fl_erro_enriquecimento': ativo_enriquecido.fl_erro_enriquecimento,
+        'ds_erro_enriquecimento': ativo_enriquecido.ds_erro_enriquecimento,
+        'dt_ultimo_enriquecimento': ativo_enriquecido.dt_ultimo_enriquecimento
+    }
@@ -0,0 +1,62 @@
+from typing import Iterator, Optional, Tuple
+import logging
+
+from app.config import get_settings
+from app.persiste.queries.exportacao import colunas_exportacao, iter_posicoes_exportacao
+from app.utils import FORMATOS_EXPORTACAO, formato_disponivel, iter_csv, iter_ndjson, iter_parquet
+from app.utils.exportacao import FORMATO_CSV, FORMATO_NDJSON
+
+logger = logging.getLogger(__name__)
+
+
+def exportar_posicoes_service(
+    formato     : str,
+    fundo_id    : Optional[int] = None,
+    enriched    : bool = False,
+    date_from   : Optional[str] = None,
+    date_to     : Optional[str] = None,
+    indexador   : Optional[str] = None,
+    codigo_ativo: Optional[str] = None
+) -> Tuple[str, str, Iterator[bytes]]:
+    """
+    Prepara a exportação em streaming das posições filtradas
+
+    O conteúdo só é lido quando o iterador é consumido, com uma sessão própria
+    (a da requisição já foi fechada quando a resposta em streaming é enviada).
+    Memória constante: um lote (EXPORTACAO_LOTE_LINHAS) por vez, do cursor do
+    servidor até o bloco de bytes enviado.
+
+    Args:
+        formato: csv, ndjson ou parquet (parquet requer pyarrow)
+        fundo_id: Restringe às posições do fundo
+        enriched: Inclui as colunas da ANBIMA
+
+    Returns:
+        (media type, nome do arquivo, iterador de bytes)
+
+    Raises:
+        ValueError: formato desconhecido ou indisponível
+    """
+    if not formato_disponivel(formato):
+        raise ValueError(f"Formato de exportação indisponível: {formato}")
+
+    colunas = colunas_exportacao(enriched)
+    tamanho_lote = get_settings().EXPORTACAO_LOTE_LINHAS
+
+    def conteudo() -> Iterator[bytes]:
+        from app.config.db import SessionLocal
+        with SessionLocal() as db_stream:
+            lotes = iter_posicoes_exportacao(
+                db_stream, tamanho_lote, fundo_id, enriched, date_from, date_to, indexador, codigo_ativo
+            )
+            if formato == FORMATO_CSV:
+                yield from iter_csv([nome for nome, _ in colunas], lotes)
+            elif formato == FORMATO_NDJSON:
+                yield from iter_ndjson([nome for nome, _ in colunas], lotes)
+            else:
+                yield from iter_parquet([(nome, coluna.type) for nome, coluna in colunas], lotes)
+        logger.info(f"Exportação {formato} concluída (fundo={fundo_id})")
+
+    media_type, extensao = FORMATOS_EXPORTACAO[formato]
+    nome_arquivo = f"posicoes_fundo_{fundo_id}.{extensao}" if fundo_id is not None else f"posicoes.{extensao}"
+    return media_type, nome_arquivo, conteudo()
@@ -0,0 +1,105 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List
+from datetime import timedelta
+import logging
+import traceback
+
+from app.config import get_settings
+from app.models.fila_enriquecimento import PRIORIDADE_MANUAL, ORIGEM_MANUAL
+from app.persiste.util.fila_enriquecimento import (
+    enfileirar_ativos,
+    claim_lote_enriquecimento,
+    concluir_itens_enriquecimento,
+    registrar_falhas_enriquecimento,
+    contar_fila_enriquecimento
+)
+from app.schemas.enrichment import FilaEnriquecimentoStatusResponse
+
+logger = logging.getLogger(__name__)
+
+
+def enfileirar_enriquecimento(
+    db        : Session,
+    ativo_ids : List[int],
+    prioridade: int = PRIORIDADE_MANUAL,
+    origem    : str = ORIGEM_MANUAL,
+) -> int:
+    """
+    Enfileira o enriquecimento dos ativos na fila persistente (com commit).
+
+    Retorna a quantidade de ativos enviados; ativos já na fila não são duplicados.
+    """
+    enfileirar_ativos(db, ativo_ids, prioridade, origem)
+    db.commit()
+    return len(set(ativo_ids))
+
+
+def processar_lote_enriquecimento() -> int:
+    """
+    Reserva um lote da fila (SKIP LOCKED) e o enriquece com EnrichmentService.enrich_multiple_ativos.
+
+    - Ativos enriquecidos (ou que já tinham dados recentes) -> "concluido".
+    - Falha transitória (ANBIMA indisponível, erro de gravação) -> volta para "pendente"
+      com backoff, até ENRIQUECIMENTO_MAX_TENTATIVAS.
+    - Falha definitiva (página sem dados, 404, ativo que não existe mais) -> "erro"
+      sem nova tentativa; o agendador volta a buscar quando o registro envelhecer.
+
+    Retorna a quantidade de itens processados (0 = fila vazia).
+    """
+    from app.config.db import SessionLocal
+    from app.services.enrichment_service import EnrichmentService
+
+    settings = get_settings()
+    backoff = timedelta(minutes=settings.ENRIQUECIMENTO_BACKOFF_MINUTOS)
+
+    with SessionLocal() as db:
+        itens = claim_lote_enriquecimento(
+            db,
+            tamanho = settings.ENRIQUECIMENTO_LOTE,
+            timeout = timedelta(seconds=settings.ENRIQUECIMENTO_TIMEOUT_SEGUNDOS),
+        )
+        db.commit()
+        if not itens:
+            return 0
+
+        try:
+            resultado = EnrichmentService().enrich_multiple_ativos(
+                db,
+                [id_ativo for _, id_ativo in itens],
+                # Itens do agendador: dados mais antigos que isso são buscados de novo
+                idade_maxima=timedelta(days=settings.ENRIQUECIMENTO_IDADE_MAXIMA_DIAS)
+            )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao enriquecer lote de {len(itens)} itens: {e}")
+            logger.error(f"Stack trace: {traceback.format_exc()}")
+            registrar_falhas_enriquecimento(db, {id_item: str(e) for id_item, _ in itens}, settings.ENRIQUECIMENTO_MAX_TENTATIVAS, backoff)
+            db.commit()
+            return len(itens)
+
+        por_ativo: Dict[int, dict] = {r['ativo_id']: r for r in resultado['sucessos'] + resultado['erros']}
+        concluidos, falhas, definitivas = [], {}, set()
+        for id_item, id_ativo in itens:
+            r = por_ativo.get(id_ativo, {'sucesso': False, 'erro': 'Sem resultado'})
+            if r['sucesso'] and r.get('enriquecido', True):
+                concluidos.append(id_item)
+            elif r['sucesso']:
+                # Erro gravado em tb_ativo_enriquecido: a página respondeu, tentar de novo não muda nada
+                falhas[id_item] = r['dados'].get('ds_erro_enriquecimento') or 'Erro desconhecido'
+                definitivas.add(id_item)
+            else:
+                falhas[id_item] = r.get('erro') or 'Erro desconhecido'
+                if r.get('erro') == 'Ativo não encontrado':
+                    definitivas.add(id_item)
+
+        concluir_itens_enriquecimento(db, concluidos)
+        registrar_falhas_enriquecimento(db, falhas, settings.ENRIQUECIMENTO_MAX_TENTATIVAS, backoff, definitivas)
+        db.commit()
+
+        logger.info(f"Lote de enriquecimento: {len(concluidos)} concluídos, {len(falhas)} com falha")
+        return len(itens)
+
+
+def get_status_fila_service(db: Session) -> FilaEnriquecimentoStatusResponse:
+    """Quantidade de itens da fila de enriquecimento por status."""
+    return FilaEnriquecimentoStatusResponse(por_status=contar_fila_enriquecimento(db))
@@ -1,10 +1,100 @@
 from __future__ import annotations
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Any, Dict, List
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+from io import BytesIO
+import asyncio
 from app.DTOs import ParsedBundleDTO, AtivoDTO, IndexadorDTO, LoteDTO, PosicaoDTO
-from app.utils import FileLoader, Parser, convert_to_list, str_to_datetime_utc, str_to_decimal, str_to_float
-from app.persiste import persist_bundles
+from app.utils import FileLoader, Parser, str_to_datetime_utc, str_to_decimal, str_to_float
+from app.persiste import persist_bundles, persist_bundles_bulk
+from app.config import get_settings
+from app.provider import get_process_pool
+
+# Caminho do registro de título privado dentro do XML (padrão arquivoposicao_4_01)
+TITPRIVADO_PATH = ("arquivoposicao_4_01", "fundo", "titprivado")
+
+
+def build_bundle(titprivado: Dict[str, Any]) -> ParsedBundleDTO:
+    """
+    Constrói o ParsedBundleDTO (Lote, Indexador, Ativo, Posicao) de um único `titprivado`.
+    """
+    lote = LoteDTO(
+        vl_pu_compra = str_to_decimal(titprivado.get("pucompra")),
+        qtd_comprada = str_to_decimal(titprivado.get("qtdisponivel")),
+        dt_operacao  = str_to_datetime_utc(titprivado.get("dtoperacao")),
+    )
+
+    indexador = IndexadorDTO(
+        cd_indexador  = titprivado.get("indexador"),
+        sgl_indexador = titprivado.get("sgl_indexador", ""),
+    )
+
+    ativo = AtivoDTO(
+        cd_ativo       = titprivado.get("codativo"),
+        cd_isin        = titprivado.get("isin"),
+        vl_pu_emissao  = str_to_decimal(titprivado.get("puemissao")),
+        perc_indexador = str_to_float(titprivado.get("percindex")),
+        perc_cupom     = str_to_float(titprivado.get("coupom")),
+        dt_emissao     = str_to_datetime_utc(titprivado.get("dtemissao")),
+        dt_vencimento  = str_to_datetime_utc(titprivado.get("dtvencimento")),
+    )
+
+    posicao = PosicaoDTO(
+        vl_pu_posicao            = str_to_decimal(titprivado.get("puposicao")),
+        vl_principal             = str_to_decimal(titprivado.get("principal")),
+        vl_financeiro_disponivel = str_to_decimal(titprivado.get("valorfindisp")),
+        dt_posicao               = str_to_datetime_utc(titprivado.get("dtoperacao")),
+    )
+
+    return ParsedBundleDTO(
+        lote      = lote,
+        indexador = indexador,
+        ativo     = ativo,
+        posicao   = posicao,
+    )
+
+
+def iter_bundles(stream: BinaryIO, parser: Parser) -> Iterator[ParsedBundleDTO]:
+    """
+    Lê o XML em streaming e produz um ParsedBundleDTO por `titprivado`,
+    à medida que cada registro é fechado no arquivo.
+    """
+    for titprivado in parser.iter_xml_records(stream, TITPRIVADO_PATH):
+        yield build_bundle(titprivado)
+
+
+def parse_xml_bytes(data: bytes) -> List[tuple]:
+    """
+    Parseia um arquivo inteiro e devolve os bundles já validados como tuplas compactas
+    (`ParsedBundleDTO.to_row`).
+
+    Executada em um processo do pool, por isso recebe/retorna apenas tipos picklable.
+    """
+    return [bundle.to_row() for bundle in iter_bundles(BytesIO(data), Parser())]
+
+
+async def parse_files_in_pool(ls_files: List[UploadFile], loader: FileLoader) -> Iterator[ParsedBundleDTO]:
+    """
+    Parseia cada arquivo em um processo do pool, em paralelo, sem bloquear o event loop.
+
+    O parse de um arquivo é submetido assim que seus bytes são lidos, então a leitura
+    dos próximos uploads se sobrepõe ao parse dos anteriores.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+
+    futures = [
+        loop.run_in_executor(pool, parse_xml_bytes, await loader.load_bytes(file))
+        for file in ls_files
+    ]
+    rows_por_arquivo = await asyncio.gather(*futures)
+
+    return (
+        ParsedBundleDTO.from_row(row)
+        for rows in rows_por_arquivo
+        for row in rows
+    )
 
 
 async def upload_files_service(
@@ -15,59 +105,49 @@ async def upload_files_service(
     fundo_id: int = None,
 ) -> List[ParsedBundleDTO]:
     """
-    Lê cada arquivo, parseia o XML e retorna uma lista de ParsedBundleDTO,
-    contendo (Lote, Indexador, Ativo, Posicao) já ligados entre si.
+    Lê os arquivos, constrói os ParsedBundleDTO (Lote, Indexador, Ativo, Posicao)
+    e os persiste em uma única transação.
 
-    Não faz persistência nem validação de unicidade/deduplicação.
+    - Um arquivo: lido em streaming e entregue à persistência conforme é lido; o XML
+      nunca é carregado inteiro em memória (nem como texto nem como árvore de dicts).
+    - Vários arquivos (com `PARSER_PROCESS_POOL`): cada um é parseado em um processo
+      do pool, em paralelo; a persistência continua na sessão da requisição.
+
+    A persistência segue as configurações de ingestão (ver `persistir_bundles`) e
+    roda no threadpool, fora do event loop (o parsing em streaming vai junto).
+    """
+    settings = get_settings()
+
+    if len(ls_files) > 1 and settings.PARSER_PROCESS_POOL:
+        bundles = await parse_files_in_pool(ls_files, loader)
+    else:
+        streams = [await loader.open_stream(file) for file in ls_files]
+        bundles = (
+            bundle
+            for stream in streams
+            for bundle in iter_bundles(stream, parser)
+        )
+
+    return await run_in_threadpool(persistir_bundles, db, bundles, fundo_id)
+
+
+def persistir_bundles(
+    db                : Session,
+    bundles           : Iterable[ParsedBundleDTO],
+    fundo_id          : int = None,
+    ao_persistir_chunk: Optional[Callable[[int], None]] = None,
+) -> List[ParsedBundleDTO]:
+    """
+    Persiste os bundles em lote (`persist_bundles_bulk`) ou linha a linha
+    (`persist_bundles`), conforme `INGESTION_BULK`. Com `INGESTION_MODE=upsert` usa
+    sempre o caminho em lote, reaproveitando Ativo/Lote já existentes no fundo.
     """
-    bundles: List[ParsedBundleDTO] = []
-
-    for file in ls_files:
-        text = await loader.load_text(file)
-        doc: Dict[str, Any] = parser.parse_xml_text_to_dict(text) or {}
-        root = doc.get("arquivoposicao_4_01", {})
-        fundos = convert_to_list(root.get("fundo"))
-
-        for fundo in fundos:
-            titprivado_list = convert_to_list(fundo.get("titprivado", []))
-            
-            for titprivado in titprivado_list:
-                # --- construir entidades individuais ---
-                lote = LoteDTO(
-                    vl_pu_compra = str_to_decimal(titprivado.get("pucompra")),
-                    qtd_comprada = str_to_decimal(titprivado.get("qtdisponivel")),
-                    dt_operacao  = str_to_datetime_utc(titprivado.get("dtoperacao")),
-                )
-
-                indexador = IndexadorDTO(
-                    cd_indexador  = titprivado.get("indexador"),
-                    sgl_indexador = titprivado.get("sgl_indexador", ""),
-                )
-
-                ativo = AtivoDTO(
-                    cd_ativo       = titprivado.get("codativo"),
-                    cd_isin        = titprivado.get("isin"),
-                    vl_pu_emissao  = str_to_decimal(titprivado.get("puemissao")),
-                    perc_indexador = str_to_float(titprivado.get("percindex")),
-                    perc_cupom     = str_to_float(titprivado.get("coupom")),
-                    dt_emissao     = str_to_datetime_utc(titprivado.get("dtemissao")),
-                    dt_vencimento  = str_to_datetime_utc(titprivado.get("dtvencimento")),
-                )
-
-                posicao = PosicaoDTO(
-                    vl_pu_posicao            = str_to_decimal(titprivado.get("puposicao")),
-                    vl_principal             = str_to_decimal(titprivado.get("principal")),
-                    vl_financeiro_disponivel = str_to_decimal(titprivado.get("valorfindisp")),
-                    dt_posicao               = str_to_datetime_utc(titprivado.get("dtoperacao")),
-                )
-
-                bundles.append(
-                    ParsedBundleDTO(
-                        lote      = lote,
-                        indexador = indexador,
-                        ativo     = ativo,
-                        posicao   = posicao,
-                    )
-                )
+    settings = get_settings()
 
+    upsert = settings.INGESTION_MODE == "upsert"
+    if settings.INGESTION_BULK or upsert:
+        return persist_bundles_bulk(
+            db, bundles, fundo_id, settings.INGESTION_CHUNK_SIZE,
+            upsert=upsert, ao_persistir_chunk=ao_persistir_chunk,
+        )
     return persist_bundles(db, bundles, fundo_id)
@@ -1,22 +1,31 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.engine import Row
 from fastapi import UploadFile
-from typing import List, Optional, Dict, Any
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Dict, Any, Tuple, Iterator
 import logging
 from datetime import datetime
 
 from app.models import FundoInvestimento, ArquivoOriginal
+from app.models.versao_dados import escopos_do_fundo
+from app.persiste.util.versao_dados import incrementar_versao_dados
 from app.DTOs.fundo_investimento import FundoInvestimentoDTO, ArquivoOriginalDTO, FundoComArquivoDTO
 from app.services.file import upload_files_service
+from app.services.ingestao_job import enfileirar_arquivo_fundo
 from app.utils import FileLoader, Parser
 from app.persiste.util.fundo_investimento import (
     insert_fundo_investimento,
     insert_arquivo_original,
     get_fundo_by_id,
     get_fundo_by_hash_arquivo,
-    get_all_fundos,
+    get_fundos_com_estatisticas,
     count_fundos,
-    get_arquivo_by_hash
+    get_arquivo_by_hash,
+    get_arquivo_original,
+    armazenar_conteudo_arquivo,
+    iter_conteudo_arquivo
 )
+from app.provider import get_blob_store
 from app.schemas.fundo_investimento import (
     FundoInvestimentoResponse,
     FundoDetalhesResponse,
@@ -39,7 +48,8 @@ class FundoInvestimentoService:
         self,
         db: Session,
         arquivo: UploadFile,
-        conteudo_arquivo: str
+        conteudo_arquivo: str,
+        background: bool = False
     ) -> UploadFundoResponse:
         """
         Processa o upload de um arquivo XML e cria um fundo de investimento
@@ -48,55 +58,21 @@ class FundoInvestimentoService:
             db: Sessão do banco de dados
             arquivo: Arquivo enviado
             conteudo_arquivo: Conteúdo do arquivo como string
+            background: Se True, só armazena o arquivo e enfileira um job de ingestão
             
         Returns:
             Resposta do upload
         """
         try:
-            # Calcular hash do arquivo
-            hash_arquivo = ArquivoOriginal.calcular_hash(conteudo_arquivo)
-            
-            # Verificar se arquivo já existe
-            arquivo_existente = get_arquivo_by_hash(db, hash_arquivo)
-            if arquivo_existente:
-                logger.warning(f"Arquivo duplicado detectado: {arquivo.filename}")
-                
-                # Buscar fundo associado
-                fundo_existente = get_fundo_by_id(db, arquivo_existente.id_fundo_investimento)
-                
-                return UploadFundoResponse(
-                    sucesso=False,
-                    mensagem="Este arquivo já foi analisado pela plataforma",
-                    arquivo_duplicado=True,
-                    fundo_existente=self._formatar_fundo_response(fundo_existente) if fundo_existente else None
-                )
-            
-            # Criar novo fundo
-            proximo_numero = count_fundos(db) + 1
-            nome_fundo = f"fundo_de_investimento_{proximo_numero}"
-            
-            fundo = FundoInvestimento(
-                nm_fundo_investimento=nome_fundo,
-                ds_fundo_investimento=f"Fundo de investimento criado a partir do arquivo {arquivo.filename}",
-                id_orgao_financeiro=None
-            )
-            
-            # Persistir fundo
-            fundo_persistido = insert_fundo_investimento(db, fundo, commit=True)
-            
-            # Criar registro do arquivo original
-            arquivo_original = ArquivoOriginal(
-                id_fundo_investimento=fundo_persistido.id_fundo_investimento,
-                nm_arquivo=arquivo.filename,
-                nm_arquivo_original=arquivo.filename,
-                conteudo_arquivo=conteudo_arquivo,
-                hash_arquivo=hash_arquivo,
-                tamanho_arquivo=len(conteudo_arquivo),
-                fl_processado=False
+            # Consultas e gravações síncronas no threadpool, fora do event loop
+            resposta, fundo_persistido, arquivo_persistido = await run_in_threadpool(
+                self._registrar_arquivo, db, arquivo.filename, conteudo_arquivo, background
             )
-            
-            # Persistir arquivo
-            arquivo_persistido = insert_arquivo_original(db, arquivo_original, commit=True)
+            if resposta:
+                return resposta
+            # Já carregados em _registrar_arquivo: sem consulta no event loop
+            fundo_id = fundo_persistido.id_fundo_investimento
+            nome_fundo = fundo_persistido.nm_fundo_investimento
             
             # Processar o XML para extrair dados (ativos, posições, indexadores)
             try:
@@ -112,12 +88,11 @@ class FundoInvestimentoService:
                 arquivo_lista = [arquivo]
                 
                 # Processar o arquivo XML
-                logger.info(f"Chamando upload_files_service com fundo_id: {fundo_persistido.id_fundo_investimento}")
-                bundles = await upload_files_service(arquivo_lista, db, loader, parser, fundo_persistido.id_fundo_investimento)
+                logger.info(f"Chamando upload_files_service com fundo_id: {fundo_id}")
+                bundles = await upload_files_service(arquivo_lista, db, loader, parser, fundo_id)
                 
                 # Marcar arquivo como processado
-                arquivo_persistido.fl_processado = True
-                db.commit()
+                await run_in_threadpool(self._marcar_processamento, db, arquivo_persistido, fundo_id)
                 
                 logger.info(f"Arquivo XML processado com sucesso: {len(bundles)} bundles extraídos")
                 
@@ -127,16 +102,14 @@ class FundoInvestimentoService:
                 import traceback
                 logger.error(f"Stack trace: {traceback.format_exc()}")
                 # Não falha o upload, apenas registra o erro
-                arquivo_persistido.fl_processado = False
-                arquivo_persistido.ds_erro_processamento = str(e)
-                db.commit()
+                await run_in_threadpool(self._marcar_processamento, db, arquivo_persistido, fundo_id, str(e))
             
-            logger.info(f"Fundo criado com sucesso: {nome_fundo} (ID: {fundo_persistido.id_fundo_investimento})")
+            logger.info(f"Fundo criado com sucesso: {nome_fundo} (ID: {fundo_id})")
             
             return UploadFundoResponse(
                 sucesso=True,
                 mensagem="Arquivo processado com sucesso",
-                fundo_id=fundo_persistido.id_fundo_investimento,
+                fundo_id=fundo_id,
                 arquivo_duplicado=False
             )
             
@@ -148,6 +121,106 @@ class FundoInvestimentoService:
                 arquivo_duplicado=False
             )
     
+    def _registrar_arquivo(
+        self,
+        db: Session,
+        nm_arquivo: str,
+        conteudo_arquivo: str,
+        background: bool
+    ) -> Tuple[Optional[UploadFundoResponse], Optional[FundoInvestimento], Optional[ArquivoOriginal]]:
+        """
+        Parte síncrona do upload: verifica duplicidade, cria o fundo e armazena o arquivo
+        
+        Args:
+            db: Sessão do banco de dados
+            nm_arquivo: Nome do arquivo enviado
+            conteudo_arquivo: Conteúdo do arquivo como string
+            background: Se True, enfileira um job de ingestão para o arquivo
+            
+        Returns:
+            (resposta, fundo, arquivo); com resposta (duplicado ou enfileirado) o upload termina aqui
+        """
+        # Calcular hash do arquivo
+        hash_arquivo = ArquivoOriginal.calcular_hash(conteudo_arquivo)
+        
+        # Verificar se arquivo já existe
+        arquivo_existente = get_arquivo_by_hash(db, hash_arquivo)
+        if arquivo_existente:
+            logger.warning(f"Arquivo duplicado detectado: {nm_arquivo}")
+            
+            # Buscar fundo associado (com estatísticas)
+            fundo_existente = get_fundos_com_estatisticas(db, fundo_id=arquivo_existente.id_fundo_investimento)
+            
+            return UploadFundoResponse(
+                sucesso=False,
+                mensagem="Este arquivo já foi analisado pela plataforma",
+                arquivo_duplicado=True,
+                fundo_existente=self._formatar_fundo_response(fundo_existente[0]) if fundo_existente else None
+            ), None, None
+        
+        # Criar novo fundo
+        proximo_numero = count_fundos(db) + 1
+        nome_fundo = f"fundo_de_investimento_{proximo_numero}"
+        
+        fundo = FundoInvestimento(
+            nm_fundo_investimento=nome_fundo,
+            ds_fundo_investimento=f"Fundo de investimento criado a partir do arquivo {nm_arquivo}",
+            id_orgao_financeiro=None
+        )
+        
+        # Persistir fundo (flush: o id é usado pelo arquivo; commit único mais abaixo)
+        fundo_persistido = insert_fundo_investimento(db, fundo)
+        
+        # Criar registro do arquivo original
+        arquivo_original = ArquivoOriginal(
+            id_fundo_investimento=fundo_persistido.id_fundo_investimento,
+            nm_arquivo=nm_arquivo,
+            nm_arquivo_original=nm_arquivo,
+            hash_arquivo=hash_arquivo,
+            tamanho_arquivo=len(conteudo_arquivo),
+            fl_processado=False
+        )
+        armazenar_conteudo_arquivo(arquivo_original, conteudo_arquivo, get_blob_store())
+        
+        # Persistir arquivo; a versão do fundo muda na mesma transação (ETag de /fundo)
+        arquivo_persistido = insert_arquivo_original(db, arquivo_original)
+        incrementar_versao_dados(db, escopos_do_fundo(fundo_persistido.id_fundo_investimento))
+        db.commit()
+        
+        # Em segundo plano: o worker processa o arquivo já armazenado
+        if background:
+            job = enfileirar_arquivo_fundo(db, fundo_persistido.id_fundo_investimento, arquivo_persistido.id_arquivo_original)
+            logger.info(f"Fundo criado: {nome_fundo}; processamento enfileirado no job {job.id_job}")
+            
+            return UploadFundoResponse(
+                sucesso=True,
+                mensagem="Arquivo recebido; processamento em segundo plano",
+                fundo_id=fundo_persistido.id_fundo_investimento,
+                arquivo_duplicado=False,
+                id_job=job.id_job
+            ), fundo_persistido, arquivo_persistido
+        
+        # O commit do arquivo expirou o fundo: recarrega aqui, ainda no threadpool
+        db.refresh(fundo_persistido)
+        return None, fundo_persistido, arquivo_persistido
+    
+    def _marcar_processamento(
+        self,
+        db: Session,
+        arquivo: ArquivoOriginal,
+        fundo_id: int,
+        erro: Optional[str] = None
+    ) -> None:
+        """
+        Registra o resultado do processamento no arquivo e incrementa a versão do fundo
+        na mesma transação (senão o ETag de /fundo continuaria respondendo 304)
+        """
+        arquivo.fl_processado         = erro is None
+        arquivo.fl_erro_processamento = erro is not None
+        arquivo.ds_erro_processamento = erro
+        incrementar_versao_dados(db, escopos_do_fundo(fundo_id))
+        db.commit()
+    
     def get_fundo_detalhes(
         self,
         db: Session,
@@ -200,6 +273,37 @@ class FundoInvestimentoService:
             logger.error(f"Erro ao buscar detalhes do fundo {fundo_id}: {e}")
             return None
     
+    def abrir_conteudo_arquivo(
+        self,
+        db: Session,
+        fundo_id: int,
+        arquivo_id: int
+    ) -> Optional[Tuple[ArquivoOriginal, Iterator[bytes]]]:
+        """
+        Busca um arquivo do fundo e devolve um iterador (lazy) com o XML original
+        
+        O conteúdo só é lido quando o iterador é consumido, com uma sessão própria
+        (a da requisição já foi fechada quando a resposta em streaming é enviada).
+        
+        Args:
+            db: Sessão do banco de dados
+            fundo_id: ID do fundo
+            arquivo_id: ID do arquivo
+            
+        Returns:
+            (arquivo, iterador de bytes) ou None se o arquivo não for do fundo
+        """
+        arquivo = get_arquivo_original(db, arquivo_id)
+        if not arquivo or arquivo.id_fundo_investimento != fundo_id:
+            return None
+        
+        def conteudo() -> Iterator[bytes]:
+            from app.config.db import SessionLocal
+            with SessionLocal() as db_stream:
+                yield from iter_conteudo_arquivo(db_stream, arquivo, get_blob_store())
+        
+        return arquivo, conteudo()
+    
     def get_lista_fundos(
         self,
         db: Session,
@@ -218,7 +322,7 @@ class FundoInvestimentoService:
             Lista de fundos
         """
         try:
-            fundos = get_all_fundos(db, limit, offset)
+            fundos = get_fundos_com_estatisticas(db, limit, offset)
             total = count_fundos(db)
             
             fundos_response = [
@@ -234,33 +338,22 @@ class FundoInvestimentoService:
             logger.error(f"Erro ao buscar lista de fundos: {e}")
             return FundoListResponse(fundos=[], total=0)
     
-    def _formatar_fundo_response(self, fundo: FundoInvestimento) -> FundoInvestimentoResponse:
+    def _formatar_fundo_response(self, fundo: Row) -> FundoInvestimentoResponse:
         """
         Formata um fundo para resposta da API
         
         Args:
-            fundo: Instância do FundoInvestimento
+            fundo: Linha de get_fundos_com_estatisticas (colunas do fundo + total_ativos e valor_total)
             
         Returns:
             FundoInvestimentoResponse formatado
         """
-        # Calcular estatísticas básicas
-        total_ativos = len(fundo.ativos) if fundo.ativos else 0
-        
-        # Calcular valor total (soma das posições)
-        valor_total = 0.0
-        if fundo.ativos:
-            for ativo in fundo.ativos:
-                if ativo.posicoes:
-                    for posicao in ativo.posicoes:
-                        valor_total += float(posicao.vl_principal)
-        
         return FundoInvestimentoResponse(
             id_fundo_investimento=fundo.id_fundo_investimento,
             nm_fundo_investimento=fundo.nm_fundo_investimento,
             ds_fundo_investimento=fundo.ds_fundo_investimento,
-            total_ativos=total_ativos,
-            valor_total=valor_total,
+            total_ativos=fundo.total_ativos,
+            valor_total=float(fundo.valor_total),
             data_criacao=fundo.created_at,
             ultima_atualizacao=fundo.updated_at or fundo.created_at
         )
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app.persiste.queries.history import get_file_history, get_file_details, get_file_analytics
+from app.persiste.queries.paginacao import decodificar_cursor
 from app.schemas.history import FileHistoryResponse, FileDetailsResponse, FileAnalyticsResponse
 from typing import Optional
 import logging
@@ -23,11 +24,14 @@ def get_file_history_service(
 
 def get_file_details_service(
     db: Session, 
-    lote_id: int
+    lote_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> Optional[FileDetailsResponse]:
-    """Service para buscar detalhes de um arquivo"""
+    """Service para buscar detalhes de um arquivo (cursor malformado levanta ValueError)"""
+    chave = decodificar_cursor(cursor) if cursor else None
     try:
-        data = get_file_details(db, lote_id)
+        data = get_file_details(db, lote_id, limit, chave)
         if not data:
             return None
         return FileDetailsResponse(**data)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Iterable, Iterator, List, Optional
+from datetime import timedelta
+from io import BytesIO
+import gzip
+import logging
+import traceback
+
+from app.DTOs import ParsedBundleDTO
+from app.config import get_settings
+from app.models import IngestaoJob, IngestaoJobArquivo
+from app.models.ingestao_job import JOB_PENDENTE, JOB_CONCLUIDO, JOB_ERRO
+from app.utils import FileLoader, Parser, compactar, stream_de_blocos
+from app.provider import get_blob_store
+from app.persiste.util import (
+    insert_ingestao_job,
+    atualizar_job,
+    get_ingestao_job,
+    get_conteudo_job_arquivo,
+    encerrar_jobs_abandonados,
+    remover_arquivos_job,
+)
+from app.persiste.util.fundo_investimento import get_arquivo_original, iter_conteudo_arquivo
+from app.schemas.job import JobEnfileiradoResponse, JobStatusResponse
+from app.services.file import iter_bundles, persistir_bundles
+from app.services.fila_enriquecimento import enfileirar_enriquecimento
+from app.models.fila_enriquecimento import PRIORIDADE_UPLOAD, ORIGEM_UPLOAD
+from app.models.versao_dados import escopos_do_fundo
+from app.persiste.util.versao_dados import incrementar_versao_dados
+
+logger = logging.getLogger(__name__)
+
+
+async def enfileirar_upload_arquivos(
+    db        : Session,
+    ls_files  : List[UploadFile],
+    loader    : FileLoader,
+    fundo_id  : int = None,
+    enriquecer: bool = False,
+) -> IngestaoJob:
+    """
+    Guarda os arquivos enviados (gzip) e cria um job pendente para processá-los.
+
+    A requisição termina aqui: o parsing, a persistência e o enriquecimento
+    ficam para o worker (`worker.py`).
+    """
+    arquivos = [
+        IngestaoJobArquivo(
+            nm_arquivo          = file.filename,
+            conteudo_compactado = await run_in_threadpool(compactar, await loader.load_bytes(file)),
+        )
+        for file in ls_files
+    ]
+    job = IngestaoJob(
+        ds_status     = JOB_PENDENTE,
+        id_fundo      = fundo_id,
+        fl_enriquecer = enriquecer,
+        qtd_arquivos  = len(arquivos),
+        arquivos      = arquivos,
+    )
+    return await run_in_threadpool(insert_ingestao_job, db, job, commit=True)
+
+
+def enfileirar_arquivo_fundo(
+    db                 : Session,
+    fundo_id           : int,
+    id_arquivo_original: int,
+) -> IngestaoJob:
+    """Cria um job pendente para processar um ArquivoOriginal já armazenado de um fundo."""
+    job = IngestaoJob(
+        ds_status           = JOB_PENDENTE,
+        id_fundo            = fundo_id,
+        id_arquivo_original = id_arquivo_original,
+        qtd_arquivos        = 1,
+    )
+    return insert_ingestao_job(db, job, commit=True)
+
+
+def _iter_bundles_job(db: Session, job: IngestaoJob) -> Iterator[ParsedBundleDTO]:
+    """Lê em streaming os arquivos do job (ArquivoOriginal e/ou arquivos enviados)."""
+    parser = Parser()
+
+    if job.id_arquivo_original:
+        arquivo = get_arquivo_original(db, job.id_arquivo_original)
+        stream = stream_de_blocos(iter_conteudo_arquivo(db, arquivo, get_blob_store()))
+        yield from iter_bundles(stream, parser)
+
+    for arquivo in job.arquivos:
+        stream = gzip.GzipFile(fileobj=BytesIO(get_conteudo_job_arquivo(db, arquivo.id_job_arquivo)))
+        yield from iter_bundles(stream, parser)
+
+
+def _enriquecer(db: Session, bundles: Iterable[ParsedBundleDTO]) -> int:
+    """Enfileira o enriquecimento (ANBIMA) dos ativos persistidos, à frente das atualizações; retorna a quantidade."""
+    ativo_ids = [bundle.ativo.id_ativo for bundle in bundles if getattr(bundle.ativo, "id_ativo", None)]
+    return enfileirar_enriquecimento(db, ativo_ids, PRIORIDADE_UPLOAD, ORIGEM_UPLOAD)
+
+
+def _marcar_arquivo_original(
+    db                 : Session,
+    id_arquivo_original: Optional[int],
+    id_fundo           : Optional[int],
+    erro               : Optional[str] = None,
+) -> None:
+    """
+    Reflete o resultado do job no ArquivoOriginal do fundo (se houver), sem commit.
+
+    A versão do fundo é incrementada na mesma transação: o status do arquivo
+    aparece em /fundo e o ETag precisa mudar (inclusive quando o job falha).
+    """
+    if not id_arquivo_original:
+        return
+    arquivo = get_arquivo_original(db, id_arquivo_original)
+    arquivo.fl_processado         = erro is None
+    arquivo.fl_erro_processamento = erro is not None
+    arquivo.ds_erro_processamento = erro
+    incrementar_versao_dados(db, escopos_do_fundo(id_fundo or arquivo.id_fundo_investimento))
+
+
+def encerrar_jobs_abandonados_service(db: Session) -> int:
+    """
+    Leva para "erro" os jobs abandonados (sem heartbeat) sem tentativas restantes;
+    o ArquivoOriginal do fundo (se houver) é marcado com o mesmo erro. Retorna a quantidade.
+    """
+    settings = get_settings()
+    encerrados = encerrar_jobs_abandonados(
+        db,
+        timeout        = timedelta(seconds=settings.JOB_TIMEOUT_SEGUNDOS),
+        max_tentativas = settings.JOB_MAX_TENTATIVAS,
+    )
+    db.commit()
+
+    for id_job, id_fundo, id_arquivo_original in encerrados:
+        logger.error(f"Job {id_job} encerrado com erro: tentativas esgotadas sem heartbeat")
+        _marcar_arquivo_original(db, id_arquivo_original, id_fundo, "Processamento interrompido; tentativas esgotadas")
+        db.commit()
+    return len(encerrados)
+
+
+def processar_job(id_job: int) -> None:
+    """
+    Processa um job já reservado (ver `claim_proximo_job`): parse + persistência
+    (+ enfileiramento do enriquecimento, se pedido).
+
+    - Usa duas sessões: uma para a ingestão e outra só para o progresso, que precisa
+      ficar visível em `/jobs/{id}` durante o processamento (e também serve de heartbeat).
+    - Dados, ArquivoOriginal e status "concluido" vão num único commit: um worker que
+      morre depois dele não deixa o job para ser retomado (e duplicado no modo append).
+    - Job de um ArquivoOriginal já processado é só concluído, sem ler o arquivo de novo.
+    - Ao concluir, remove o conteúdo dos arquivos do job; em caso de erro ele fica
+      para diagnóstico. Falha ao enfileirar o enriquecimento não desfaz a conclusão.
+    """
+    from app.config.db import SessionLocal
+
+    chunk_size = get_settings().INGESTION_CHUNK_SIZE
+
+    with SessionLocal() as db, SessionLocal() as db_progresso:
+        job = get_ingestao_job(db, id_job)
+        lidas = 0
+
+        if job.id_arquivo_original and get_arquivo_original(db, job.id_arquivo_original).fl_processado:
+            logger.warning(f"Job {id_job}: arquivo original {job.id_arquivo_original} já processado; concluindo sem reprocessar")
+            atualizar_job(db, id_job, ds_status=JOB_CONCLUIDO, dt_fim=func.now())
+            return
+
+        def contar_lidas(bundles: Iterable[ParsedBundleDTO]) -> Iterator[ParsedBundleDTO]:
+            nonlocal lidas
+            for bundle in bundles:
+                lidas += 1
+                if lidas % chunk_size == 0:
+                    atualizar_job(db_progresso, id_job, qtd_linhas_lidas=lidas)
+                yield bundle
+
+        def ao_persistir_chunk(persistidas: int) -> None:
+            atualizar_job(db_progresso, id_job, qtd_linhas_lidas=lidas, qtd_linhas_persistidas=persistidas)
+
+        try:
+            persistidos = persistir_bundles(db, contar_lidas(_iter_bundles_job(db, job)), job.id_fundo, ao_persistir_chunk)
+            _marcar_arquivo_original(db, job.id_arquivo_original, job.id_fundo)
+            # Conteúdo já persistido: o gzip dos arquivos enviados não fica guardado
+            remover_arquivos_job(db, id_job)
+            atualizar_job(
+                db, id_job,
+                commit                 = False,
+                ds_status              = JOB_CONCLUIDO,
+                qtd_linhas_lidas       = lidas,
+                qtd_linhas_persistidas = len(persistidos),
+                dt_fim                 = func.now(),
+            )
+            db.commit()
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao processar job {id_job}: {e}")
+            logger.error(f"Stack trace: {traceback.format_exc()}")
+            _marcar_arquivo_original(db, job.id_arquivo_original, job.id_fundo, str(e))
+            db.commit()
+            atualizar_job(
+                db_progresso, id_job,
+                ds_status        = JOB_ERRO,
+                qtd_linhas_lidas = lidas,
+                qtd_erros        = IngestaoJob.qtd_erros + 1,
+                ds_erro          = str(e),
+                dt_fim           = func.now(),
+            )
+            return
+
+        logger.info(f"Job {id_job} concluído: {len(persistidos)} linhas persistidas")
+        if not job.fl_enriquecer:
+            return
+        try:
+            logger.info(f"Job {id_job}: {_enriquecer(db, persistidos)} ativos enfileirados para enriquecimento")
+        except Exception as e:
+            # Os dados já estão gravados: o job continua concluído, só o enriquecimento fica de fora
+            db.rollback()
+            logger.error(f"Job {id_job}: erro ao enfileirar o enriquecimento: {e}")
+            atualizar_job(db_progresso, id_job, ds_erro=f"Dados persistidos; enriquecimento não enfileirado: {e}")
+
+
+def job_enfileirado_response(job: IngestaoJob) -> JobEnfileiradoResponse:
+    return JobEnfileiradoResponse(
+        id_job     = job.id_job,
+        status     = job.ds_status,
+        mensagem   = "Arquivos recebidos; processamento em segundo plano",
+        url_status = f"/jobs/{job.id_job}",
+    )
+
+
+def get_job_status_service(db: Session, id_job: int) -> Optional[JobStatusResponse]:
+    """Status e progresso de um job (None se não existir)."""
+    job = get_ingestao_job(db, id_job)
+    if not job:
+        return None
+
+    return JobStatusResponse(
+        id_job                 = job.id_job,
+        status                 = job.ds_status,
+        id_fundo               = job.id_fundo,
+        qtd_arquivos           = job.qtd_arquivos,
+        qtd_linhas_lidas       = job.qtd_linhas_lidas,
+        qtd_linhas_persistidas = job.qtd_linhas_persistidas,
+        qtd_erros              = job.qtd_erros,
+        ds_erro                = job.ds_erro,
+        nr_tentativas          = job.nr_tentativas,
+        data_criacao           = job.created_at,
+        data_inicio            = job.dt_inicio,
+        data_fim               = job.dt_fim,
+    )
@@ -0,0 +1,150 @@
+from contextlib import contextmanager, ExitStack
+from typing import Iterator
+import json
+import unittest
+
+from pydantic import ValidationError
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+# Tabelas que crescem com os uploads: nelas um Seq Scan em consulta filtrada é regressão
+TABELAS_GRANDES = {"tb_ativo", "tb_posicao", "tb_lote", "tb_ativo_enriquecido"}
+
+
+@contextmanager
+def sessao_descartavel() -> Iterator[Session]:
+    """
+    Sessão dentro de uma transação externa que sofre rollback no final,
+    então nada da massa fica no banco (os commits internos viram savepoints).
+    """
+    # Importado aqui: app.config lê as settings (POSTGRES_*) já no import
+    from app.config.db import engine
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            yield db
+        finally:
+            db.close()
+            trans.rollback()
+
+
+def sessao_ou_pular(recursos: ExitStack) -> Session:
+    """
+    `sessao_descartavel` aberta em `recursos`, para testes que precisam do Postgres.
+
+    Sem as settings do banco (POSTGRES_*) ou sem conexão, pula o teste (unittest.SkipTest).
+    """
+    try:
+        db = recursos.enter_context(sessao_descartavel())
+        db.execute(text("SELECT 1"))
+    except ValidationError as e:
+        recursos.close()
+        raise unittest.SkipTest(f"Postgres não configurado: {e.error_count()} settings inválidas")
+    except OperationalError as e:
+        recursos.close()
+        raise unittest.SkipTest(f"Postgres indisponível: {e.orig}")
+    return db
+
+
+def popular_massa(db: Session, qtd: int, qtd_fundos: int = 200):
+    """Insere `qtd` Lote/Ativo/Posicao espalhados por `qtd_fundos` fundos, datas e indexadores"""
+    db.execute(text("""
+        INSERT INTO tb_fundo_investimento (nm_fundo_investimento, ds_fundo_investimento)
+        SELECT 'Fundo benchmark ' || g, 'benchmark' FROM generate_series(1, :qtd_fundos) g
+    """), {"qtd_fundos": qtd_fundos})
+    db.execute(text("""
+        INSERT INTO tb_indexador (cd_indexador, sgl_indexador)
+        VALUES ('CDI', ''), ('IPCA', ''), ('IGPM', ''), ('PRE', '')
+        ON CONFLICT (cd_indexador) DO NOTHING
+    """))
+    db.execute(text("""
+        WITH idx AS (SELECT array_agg(id_indexador) AS ids FROM tb_indexador),
+             f   AS (SELECT array_agg(id_fundo_investimento) AS ids FROM tb_fundo_investimento
+                      WHERE ds_fundo_investimento = 'benchmark'),
+             l   AS (
+                INSERT INTO tb_lote (vl_pu_compra, qtd_comprada, dt_operacao, created_at)
+                SELECT 1000, 10, date '2024-01-01' + (g % 365), now() - g * interval '1 second'
+                  FROM generate_series(1, :qtd) g
+                RETURNING id_lote
+             ),
+             a   AS (
+                INSERT INTO tb_ativo (id_fundo, id_lote, id_indexador, cd_ativo, cd_isin,
+                                      perc_indexador, perc_cupom, vl_pu_emissao, dt_emissao, dt_vencimento)
+                SELECT f.ids[1 + l.id_lote % cardinality(f.ids)], l.id_lote,
+                       idx.ids[1 + l.id_lote % cardinality(idx.ids)],
+                       'CRA' || l.id_lote, 'BRBENCH' || l.id_lote,
+                       100, 5.5, 1000, date '2024-01-01', date '2030-01-01'
+                  FROM l, f, idx
+                RETURNING id_ativo
+             )
+        INSERT INTO tb_posicao (id_ativo, vl_pu_posicao, vl_principal, vl_financeiro_disponivel, dt_posicao)
+        SELECT id_ativo, 1010, 1000 + id_ativo % 100000, 1010, date '2025-01-01' + id_ativo % 365 FROM a
+    """), {"qtd": qtd})
+    db.execute(text("ANALYZE tb_fundo_investimento, tb_indexador, tb_lote, tb_ativo, tb_posicao"))
+
+
+def seq_scans(plano: dict) -> list:
+    """Relações grandes lidas por Seq Scan em um plano do EXPLAIN (FORMAT JSON)"""
+    encontrados = []
+    if plano.get("Node Type") == "Seq Scan" and plano.get("Relation Name") in TABELAS_GRANDES:
+        encontrados.append(plano["Relation Name"])
+    for filho in plano.get("Plans", []):
+        encontrados.extend(seq_scans(filho))
+    return encontrados
+
+
+def capturar_sql(db: Session, funcao, *args, **kwargs) -> list:
+    """Executa `funcao` e devolve os SELECTs (statement, parâmetros) que ela enviou ao banco"""
+    capturados = []
+
+    def ouvir(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            capturados.append((statement, parameters))
+
+    conn = db.connection()
+    event.listen(conn, "before_cursor_execute", ouvir)
+    try:
+        funcao(db, *args, **kwargs)
+    finally:
+        event.remove(conn, "before_cursor_execute", ouvir)
+    return capturados
+
+
+def consultas_filtradas(db: Session) -> dict:
+    """
+    Consultas filtradas de analytics/histórico/fundos sobre a massa de `popular_massa`
+    (nome -> (função, kwargs)).
+
+    Consultas sem filtro (ex: overview geral, total do histórico) leem a tabela inteira
+    por definição e ficam de fora.
+    """
+    from app.persiste.queries import get_overview_data, get_ativos_data, get_file_details, get_file_analytics
+    from app.persiste.queries.fundo_analytics import get_fundo_analytics_data, get_fundo_ativos_data
+
+    fundo_id = db.scalar(text("SELECT min(id_fundo_investimento) FROM tb_fundo_investimento WHERE ds_fundo_investimento = 'benchmark'"))
+    lote_id = db.scalar(text("SELECT max(id_lote) FROM tb_lote"))
+
+    return {
+        "overview (período de 1 dia)": (get_overview_data, {"date_from": "2025-03-01", "date_to": "2025-03-01"}),
+        "ativos (período de 1 dia)": (get_ativos_data, {"date_from": "2025-03-01", "date_to": "2025-03-01"}),
+        "ativos (busca por código)": (get_ativos_data, {"codigo_ativo": "RA1234"}),
+        "detalhes do arquivo": (get_file_details, {"lote_id": lote_id}),
+        "analytics do arquivo": (get_file_analytics, {"lote_id": lote_id}),
+        "analytics do fundo": (get_fundo_analytics_data, {"fundo_id": fundo_id}),
+        "ativos do fundo": (get_fundo_ativos_data, {"fundo_id": fundo_id}),
+    }
+
+
+def planos_com_seq_scan(db: Session, funcao, **kwargs) -> list:
+    """(statement, tabelas) de cada SELECT de `funcao` cujo plano faz Seq Scan em tabela grande"""
+    encontrados = []
+    for statement, parameters in capturar_sql(db, funcao, **kwargs):
+        plano = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        plano = json.loads(plano) if isinstance(plano, str) else plano
+        tabelas = seq_scans(plano[0]["Plan"])
+        if tabelas:
+            encontrados.append((statement, sorted(set(tabelas))))
+    return encontrados
@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterator
+import socket
+import threading
+import time
+
+from app.utils import AsyncFetcher
+
+FIXTURES = Path(__file__).parent / "fixtures" / "anbima"
+
+
+def pagina(nome: str) -> bytes:
+    """Página de características salva em fixtures/anbima"""
+    return (FIXTURES / nome).read_bytes()
+
+
+class ServidorStub:
+    """Estado observado pelo stub: requisições por ativo e pico de requisições simultâneas"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.tentativas: dict[str, int] = {}
+        self.pico = 0
+        self._em_andamento = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return sum(self.tentativas.values())
+
+    def _iniciar(self, cod_ativo: str) -> int:
+        with self._lock:
+            self.tentativas[cod_ativo] = self.tentativas.get(cod_ativo, 0) + 1
+            self._em_andamento += 1
+            self.pico = max(self.pico, self._em_andamento)
+            return self.tentativas[cod_ativo]
+
+    def _terminar(self) -> None:
+        with self._lock:
+            self._em_andamento -= 1
+
+
+@contextmanager
+def servidor_stub_anbima(responder: Callable[[str, int], tuple], latencia: float = 0.0) -> Iterator[ServidorStub]:
+    """
+    Servidor HTTP local no lugar da ANBIMA (mesmas URLs de características).
+
+    `responder(cod_ativo, tentativa)` devolve (status, corpo) ou (status, corpo, cabeçalhos)
+    para cada requisição (`tentativa` começa em 1); `latencia` segura cada resposta por alguns segundos.
+    """
+    estado = None
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            cod_ativo = self.path.strip("/").split("/")[1]
+            tentativa = estado._iniciar(cod_ativo)
+            try:
+                time.sleep(latencia)
+                status, corpo, *cabecalhos = responder(cod_ativo, tentativa)
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                for nome, valor in (cabecalhos[0] if cabecalhos else {}).items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                self.wfile.write(corpo)
+            finally:
+                estado._terminar()
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    estado = ServidorStub(f"http://127.0.0.1:{servidor.server_port}/certificado-de-recebiveis/{{cod_ativo}}/caracteristicas")
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield estado
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def porta_fechada() -> str:
+    """URL em uma porta local sem ninguém escutando (conexão recusada)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        porta = sock.getsockname()[1]
+    return f"http://127.0.0.1:{porta}/certificado-de-recebiveis/{{cod_ativo}}/caracteristicas"
+
+
+def criar_fetcher(**kwargs) -> AsyncFetcher:
+    """Fetcher sem espera entre tentativas (backoff zero) para os testes contra o stub"""
+    opcoes = dict(max_concorrencia=4, timeout=5, max_tentativas=3, backoff_base=0)
+    opcoes.update(kwargs)
+    return AsyncFetcher(**opcoes)
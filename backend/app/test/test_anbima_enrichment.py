@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+
+from app.services.anbima_enrichment import AnbimaEnrichmentService
+from app.utils import CircuitBreaker
+from app.test.stub_anbima import servidor_stub_anbima, pagina, porta_fechada, criar_fetcher
+
+
+def enriquecer(servico: AnbimaEnrichmentService, cod_ativos: list[str], **kwargs) -> dict:
+    return asyncio.run(servico.enrich_multiple_ativos_async(cod_ativos, criar_fetcher(**kwargs)))
+
+
+class FetcherQuebrado:
+    """Fetcher cujo get falha com um erro que não é de HTTP"""
+    async def get(self, url: str):
+        raise RuntimeError("falha inesperada")
+
+
+class TestEnriquecimentoContraStub(unittest.TestCase):
+    def test_enriquece_todos_os_ativos_concorrentemente(self):
+        cod_ativos = [f"CRA{i:08d}" for i in range(20)]
+        # Primeira tentativa de um a cada cinco ativos devolve 503
+        def responder(cod_ativo, tentativa):
+            if tentativa == 1 and int(cod_ativo[3:]) % 5 == 0:
+                return 503, b""
+            return 200, pagina("caracteristicas_tabela.html")
+
+        with servidor_stub_anbima(responder, latencia=0.02) as stub:
+            resultados = enriquecer(AnbimaEnrichmentService(base_url=stub.url), cod_ativos + cod_ativos[:3], max_concorrencia=4)
+
+        self.assertEqual(list(resultados), cod_ativos)
+        for cod_ativo, dados in resultados.items():
+            self.assertEqual(dados["devedor"], "Agro Exemplo S.A.", cod_ativo)
+            self.assertFalse(dados["resgate_antecipado"])
+            self.assertIn("dt_ultimo_enriquecimento", dados)
+        # Códigos repetidos são buscados uma vez; só os 503 geram nova tentativa
+        self.assertEqual(stub.total, len(cod_ativos) + 4)
+        self.assertGreater(stub.pico, 1)
+        self.assertLessEqual(stub.pico, 4)
+
+    def test_pagina_sem_dados(self):
+        with servidor_stub_anbima(lambda cod, tentativa: (200, pagina("sem_dados.html"))) as stub:
+            resultados = enriquecer(AnbimaEnrichmentService(base_url=stub.url), ["CRA1"])
+
+        self.assertIsNone(resultados["CRA1"])
+
+    def test_fora_do_ar_sem_circuito_gasta_todas_as_tentativas(self):
+        cod_ativos = [f"CRA{i}" for i in range(5)]
+        with servidor_stub_anbima(lambda cod, tentativa: (503, b"")) as stub:
+            resultados = enriquecer(AnbimaEnrichmentService(base_url=stub.url), cod_ativos, max_tentativas=3)
+
+        self.assertEqual(stub.total, len(cod_ativos) * 3)
+        self.assertTrue(all(dados["erro"] and dados["transitorio"] for dados in resultados.values()))
+
+    def test_fora_do_ar_com_circuito_falha_na_hora(self):
+        cod_ativos = [f"CRA{i}" for i in range(20)]
+        circuito = CircuitBreaker(limite_falhas=3, tempo_aberto=60)
+        with servidor_stub_anbima(lambda cod, tentativa: (503, b"")) as stub:
+            resultados = enriquecer(
+                AnbimaEnrichmentService(base_url=stub.url), cod_ativos,
+                max_concorrencia=1, max_tentativas=3, circuit_breaker=circuito,
+            )
+
+        self.assertEqual(stub.total, 3)
+        self.assertTrue(all(dados["erro"] and dados["transitorio"] for dados in resultados.values()))
+        indisponiveis = [dados for dados in resultados.values() if dados["mensagem"].startswith("ANBIMA indisponível")]
+        self.assertGreaterEqual(len(indisponiveis), len(cod_ativos) - 3)
+
+
+class TestClassificacaoDeErros(unittest.TestCase):
+    """_buscar_ativo: 'transitorio' indica se vale tentar o ativo de novo mais tarde"""
+
+    def buscar_com_status(self, status: int) -> dict:
+        with servidor_stub_anbima(lambda cod, tentativa: (status, b"")) as stub:
+            return enriquecer(AnbimaEnrichmentService(base_url=stub.url), ["CRA1"], max_tentativas=1)["CRA1"]
+
+    def test_status_retentaveis_sao_transitorios(self):
+        for status in (429, 500, 502, 503, 504):
+            with self.subTest(status=status):
+                dados = self.buscar_com_status(status)
+                self.assertTrue(dados["erro"])
+                self.assertTrue(dados["transitorio"])
+
+    def test_outros_status_sao_definitivos(self):
+        for status in (400, 403, 404):
+            with self.subTest(status=status):
+                dados = self.buscar_com_status(status)
+                self.assertTrue(dados["erro"])
+                self.assertFalse(dados["transitorio"])
+
+    def test_erro_de_rede_e_transitorio(self):
+        servico = AnbimaEnrichmentService(base_url=porta_fechada())
+        dados = enriquecer(servico, ["CRA1"], max_tentativas=2)["CRA1"]
+        self.assertTrue(dados["erro"])
+        self.assertTrue(dados["transitorio"])
+
+    def test_circuito_aberto_e_transitorio(self):
+        circuito = CircuitBreaker(limite_falhas=1, tempo_aberto=60)
+        circuito.registrar_falha()
+        with servidor_stub_anbima(lambda cod, tentativa: (200, pagina("caracteristicas_tabela.html"))) as stub:
+            dados = enriquecer(AnbimaEnrichmentService(base_url=stub.url), ["CRA1"], circuit_breaker=circuito)["CRA1"]
+
+        self.assertEqual(stub.total, 0)
+        self.assertTrue(dados["transitorio"])
+        self.assertTrue(dados["mensagem"].startswith("ANBIMA indisponível"))
+
+    def test_erro_inesperado_nao_e_transitorio(self):
+        dados = asyncio.run(AnbimaEnrichmentService()._buscar_ativo(FetcherQuebrado(), "CRA1"))
+        self.assertTrue(dados["erro"])
+        self.assertNotIn("transitorio", dados)
+
+
+if __name__ == "__main__":
+    unittest.main()
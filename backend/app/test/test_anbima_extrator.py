@@ -0,0 +1,112 @@
+import unittest
+
+from app.utils.anbima_extrator import (
+    EXTRATORES,
+    CAMPOS,
+    ExtratorHtmlParser,
+    campo_do_rotulo,
+    criar_extrator,
+    extrair_campos,
+    normalizar_rotulo,
+    parse_boolean,
+)
+from app.test.stub_anbima import pagina
+
+ESPERADO_TABELA = {
+    "serie"             : "1ª",
+    "emissao"           : "12ª",
+    "devedor"           : "Agro Exemplo S.A.",
+    "securitizadora"    : "Securitizadora Exemplo S.A.",
+    "resgate_antecipado": False,
+    "agente_fiduciario" : "Fiduciária Exemplo DTVM",
+}
+
+# Divs depois da tabela: o devedor da div sobrescreve o da tabela; a div "rodape" fica de fora
+ESPERADO_DIVS = {
+    "serie"             : "240",
+    "emissao"           : "3ª",
+    "devedor"           : "Cooperativa Exemplo",
+    "securitizadora"    : "Outra Securitizadora S.A.",
+    "resgate_antecipado": True,
+    "agente_fiduciario" : "Agente Exemplo S.A.",
+}
+
+
+def extratores_disponiveis() -> dict:
+    """Backends instalados (lxml é opcional)"""
+    disponiveis = {}
+    for nome, classe in EXTRATORES.items():
+        try:
+            disponiveis[nome] = classe()
+        except RuntimeError:
+            pass
+    return disponiveis
+
+
+class TestExtratores(unittest.TestCase):
+    def setUp(self):
+        self.extratores = extratores_disponiveis()
+
+    def test_pagina_com_tabela(self):
+        for nome, extrator in self.extratores.items():
+            with self.subTest(extrator=nome):
+                self.assertEqual(extrair_campos(extrator, pagina("caracteristicas_tabela.html")), ESPERADO_TABELA)
+
+    def test_pagina_com_divs(self):
+        for nome, extrator in self.extratores.items():
+            with self.subTest(extrator=nome):
+                self.assertEqual(extrair_campos(extrator, pagina("caracteristicas_divs.html")), ESPERADO_DIVS)
+
+    def test_pagina_sem_dados(self):
+        for nome, extrator in self.extratores.items():
+            with self.subTest(extrator=nome):
+                self.assertEqual(extrair_campos(extrator, pagina("sem_dados.html")), dict.fromkeys(CAMPOS))
+
+    def test_conteudo_vazio(self):
+        for nome, extrator in self.extratores.items():
+            with self.subTest(extrator=nome):
+                self.assertEqual(extrair_campos(extrator, b""), dict.fromkeys(CAMPOS))
+
+    def test_html_parser_aceita_cp1252(self):
+        conteudo = pagina("caracteristicas_tabela.html").decode("utf-8").encode("cp1252")
+        self.assertEqual(extrair_campos(ExtratorHtmlParser(), conteudo), ESPERADO_TABELA)
+
+    def test_html_parser_tolera_tags_sem_fechamento(self):
+        conteudo = "<table><tr><th>Devedor<td>Sem Fechamento S.A.<tr><th>Série<td>2ª".encode("utf-8")
+        dados = extrair_campos(ExtratorHtmlParser(), conteudo)
+        self.assertEqual(dados["devedor"], "Sem Fechamento S.A.")
+        self.assertEqual(dados["serie"], "2ª")
+
+
+class TestCriarExtrator(unittest.TestCase):
+    def test_auto_usa_um_backend_instalado(self):
+        self.assertIn(criar_extrator("auto").nome, extratores_disponiveis())
+
+    def test_html_parser(self):
+        self.assertIsInstance(criar_extrator("html.parser"), ExtratorHtmlParser)
+
+    def test_nome_desconhecido(self):
+        with self.assertRaises(ValueError):
+            criar_extrator("bs4")
+
+
+class TestRotulos(unittest.TestCase):
+    def test_normalizar_rotulo(self):
+        self.assertEqual(normalizar_rotulo("  Agente Fiduciário: "), "agente fiduciario")
+
+    def test_campo_do_rotulo(self):
+        self.assertEqual(campo_do_rotulo("Série"), "serie")
+        self.assertEqual(campo_do_rotulo("Número da série"), "serie")
+        self.assertEqual(campo_do_rotulo("Possui resgate antecipado?"), "resgate_antecipado")
+        self.assertIsNone(campo_do_rotulo("Data de vencimento"))
+
+    def test_parse_boolean(self):
+        self.assertTrue(parse_boolean(" Sim "))
+        self.assertFalse(parse_boolean("Não"))
+        self.assertFalse(parse_boolean("nao"))
+        self.assertIsNone(parse_boolean("Talvez"))
+        self.assertIsNone(parse_boolean(""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+from contextlib import ExitStack
+from datetime import date, timedelta
+import unittest
+
+from app.test.massa_analytics import sessao_ou_pular, popular_massa
+from app.test.stub_anbima import servidor_stub_anbima, pagina
+
+DADOS_ANTERIORES = {
+    "serie"             : "5ª",
+    "emissao"           : "1ª",
+    "devedor"           : "Devedor Anterior S.A.",
+    "securitizadora"    : "Securitizadora Anterior S.A.",
+    "resgate_antecipado": True,
+    "agente_fiduciario" : "Agente Anterior DTVM",
+}
+
+
+class TestAtualizacaoEnriquecimento(unittest.TestCase):
+    """
+    Atualização pelo agendador (idade_maxima) de um ativo que já tinha dados da ANBIMA.
+
+    Precisa do Postgres do .env (INSERT ... ON CONFLICT); sem ele, o teste é pulado.
+    A ANBIMA é o stub local; tudo roda numa transação que sofre rollback no final.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._recursos = ExitStack()
+        cls.db = sessao_ou_pular(cls._recursos)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._recursos.close()
+
+    def ativo_enriquecido_antigo(self) -> tuple[int, str]:
+        """Ativo novo com dados enriquecidos de 60 dias atrás; retorna (id_ativo, cd_ativo)"""
+        from app.models import Ativo, AtivoEnriquecido
+
+        popular_massa(self.db, 1, qtd_fundos=1)
+        ativo = self.db.query(Ativo).order_by(Ativo.id_ativo.desc()).first()
+        self.db.add(AtivoEnriquecido(
+            id_ativo                 = ativo.id_ativo,
+            **DADOS_ANTERIORES,
+            fl_enriquecido           = True,
+            fl_erro_enriquecimento   = False,
+            dt_ultimo_enriquecimento = date.today() - timedelta(days=60),
+        ))
+        self.db.flush()
+        return ativo.id_ativo, ativo.cd_ativo
+
+    def atualizar(self, id_ativo: int, responder) -> tuple[dict, object]:
+        """Roda a atualização contra o stub; retorna (resultado do ativo, stub)"""
+        from app.services.anbima_enrichment import AnbimaEnrichmentService
+        from app.services.enrichment_service import EnrichmentService
+
+        servico = EnrichmentService()
+        with servidor_stub_anbima(responder) as stub:
+            servico.anbima_service = AnbimaEnrichmentService(base_url=stub.url)
+            resultado = servico.enrich_multiple_ativos(self.db, [id_ativo], idade_maxima=timedelta(days=30))
+        [por_ativo] = resultado["sucessos"] + resultado["erros"]
+        return por_ativo, stub
+
+    def linha(self, id_ativo: int):
+        from app.models import AtivoEnriquecido
+
+        self.db.expire_all()
+        return self.db.query(AtivoEnriquecido).filter(AtivoEnriquecido.id_ativo == id_ativo).one()
+
+    def test_erro_definitivo_mantem_os_dados(self):
+        id_ativo, cd_ativo = self.ativo_enriquecido_antigo()
+
+        resultado, stub = self.atualizar(id_ativo, lambda cod, tentativa: (404, b""))
+
+        self.assertEqual(stub.tentativas, {cd_ativo: 1})
+        self.assertTrue(resultado["sucesso"])
+        self.assertFalse(resultado["enriquecido"])
+
+        linha = self.linha(id_ativo)
+        self.assertEqual({campo: getattr(linha, campo) for campo in DADOS_ANTERIORES}, DADOS_ANTERIORES)
+        self.assertTrue(linha.fl_enriquecido)
+        self.assertFalse(linha.fl_erro_enriquecimento)
+        self.assertIn("404", linha.ds_erro_enriquecimento)
+        self.assertEqual(linha.dt_ultimo_enriquecimento, date.today())
+
+    def test_pagina_com_dados_sobrescreve(self):
+        id_ativo, _ = self.ativo_enriquecido_antigo()
+
+        resultado, _ = self.atualizar(id_ativo, lambda cod, tentativa: (200, pagina("caracteristicas_tabela.html")))
+
+        self.assertTrue(resultado["enriquecido"])
+        linha = self.linha(id_ativo)
+        self.assertEqual(linha.devedor, "Agro Exemplo S.A.")
+        self.assertFalse(linha.resgate_antecipado)
+        self.assertIsNone(linha.ds_erro_enriquecimento)
+        self.assertEqual(linha.dt_ultimo_enriquecimento, date.today())
+
+
+if __name__ == "__main__":
+    unittest.main()
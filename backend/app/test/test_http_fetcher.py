@@ -0,0 +1,238 @@
+from unittest import mock
+import asyncio
+import unittest
+
+import httpx
+
+from app.utils import AsyncFetcher, TokenBucket, CircuitBreaker, CircuitoAberto, ConcorrenciaAdaptativa
+from app.test.stub_anbima import servidor_stub_anbima, pagina, porta_fechada, criar_fetcher
+
+
+class Relogio:
+    """time.monotonic controlado pelo teste"""
+    def __init__(self, agora: float = 1000.0):
+        self.agora = agora
+
+    def __call__(self) -> float:
+        return self.agora
+
+    def avancar(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+class BaseRelogio(unittest.TestCase):
+    def setUp(self):
+        self.relogio = Relogio()
+        patcher = mock.patch("app.utils.http_fetcher.time.monotonic", self.relogio)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestTokenBucket(BaseRelogio):
+    def test_taxa_invalida(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+    def test_rajada_sem_espera_e_fila_depois(self):
+        bucket = TokenBucket(taxa=2, capacidade=3)
+
+        self.assertEqual([bucket.reservar() for _ in range(3)], [0.0, 0.0, 0.0])
+        # Sem tokens: cada reserva entra na fila, meio segundo depois da anterior
+        self.assertEqual([bucket.reservar() for _ in range(3)], [0.5, 1.0, 1.5])
+
+    def test_reposicao_limitada_a_capacidade(self):
+        bucket = TokenBucket(taxa=2, capacidade=2)
+        bucket.reservar()
+        bucket.reservar()
+
+        self.relogio.avancar(0.5)
+        self.assertEqual(bucket.reservar(), 0.0)
+        self.assertEqual(bucket.reservar(), 0.5)
+
+        # Parado por muito tempo, acumula só até a capacidade
+        self.relogio.avancar(60)
+        self.assertEqual([bucket.reservar() for _ in range(3)], [0.0, 0.0, 0.5])
+
+
+class TestCircuitBreaker(BaseRelogio):
+    def test_abre_apos_falhas_seguidas(self):
+        circuito = CircuitBreaker(limite_falhas=3, tempo_aberto=60)
+        circuito.registrar_falha()
+        circuito.registrar_falha()
+        self.assertEqual(circuito.estado, CircuitBreaker.FECHADO)
+
+        circuito.registrar_falha()
+        self.assertEqual(circuito.estado, CircuitBreaker.ABERTO)
+        self.assertFalse(circuito.permitir())
+
+    def test_sucesso_zera_as_falhas(self):
+        circuito = CircuitBreaker(limite_falhas=2, tempo_aberto=60)
+        circuito.registrar_falha()
+        circuito.registrar_sucesso()
+        circuito.registrar_falha()
+        self.assertEqual(circuito.estado, CircuitBreaker.FECHADO)
+
+    def test_meio_aberto_libera_uma_sonda(self):
+        circuito = CircuitBreaker(limite_falhas=1, tempo_aberto=60, max_sondas=1)
+        circuito.registrar_falha()
+
+        self.relogio.avancar(59)
+        self.assertFalse(circuito.permitir())
+
+        self.relogio.avancar(1)
+        self.assertEqual(circuito.estado, CircuitBreaker.MEIO_ABERTO)
+        self.assertTrue(circuito.permitir())
+        self.assertFalse(circuito.permitir())
+
+    def test_sonda_com_sucesso_fecha(self):
+        circuito = CircuitBreaker(limite_falhas=1, tempo_aberto=60)
+        circuito.registrar_falha()
+        self.relogio.avancar(60)
+        self.assertTrue(circuito.permitir())
+
+        circuito.registrar_sucesso()
+        self.assertEqual(circuito.estado, CircuitBreaker.FECHADO)
+        self.assertTrue(circuito.permitir())
+
+    def test_sonda_com_falha_reabre(self):
+        circuito = CircuitBreaker(limite_falhas=3, tempo_aberto=60)
+        for _ in range(3):
+            circuito.registrar_falha()
+        self.relogio.avancar(60)
+        self.assertTrue(circuito.permitir())
+
+        # No meio-aberto uma única falha basta para reabrir
+        circuito.registrar_falha()
+        self.assertEqual(circuito.estado, CircuitBreaker.ABERTO)
+        self.assertFalse(circuito.permitir())
+
+    def test_sonda_sem_resultado_e_liberada_de_novo(self):
+        circuito = CircuitBreaker(limite_falhas=1, tempo_aberto=60)
+        circuito.registrar_falha()
+        self.relogio.avancar(60)
+        self.assertTrue(circuito.permitir())
+        self.assertFalse(circuito.permitir())
+
+        self.relogio.avancar(60)
+        self.assertTrue(circuito.permitir())
+
+
+class TestConcorrenciaAdaptativa(unittest.IsolatedAsyncioTestCase):
+    async def test_limite_bloqueia_ate_liberar(self):
+        concorrencia = ConcorrenciaAdaptativa(maximo=2, inicial=2)
+        inicio = await concorrencia.adquirir()
+        await concorrencia.adquirir()
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(concorrencia.adquirir(), timeout=0.05)
+
+        await concorrencia.liberar(inicio, sobrecarga=None)
+        await asyncio.wait_for(concorrencia.adquirir(), timeout=1)
+
+    async def test_aumento_aditivo(self):
+        concorrencia = ConcorrenciaAdaptativa(minimo=1, maximo=4, inicial=2)
+        for _ in range(2):
+            await concorrencia.liberar(await concorrencia.adquirir(), sobrecarga=False)
+        # +1/limite por resposta boa: uma janela inteira (2 respostas) sobe ~1
+        self.assertAlmostEqual(concorrencia.limite, 2 + 1 / 2 + 1 / 2.5)
+
+        for _ in range(20):
+            await concorrencia.liberar(await concorrencia.adquirir(), sobrecarga=False)
+        self.assertEqual(concorrencia.limite, 4)
+
+    async def test_reducao_multiplicativa_uma_vez_por_janela(self):
+        concorrencia = ConcorrenciaAdaptativa(minimo=1, maximo=8, inicial=8)
+        inicios = [await concorrencia.adquirir() for _ in range(3)]
+
+        await concorrencia.liberar(inicios[0], sobrecarga=True)
+        self.assertEqual(concorrencia.limite, 4)
+        # Iniciadas antes da redução: não reduzem de novo
+        await concorrencia.liberar(inicios[1], sobrecarga=True)
+        self.assertEqual(concorrencia.limite, 4)
+
+        await asyncio.sleep(0.01)
+        await concorrencia.liberar(await concorrencia.adquirir(), sobrecarga=True)
+        self.assertEqual(concorrencia.limite, 2)
+        await concorrencia.liberar(inicios[2], sobrecarga=None)
+
+    async def test_latencia_alta_conta_como_sobrecarga(self):
+        concorrencia = ConcorrenciaAdaptativa(minimo=1, maximo=4, inicial=4, latencia_alvo=5)
+        inicio = await concorrencia.adquirir()
+
+        await concorrencia.liberar(inicio - 10, sobrecarga=False)
+        self.assertEqual(concorrencia.limite, 2)
+
+    async def test_nao_passa_do_minimo(self):
+        concorrencia = ConcorrenciaAdaptativa(minimo=1, maximo=2, inicial=1)
+        await concorrencia.liberar(await concorrencia.adquirir(), sobrecarga=True)
+        self.assertEqual(concorrencia.limite, 1)
+
+
+async def buscar(fetcher: AsyncFetcher, urls: list[str]) -> list:
+    async with fetcher as aberto:
+        return await asyncio.gather(*(aberto.get(url) for url in urls), return_exceptions=True)
+
+
+class TestAsyncFetcher(unittest.TestCase):
+    def test_nova_tentativa_apos_status_retentavel(self):
+        respostas = {1: (503, b""), 2: (429, b"", {"Retry-After": "0"}), 3: (200, pagina("caracteristicas_tabela.html"))}
+        with servidor_stub_anbima(lambda cod, tentativa: respostas[tentativa]) as stub:
+            [resposta] = asyncio.run(buscar(criar_fetcher(), [stub.url.format(cod_ativo="CRA1")]))
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(stub.tentativas, {"CRA1": 3})
+
+    def test_esgota_tentativas_e_devolve_a_ultima_resposta(self):
+        with servidor_stub_anbima(lambda cod, tentativa: (503, b"")) as stub:
+            [resposta] = asyncio.run(buscar(criar_fetcher(max_tentativas=2), [stub.url.format(cod_ativo="CRA1")]))
+
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(stub.tentativas, {"CRA1": 2})
+
+    def test_status_definitivo_sem_nova_tentativa(self):
+        with servidor_stub_anbima(lambda cod, tentativa: (404, b"")) as stub:
+            [resposta] = asyncio.run(buscar(criar_fetcher(), [stub.url.format(cod_ativo="CRA1")]))
+
+        self.assertEqual(resposta.status_code, 404)
+        self.assertEqual(stub.total, 1)
+
+    def test_erro_de_rede_propagado_apos_as_tentativas(self):
+        [erro] = asyncio.run(buscar(criar_fetcher(max_tentativas=2), [porta_fechada().format(cod_ativo="CRA1")]))
+        self.assertIsInstance(erro, httpx.ConnectError)
+
+    def test_concorrencia_limitada_pelo_maximo(self):
+        with servidor_stub_anbima(lambda cod, tentativa: (200, b"ok"), latencia=0.1) as stub:
+            urls = [stub.url.format(cod_ativo=f"CRA{i}") for i in range(12)]
+            respostas = asyncio.run(buscar(criar_fetcher(max_concorrencia=3), urls))
+
+        self.assertTrue(all(resposta.status_code == 200 for resposta in respostas))
+        self.assertEqual(stub.total, len(urls))
+        self.assertGreater(stub.pico, 1)
+        self.assertLessEqual(stub.pico, 3)
+
+    def test_circuito_aberto_recusa_sem_ir_a_rede(self):
+        circuito = CircuitBreaker(limite_falhas=3, tempo_aberto=60)
+        with servidor_stub_anbima(lambda cod, tentativa: (503, b"")) as stub:
+            urls = [stub.url.format(cod_ativo=f"CRA{i}") for i in range(10)]
+            resultados = asyncio.run(buscar(criar_fetcher(max_concorrencia=1, circuit_breaker=circuito), urls))
+
+        # Só as falhas que abrem o circuito chegam ao servidor; o resto falha na hora
+        recusados = [resultado for resultado in resultados if isinstance(resultado, CircuitoAberto)]
+        self.assertEqual(stub.total, 3)
+        self.assertEqual(circuito.estado, CircuitBreaker.ABERTO)
+        self.assertGreaterEqual(len(recusados), len(urls) - 3)
+        self.assertTrue(all(resultado.status_code == 503 for resultado in resultados if resultado not in recusados))
+
+    def test_espera_respeita_retry_after(self):
+        fetcher = criar_fetcher(backoff_base=1, backoff_max=30)
+
+        self.assertEqual(fetcher._espera_backoff(0, httpx.Response(429, headers={"Retry-After": "7"})), 7)
+        self.assertEqual(fetcher._espera_backoff(0, httpx.Response(429, headers={"Retry-After": "120"})), 30)
+        for tentativa in range(8):
+            espera = fetcher._espera_backoff(tentativa, httpx.Response(503))
+            self.assertGreaterEqual(espera, 0)
+            self.assertLessEqual(espera, min(30, 2 ** tentativa))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+from contextlib import ExitStack
+import os
+import unittest
+
+from app.test.massa_analytics import sessao_ou_pular, popular_massa, consultas_filtradas, planos_com_seq_scan
+
+# Tamanho da massa: grande o bastante para o planner preferir os índices a um Seq Scan
+LINHAS = int(os.environ.get("TESTE_PLANOS_LINHAS", "100000"))
+
+
+class TestPlanosAnalytics(unittest.TestCase):
+    """
+    Nenhuma consulta filtrada de analytics/histórico/fundos pode cair em Seq Scan
+    nas tabelas grandes (índices da migração de índices secundários).
+
+    Precisa do Postgres do .env com as migrações aplicadas; sem ele (ou sem as
+    settings POSTGRES_*), o teste é pulado.
+    A massa é inserida numa transação que sofre rollback no final.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._recursos = ExitStack()
+        cls.db = sessao_ou_pular(cls._recursos)
+        popular_massa(cls.db, LINHAS)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._recursos.close()
+
+    def test_consultas_filtradas_sem_seq_scan(self):
+        for nome, (funcao, kwargs) in consultas_filtradas(self.db).items():
+            with self.subTest(consulta=nome):
+                encontrados = planos_com_seq_scan(self.db, funcao, **kwargs)
+                self.assertEqual(
+                    encontrados, [],
+                    "\n".join(f"Seq Scan em {', '.join(tabelas)}: {' '.join(statement.split())[:200]}" for statement, tabelas in encontrados),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
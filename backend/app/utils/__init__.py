@@ -2,8 +2,21 @@ from .file_loader import FileLoader
 from .parser import Parser
 from .datetime import str_to_datetime_utc
 from .decimal import str_to_decimal
-from .list import convert_to_list
+from .list import convert_to_list, chunked
 from .float import str_to_float
+from .blob_store import BlobStore, compactar, iter_descompactado, iter_blocos, stream_de_blocos
+from .http_fetcher import (
+    AsyncFetcher,
+    TokenBucket,
+    CircuitBreaker,
+    CircuitoAberto,
+    ConcorrenciaAdaptativa,
+    STATUS_RETENTAVEIS,
+    executar_sync
+)
+from .cache import CacheLRU
+from .anbima_extrator import ExtratorAnbima, criar_extrator, extrair_campos
+from .exportacao import FORMATOS_EXPORTACAO, formato_disponivel, iter_csv, iter_ndjson, iter_parquet
 
 __all__ = [
     "FileLoader",
@@ -11,5 +24,27 @@ __all__ = [
     "str_to_datetime_utc",
     "str_to_decimal",
     "convert_to_list",
-    "str_to_float"
+    "chunked",
+    "str_to_float",
+    "BlobStore",
+    "compactar",
+    "iter_descompactado",
+    "iter_blocos",
+    "stream_de_blocos",
+    "AsyncFetcher",
+    "TokenBucket",
+    "CircuitBreaker",
+    "CircuitoAberto",
+    "ConcorrenciaAdaptativa",
+    "STATUS_RETENTAVEIS",
+    "executar_sync",
+    "CacheLRU",
+    "ExtratorAnbima",
+    "criar_extrator",
+    "extrair_campos",
+    "FORMATOS_EXPORTACAO",
+    "formato_disponivel",
+    "iter_csv",
+    "iter_ndjson",
+    "iter_parquet"
 ]
@@ -0,0 +1,226 @@
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Iterator, Optional, Protocol
+import re
+import unicodedata
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # lxml é opcional: sem ele fica o extrator da biblioteca padrão
+    etree = lxml_html = None
+
+# Classes das divs "rótulo: valor" na página de características
+CLASSES_DIV = re.compile(r"(info|data|field)", re.I)
+
+# Rótulo normalizado (minúsculo, sem acento e sem ":") -> campo; cobre os rótulos da página
+ROTULOS = {
+    "serie"             : "serie",
+    "emissao"           : "emissao",
+    "devedor"           : "devedor",
+    "securitizadora"    : "securitizadora",
+    "resgate antecipado": "resgate_antecipado",
+    "agente fiduciario" : "agente_fiduciario",
+}
+
+# Para rótulos fora da tabela (ex: "Número da série"): mesmas regras por palavra-chave
+# do extrator antigo, na mesma ordem de prioridade
+_PALAVRAS_CHAVE = (
+    (("serie",), "serie"),
+    (("emissao",), "emissao"),
+    (("devedor",), "devedor"),
+    (("securitizadora",), "securitizadora"),
+    (("resgate", "antecipado"), "resgate_antecipado"),
+    (("agente", "fiduciario"), "agente_fiduciario"),
+)
+
+CAMPOS = tuple(ROTULOS.values())
+
+
+def normalizar_rotulo(rotulo: str) -> str:
+    """'Agente Fiduciário:' -> 'agente fiduciario'"""
+    sem_acento = unicodedata.normalize("NFKD", rotulo).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acento.lower().replace(":", " ").split())
+
+
+@lru_cache(maxsize=1024)
+def campo_do_rotulo(rotulo: str) -> Optional[str]:
+    """Campo correspondente a um rótulo da página (ou None); memoizado, os rótulos se repetem entre páginas"""
+    normalizado = normalizar_rotulo(rotulo)
+    campo = ROTULOS.get(normalizado)
+    if campo:
+        return campo
+    for palavras, campo in _PALAVRAS_CHAVE:
+        if all(palavra in normalizado for palavra in palavras):
+            return campo
+    return None
+
+
+def parse_boolean(valor: str) -> Optional[bool]:
+    """'Sim'/'Não' (e variações) -> bool; None se não reconhecer"""
+    if not valor:
+        return None
+    valor = valor.lower().strip()
+    if valor in ("sim", "yes", "true", "1", "s"):
+        return True
+    if valor in ("não", "nao", "no", "false", "0", "n"):
+        return False
+    return None
+
+
+class ExtratorAnbima(Protocol):
+    """Backend de extração: devolve os pares (rótulo, valor) da página, na ordem do documento"""
+    nome: str
+
+    def pares(self, conteudo: bytes) -> Iterator[tuple[str, str]]: ...
+
+
+def extrair_campos(extrator: ExtratorAnbima, conteudo: bytes) -> dict:
+    """
+    Campos da página de características (CAMPOS -> valor ou None).
+
+    Linhas de tabela vêm antes das divs "rótulo: valor"; quando o mesmo campo
+    aparece mais de uma vez, vale o último (como no extrator antigo).
+    """
+    dados = dict.fromkeys(CAMPOS)
+    for rotulo, valor in extrator.pares(conteudo):
+        campo = campo_do_rotulo(rotulo)
+        if campo:
+            dados[campo] = parse_boolean(valor) if campo == "resgate_antecipado" else valor
+    return dados
+
+
+def _par_da_div(texto: str) -> Optional[tuple[str, str]]:
+    if ":" not in texto:
+        return None
+    rotulo, valor = texto.split(":", 1)
+    return rotulo.strip(), valor.strip()
+
+
+def _decodificar(conteudo: bytes | str) -> str:
+    if isinstance(conteudo, str):
+        return conteudo
+    try:
+        return conteudo.decode("utf-8")
+    except UnicodeDecodeError:
+        return conteudo.decode("cp1252", errors="replace")
+
+
+class _ParserCaracteristicas(HTMLParser):
+    """Percorre o HTML uma única vez (sem montar árvore) coletando células de <tr> e textos de divs-alvo"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.linhas: list[list[str]] = []
+        self.divs: list[str] = []
+        self._linha: Optional[list[list[str]]] = None
+        self._celula: Optional[list[str]] = None
+        # Uma entrada por <div> aberta: lista de textos (div-alvo) ou None
+        self._pilha_divs: list[Optional[list[str]]] = []
+
+    def _fechar_linha(self):
+        if self._linha is not None:
+            self.linhas.append(["".join(celula) for celula in self._linha])
+        self._linha = None
+        self._celula = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._fechar_linha()
+            self._linha = []
+        elif tag in ("td", "th") and self._linha is not None:
+            self._celula = []
+            self._linha.append(self._celula)
+        elif tag == "div":
+            classes = dict(attrs).get("class") or ""
+            self._pilha_divs.append([] if CLASSES_DIV.search(classes) else None)
+
+    def handle_endtag(self, tag):
+        if tag in ("tr", "table"):
+            self._fechar_linha()
+        elif tag in ("td", "th"):
+            self._celula = None
+        elif tag == "div" and self._pilha_divs:
+            textos = self._pilha_divs.pop()
+            if textos is not None:
+                self.divs.append("".join(textos))
+
+    def handle_data(self, data):
+        texto = data.strip()
+        if not texto:
+            return
+        if self._celula is not None:
+            self._celula.append(texto)
+        for textos in self._pilha_divs:
+            if textos is not None:
+                textos.append(texto)
+
+    def close(self):
+        super().close()
+        self._fechar_linha()
+        while self._pilha_divs:
+            self.handle_endtag("div")
+
+
+class ExtratorHtmlParser:
+    """Extrator da biblioteca padrão (html.parser em streaming, sem árvore)"""
+    nome = "html.parser"
+
+    def pares(self, conteudo: bytes) -> Iterator[tuple[str, str]]:
+        parser = _ParserCaracteristicas()
+        parser.feed(_decodificar(conteudo))
+        parser.close()
+
+        for celulas in parser.linhas:
+            if len(celulas) >= 2:
+                yield celulas[0], celulas[1]
+        for texto in parser.divs:
+            par = _par_da_div(texto)
+            if par:
+                yield par
+
+
+class ExtratorLxml:
+    """Extrator com lxml (parser em C) e XPaths pré-compilados"""
+    nome = "lxml"
+
+    def __init__(self):
+        if etree is None:
+            raise RuntimeError("lxml não está instalado")
+        self._linhas = etree.XPath("//table//tr")
+        self._celulas = etree.XPath(".//td | .//th")
+        self._textos = etree.XPath(".//text()")
+        self._divs = etree.XPath(
+            "//div[@class and re:test(@class, 'info|data|field', 'i')]",
+            namespaces={"re": "http://exslt.org/regular-expressions"},
+        )
+
+    def _texto(self, elemento) -> str:
+        return "".join(texto.strip() for texto in self._textos(elemento))
+
+    def pares(self, conteudo: bytes) -> Iterator[tuple[str, str]]:
+        if not conteudo or not conteudo.strip():
+            return
+        documento = lxml_html.fromstring(conteudo)
+
+        for linha in self._linhas(documento):
+            celulas = self._celulas(linha)
+            if len(celulas) >= 2:
+                yield self._texto(celulas[0]), self._texto(celulas[1])
+        for div in self._divs(documento):
+            par = _par_da_div(self._texto(div))
+            if par:
+                yield par
+
+
+EXTRATORES = {
+    ExtratorLxml.nome      : ExtratorLxml,
+    ExtratorHtmlParser.nome: ExtratorHtmlParser,
+}
+
+
+def criar_extrator(nome: str = "auto") -> ExtratorAnbima:
+    """Backend pelo nome; "auto" usa lxml se estiver instalado"""
+    if nome == "auto":
+        nome = ExtratorLxml.nome if etree is not None else ExtratorHtmlParser.nome
+    if nome not in EXTRATORES:
+        raise ValueError(f"Extrator desconhecido: {nome} (opções: auto, {', '.join(EXTRATORES)})")
+    return EXTRATORES[nome]()
@@ -0,0 +1,103 @@
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+import gzip
+import io
+import os
+import tempfile
+import zlib
+
+# Tamanho dos blocos lidos/devolvidos pelos acessores em streaming
+CHUNK_SIZE = 1024 * 1024
+
+
+def compactar(conteudo: str | bytes, encoding: str = "utf-8") -> bytes:
+    """Compacta o conteúdo do arquivo (texto ou bytes) em gzip"""
+    dados = conteudo.encode(encoding) if isinstance(conteudo, str) else conteudo
+    return gzip.compress(dados, compresslevel=6)
+
+
+def iter_descompactado(blocos: Iterable[bytes]) -> Iterator[bytes]:
+    """Descompacta (gzip) uma sequência de blocos sem juntar o arquivo inteiro em memória"""
+    descompactador = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    for bloco in blocos:
+        dados = descompactador.decompress(bloco)
+        if dados:
+            yield dados
+    resto = descompactador.flush()
+    if resto:
+        yield resto
+
+
+def iter_blocos(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Lê um stream binário em blocos e o fecha no final"""
+    with stream:
+        while bloco := stream.read(chunk_size):
+            yield bloco
+
+
+class _StreamDeBlocos(io.RawIOBase):
+    """Adapta um iterador de bytes para a interface de arquivo (read/readinto)"""
+    def __init__(self, blocos: Iterable[bytes]):
+        self._blocos = iter(blocos)
+        self._resto = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._resto:
+            self._resto = next(self._blocos, None)
+            if self._resto is None:
+                self._resto = b""
+                return 0
+        n = min(len(buffer), len(self._resto))
+        buffer[:n] = self._resto[:n]
+        self._resto = self._resto[n:]
+        return n
+
+
+def stream_de_blocos(blocos: Iterable[bytes]) -> BinaryIO:
+    """Stream binário (lazy) sobre um iterador de bytes, ex: o de iter_conteudo_arquivo"""
+    return io.BufferedReader(_StreamDeBlocos(blocos), buffer_size=CHUNK_SIZE)
+
+
+class BlobStore:
+    """
+    Armazenamento local endereçado por conteúdo (chave = hash SHA-256 do arquivo).
+
+    - Layout: `<base_dir>/<hash[:2]>/<hash[2:4]>/<hash>.gz`
+    - Escrita atômica (arquivo temporário + rename); blobs são imutáveis,
+      então salvar um hash que já existe não faz nada.
+    """
+    def __init__(self, base_dir: str):
+        self.base_dir = Path(base_dir)
+
+    def caminho(self, hash_arquivo: str) -> Path:
+        return self.base_dir / hash_arquivo[:2] / hash_arquivo[2:4] / f"{hash_arquivo}.gz"
+
+    def existe(self, hash_arquivo: str) -> bool:
+        return self.caminho(hash_arquivo).is_file()
+
+    def salvar(self, hash_arquivo: str, dados: bytes) -> Path:
+        """Grava os bytes (já compactados) do arquivo"""
+        destino = self.caminho(hash_arquivo)
+        if destino.is_file():
+            return destino
+
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as arquivo:
+                arquivo.write(dados)
+            os.replace(temporario, destino)
+        except BaseException:
+            Path(temporario).unlink(missing_ok=True)
+            raise
+        return destino
+
+    def abrir(self, hash_arquivo: str) -> BinaryIO:
+        """Abre o blob (compactado) para leitura"""
+        return self.caminho(hash_arquivo).open("rb")
+
+    def remover(self, hash_arquivo: str) -> None:
+        self.caminho(hash_arquivo).unlink(missing_ok=True)
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import threading
+import time
+
+_AUSENTE = object()
+
+
+class CacheLRU:
+    """
+    Cache em memória (por processo) com descarte LRU e expiração por item.
+
+    - Thread-safe: é compartilhado pelas threads do servidor e pelos loops de `executar_sync`.
+    - `get` devolve `padrao` para chaves ausentes ou expiradas (que são removidas).
+    """
+    def __init__(self, max_itens: int, ttl_segundos: float):
+        self.max_itens = max(1, max_itens)
+        self.ttl_segundos = ttl_segundos
+        self._itens: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave: Hashable, padrao: Any = None) -> Any:
+        with self._lock:
+            item = self._itens.get(chave, _AUSENTE)
+            if item is _AUSENTE:
+                return padrao
+            expira_em, valor = item
+            if expira_em <= time.monotonic():
+                del self._itens[chave]
+                return padrao
+            self._itens.move_to_end(chave)
+            return valor
+
+    def set(self, chave: Hashable, valor: Any, ttl_segundos: Optional[float] = None) -> None:
+        """Guarda `valor` por `ttl_segundos` (padrão: o TTL do cache)"""
+        ttl = self.ttl_segundos if ttl_segundos is None else ttl_segundos
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, chave: Hashable) -> None:
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self) -> int:
+        return len(self._itens)
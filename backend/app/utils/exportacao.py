@@ -0,0 +1,128 @@
+from datetime import date
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Sequence
+import csv
+import io
+import json
+
+from sqlalchemy import types as sa_types
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele a exportação fica em CSV/NDJSON
+    pa = pq = None
+
+FORMATO_CSV     = "csv"
+FORMATO_NDJSON  = "ndjson"
+FORMATO_PARQUET = "parquet"
+
+# formato -> (media type, extensão do arquivo)
+FORMATOS_EXPORTACAO = {
+    FORMATO_CSV    : ("text/csv; charset=utf-8", "csv"),
+    FORMATO_NDJSON : ("application/x-ndjson", "ndjson"),
+    FORMATO_PARQUET: ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def formato_disponivel(formato: str) -> bool:
+    """Parquet só com pyarrow instalado"""
+    return formato in FORMATOS_EXPORTACAO and (formato != FORMATO_PARQUET or pa is not None)
+
+
+def _valor_texto(valor: Any) -> Any:
+    """Decimal e datas como texto (sem perder precisão); o resto como veio"""
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def iter_csv(nomes: Sequence[str], lotes: Iterable[Sequence[Sequence[Any]]]) -> Iterator[bytes]:
+    """Cabeçalho + um bloco de bytes por lote (NULL vira campo vazio)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+
+    escritor.writerow(nomes)
+    for lote in lotes:
+        escritor.writerows(lote)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson(nomes: Sequence[str], lotes: Iterable[Sequence[Sequence[Any]]]) -> Iterator[bytes]:
+    """Um objeto JSON por linha; Decimal sai como string, como nas respostas da API"""
+    for lote in lotes:
+        yield "".join(
+            json.dumps(dict(zip(nomes, linha)), ensure_ascii=False, default=_valor_texto) + "\n"
+            for linha in lote
+        ).encode("utf-8")
+
+
+def tipo_arrow(tipo: sa_types.TypeEngine):
+    """Tipo Arrow equivalente ao tipo da coluna (o schema é fixo: lotes só com NULL não mudam o tipo)"""
+    if isinstance(tipo, sa_types.Numeric) and not isinstance(tipo, sa_types.Float):
+        return pa.decimal128(tipo.precision or 38, tipo.scale or 0)
+    if isinstance(tipo, sa_types.Float):
+        return pa.float64()
+    if isinstance(tipo, sa_types.Integer):
+        return pa.int64()
+    if isinstance(tipo, sa_types.Boolean):
+        return pa.bool_()
+    if isinstance(tipo, sa_types.Date):
+        return pa.date32()
+    if isinstance(tipo, sa_types.DateTime):
+        return pa.timestamp("us", tz="UTC" if tipo.timezone else None)
+    return pa.string()
+
+
+class _SaidaDrenavel(io.RawIOBase):
+    """
+    Destino do ParquetWriter que acumula os bytes até serem drenados.
+
+    `tell()` devolve o total já escrito (o writer usa as posições no footer),
+    mesmo depois que os bytes anteriores já foram entregues ao cliente.
+    """
+
+    def __init__(self):
+        self._blocos: list[bytes] = []
+        self._posicao = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        dados = bytes(dados)
+        self._blocos.append(dados)
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def drenar(self) -> bytes:
+        dados, self._blocos = b"".join(self._blocos), []
+        return dados
+
+
+def iter_parquet(colunas: Sequence[tuple[str, sa_types.TypeEngine]], lotes: Iterable[Sequence[Sequence[Any]]]) -> Iterator[bytes]:
+    """Um row group por lote; cada row group é enviado assim que escrito (o footer vai no final)"""
+    if pa is None:
+        raise RuntimeError("pyarrow não está instalado")
+
+    schema = pa.schema([(nome, tipo_arrow(tipo)) for nome, tipo in colunas])
+    saida = _SaidaDrenavel()
+    with pq.ParquetWriter(saida, schema, compression="snappy") as escritor:
+        for lote in lotes:
+            colunas_lote = list(zip(*lote)) if lote else [[] for _ in colunas]
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas_lote, schema)],
+                schema=schema,
+            ))
+            yield saida.drenar()
+    yield saida.drenar()
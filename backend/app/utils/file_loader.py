@@ -1,4 +1,5 @@
 from fastapi import UploadFile
+from typing import BinaryIO
 
 class FileLoader:
     """Lê conteúdo de UploadFile (upload direto, sem salvar em disco)."""
@@ -13,3 +14,8 @@ class FileLoader:
     async def load_bytes(self, upload: UploadFile) -> bytes:
         """Lê o conteúdo de um UploadFile e retorna como bytes"""
         return await upload.read()
+
+    async def open_stream(self, upload: UploadFile) -> BinaryIO:
+        """Retorna o stream binário do UploadFile posicionado no início, sem carregá-lo em memória"""
+        await upload.seek(0)
+        return upload.file
@@ -0,0 +1,300 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Optional, TypeVar
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Respostas que valem nova tentativa (limite de taxa e falhas temporárias do servidor)
+STATUS_RETENTAVEIS = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Limitador de taxa (token bucket): até `taxa` requisições por segundo, com rajadas de até `capacidade`.
+
+    - Thread-safe e independente de event loop: cada chamada reserva o seu token
+      sob um lock e só então dorme o tempo necessário, então a mesma instância
+      pode ser compartilhada pelo processo inteiro (ver `app.provider.get_anbima_rate_limiter`).
+    """
+    def __init__(self, taxa: float, capacidade: int = 1):
+        if taxa <= 0:
+            raise ValueError("taxa deve ser maior que zero")
+        self.taxa = taxa
+        self.capacidade = max(1, capacidade)
+        self._tokens = float(self.capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self) -> float:
+        """Reserva um token e retorna quantos segundos esperar antes de usá-lo"""
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            self._tokens -= 1
+            # Saldo negativo = fila de reservas: cada uma espera a sua vez
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.taxa
+
+    async def adquirir(self) -> None:
+        espera = self.reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+class CircuitoAberto(Exception):
+    """Requisição recusada sem ir à rede: o circuito está aberto (host fora do ar ou limitando)"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por host: abre após `limite_falhas` falhas seguidas e recusa
+    requisições por `tempo_aberto` segundos; depois deixa passar até `max_sondas`
+    requisições de teste (meio-aberto): sucesso fecha o circuito, falha reabre.
+
+    - Falha = erro de rede/timeout ou STATUS_RETENTAVEIS; qualquer outra resposta é sucesso.
+    - Thread-safe e sem event loop: uma instância por processo (ver `app.provider.get_anbima_circuit_breaker`).
+    """
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(self, limite_falhas: int = 5, tempo_aberto: float = 60.0, max_sondas: int = 1):
+        self.limite_falhas = max(1, limite_falhas)
+        self.tempo_aberto = tempo_aberto
+        self.max_sondas = max(1, max_sondas)
+        self._estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._sondas = 0
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            self._atualizar()
+            return self._estado
+
+    def _atualizar(self) -> None:
+        # Também libera novas sondas se as anteriores não registraram resultado (ex: cancelada)
+        if self._estado != self.FECHADO and time.monotonic() - self._aberto_em >= self.tempo_aberto:
+            self._estado = self.MEIO_ABERTO
+            self._aberto_em = time.monotonic()
+            self._sondas = 0
+
+    def permitir(self) -> bool:
+        """True se a requisição pode ir à rede (no meio-aberto, ocupa uma das sondas)"""
+        with self._lock:
+            self._atualizar()
+            if self._estado == self.FECHADO:
+                return True
+            if self._estado == self.MEIO_ABERTO and self._sondas < self.max_sondas:
+                self._sondas += 1
+                return True
+            return False
+
+    def registrar_sucesso(self) -> None:
+        with self._lock:
+            if self._estado != self.FECHADO:
+                logger.info("Circuito fechado: host respondendo de novo")
+            self._estado = self.FECHADO
+            self._falhas = 0
+
+    def registrar_falha(self) -> None:
+        with self._lock:
+            self._falhas += 1
+            if self._estado == self.MEIO_ABERTO or (self._estado == self.FECHADO and self._falhas >= self.limite_falhas):
+                logger.warning(f"Circuito aberto após {self._falhas} falhas seguidas; novas requisições recusadas por {self.tempo_aberto:.0f}s")
+                self._estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+
+
+class ConcorrenciaAdaptativa:
+    """
+    Limite de requisições simultâneas ajustado por AIMD (como o controle de congestionamento do TCP).
+
+    - Resposta boa: aumento aditivo, +1 no limite a cada "janela" (+1/limite por resposta).
+    - Sobrecarga (STATUS_RETENTAVEIS, erro de rede ou latência acima de `latencia_alvo`):
+      redução multiplicativa por `fator_reducao`, no máximo uma vez por janela (só
+      reduz de novo por requisições iniciadas depois da última redução).
+    - O limite fica entre `minimo` e `maximo`; usar dentro de um único event loop.
+    """
+    def __init__(
+        self,
+        minimo       : int = 1,
+        maximo       : int = 4,
+        inicial      : Optional[int] = None,
+        latencia_alvo: float = 5.0,
+        fator_reducao: float = 0.5,
+    ):
+        self.minimo = max(1, minimo)
+        self.maximo = max(self.minimo, maximo)
+        self.limite = float(min(self.maximo, max(self.minimo, inicial or self.maximo)))
+        self.latencia_alvo = latencia_alvo
+        self.fator_reducao = fator_reducao
+        self._em_uso = 0
+        self._ultima_reducao = 0.0
+        self._condicao = asyncio.Condition()
+
+    async def adquirir(self) -> float:
+        """Espera uma vaga dentro do limite atual; retorna o instante de início (para `liberar`)"""
+        async with self._condicao:
+            await self._condicao.wait_for(lambda: self._em_uso < int(self.limite))
+            self._em_uso += 1
+        return time.monotonic()
+
+    async def liberar(self, inicio: float, sobrecarga: Optional[bool]) -> None:
+        """
+        Devolve a vaga e ajusta o limite pela resposta (latência medida desde `inicio`).
+        Com `sobrecarga=None` (requisição não enviada), só devolve a vaga.
+        """
+        agora = time.monotonic()
+        async with self._condicao:
+            self._em_uso -= 1
+            if sobrecarga is None:
+                pass
+            elif sobrecarga or agora - inicio > self.latencia_alvo:
+                if inicio > self._ultima_reducao:
+                    self.limite = max(self.minimo, self.limite * self.fator_reducao)
+                    self._ultima_reducao = agora
+                    logger.info(f"Concorrência reduzida para {int(self.limite)}")
+            else:
+                self.limite = min(self.maximo, self.limite + 1 / self.limite)
+            self._condicao.notify_all()
+
+
+class AsyncFetcher:
+    """
+    Cliente HTTP assíncrono para muitas requisições ao mesmo host.
+
+    - Um único `httpx.AsyncClient` (pool de conexões keep-alive) por contexto `async with`.
+    - Concorrência adaptativa (`ConcorrenciaAdaptativa`, até `max_concorrencia`)
+      e taxa pelo `TokenBucket` (opcional).
+    - Timeouts e novas tentativas com backoff exponencial e jitter ("full jitter")
+      para erros de rede e STATUS_RETENTAVEIS, respeitando `Retry-After` quando vier.
+    - Com `circuit_breaker`, host fora do ar falha na hora (`CircuitoAberto`) em vez
+      de esperar o timeout e as novas tentativas de cada requisição.
+    """
+    def __init__(
+        self,
+        max_concorrencia    : int = 4,
+        rate_limiter        : Optional[TokenBucket] = None,
+        timeout             : float = 30.0,
+        max_tentativas      : int = 4,
+        backoff_base        : float = 0.5,
+        backoff_max         : float = 30.0,
+        headers             : Optional[dict] = None,
+        circuit_breaker     : Optional[CircuitBreaker] = None,
+        concorrencia_inicial: Optional[int] = None,
+        latencia_alvo       : Optional[float] = None,
+    ):
+        self.max_concorrencia = max(1, max_concorrencia)
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.max_tentativas = max(1, max_tentativas)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.headers = headers or {}
+        self.circuit_breaker = circuit_breaker
+        self.concorrencia_inicial = concorrencia_inicial
+        # Sem alvo explícito, só o timeout conta como latência alta
+        self.latencia_alvo = latencia_alvo or timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self.concorrencia: Optional[ConcorrenciaAdaptativa] = None
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_concorrencia,
+                max_keepalive_connections=self.max_concorrencia,
+            ),
+            follow_redirects=True,
+        )
+        self.concorrencia = ConcorrenciaAdaptativa(
+            maximo        = self.max_concorrencia,
+            inicial       = self.concorrencia_inicial,
+            latencia_alvo = self.latencia_alvo,
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._client.aclose()
+        self._client = None
+
+    def _espera_backoff(self, tentativa: int, resposta: Optional[httpx.Response] = None) -> float:
+        """Tempo até a próxima tentativa: `Retry-After` (se numérico) ou backoff exponencial com jitter"""
+        if resposta is not None:
+            retry_after = resposta.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** tentativa))
+
+    async def get(self, url: str) -> httpx.Response:
+        """
+        GET com limite de taxa/concorrência e novas tentativas.
+
+        Retorna a última resposta (o chamador decide o que fazer com status de erro),
+        propaga a última exceção de rede (`httpx.HTTPError`) ou `CircuitoAberto`.
+        """
+        for tentativa in range(self.max_tentativas):
+            resposta = None
+            falhou = None
+            try:
+                inicio = await self.concorrencia.adquirir()
+                try:
+                    # Consultado só com a vaga em mãos: requisições que estavam esperando
+                    # enxergam o circuito que abriu enquanto isso
+                    if self.circuit_breaker and not self.circuit_breaker.permitir():
+                        raise CircuitoAberto(f"Circuito aberto para {httpx.URL(url).host}")
+                    if self.rate_limiter:
+                        await self.rate_limiter.adquirir()
+                    inicio = time.monotonic()
+                    falhou = True
+                    resposta = await self._client.get(url)
+                    falhou = resposta.status_code in STATUS_RETENTAVEIS
+                finally:
+                    await self.concorrencia.liberar(inicio, sobrecarga=falhou)
+                    if self.circuit_breaker and falhou is not None:
+                        if falhou:
+                            self.circuit_breaker.registrar_falha()
+                        else:
+                            self.circuit_breaker.registrar_sucesso()
+                if not falhou:
+                    return resposta
+                motivo = f"HTTP {resposta.status_code}"
+            except httpx.TransportError as e:
+                if tentativa == self.max_tentativas - 1:
+                    raise
+                motivo = f"{type(e).__name__}: {e}"
+
+            if tentativa == self.max_tentativas - 1:
+                return resposta
+
+            espera = self._espera_backoff(tentativa, resposta)
+            logger.warning(f"{url}: {motivo}; nova tentativa em {espera:.2f}s ({tentativa + 2}/{self.max_tentativas})")
+            await asyncio.sleep(espera)
+
+
+def executar_sync(coro: Awaitable[T]) -> T:
+    """
+    Executa uma corrotina a partir de código síncrono.
+
+    Dentro de um event loop já em execução (ex: rota `async def`) não dá para usar
+    `asyncio.run`, então a corrotina roda em um loop próprio em outra thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
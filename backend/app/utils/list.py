@@ -1,4 +1,6 @@
-from typing import List, Union
+from typing import Iterable, Iterator, List, TypeVar, Union
+
+T = TypeVar("T")
 
 def convert_to_list(node: Union[dict, list, None]) -> List[dict]:
     """Garante que o nó possa ser iterado como lista."""
@@ -9,3 +11,15 @@ def convert_to_list(node: Union[dict, list, None]) -> List[dict]:
     if isinstance(node, dict):
         return [node]
     return []
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Agrupa um iterável (inclusive geradores) em listas de até `size` itens."""
+    chunk: List[T] = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
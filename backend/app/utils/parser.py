@@ -1,4 +1,5 @@
-from typing import Any, Dict
+from typing import Any, BinaryIO, Dict, Iterator, Tuple
+from xml.etree import ElementTree
 import json
 import xmltodict
 
@@ -10,6 +11,39 @@ class Parser:
     def parse_xml_text_to_dict(self, text: str) -> Dict[str, Any]:
         return xmltodict.parse(text)
 
+    def iter_xml_records(self, stream: BinaryIO, record_path: Tuple[str, ...]) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre o XML em streaming (iterparse) e produz um dict por registro.
+
+        - `record_path` é o caminho completo até o registro, ex: ("arquivoposicao_4_01", "fundo", "titprivado").
+        - Cada registro é entregue assim que a tag fecha, no formato {tag_filha: texto},
+          com os textos normalizados como o xmltodict (strip; vazio -> None).
+        - Todo elemento que fecha na profundidade do registro (o registro depois de
+          entregue e também os irmãos de outras tags: caixa, cotas, acoes...) é limpo e
+          removido do pai, então a memória fica constante independente do tamanho e da
+          composição da carteira.
+        """
+        *parent_path, record_tag = record_path
+        parent_path = tuple(parent_path)
+        path: list[ElementTree.Element] = []
+
+        for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                path.append(elem)
+                continue
+
+            path.pop()
+            if len(path) != len(parent_path):
+                continue
+
+            if elem.tag == record_tag and tuple(e.tag for e in path) == parent_path:
+                yield {child.tag: (child.text or "").strip() or None for child in elem}
+
+            # Libera o elemento já consumido (registro ou não) junto com a sua subárvore
+            elem.clear()
+            if path:
+                path[-1].remove(elem)
+
     """ def parse_any(self, text: str, kind_hint: str | None = None) -> Dict[str, Any]:
         if kind_hint:
             k = kind_hint.lower()
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+Benchmarks manuais do backend (precisam de um Postgres configurado no .env)
+
+Uso:
+    poetry run python benchmark.py persistencia [qtd_linhas]
+    poetry run python benchmark.py explain [qtd_linhas]
+    poetry run python benchmark.py overview [qtd_linhas]
+    poetry run python benchmark.py paginacao [qtd_linhas]
+    poetry run python benchmark.py exportacao [qtd_linhas]
+    poetry run python benchmark.py anbima [qtd_ativos] [latencia_ms]
+    poetry run python benchmark.py extrator [diretorio_com_paginas_html] [repeticoes]
+    poetry run python benchmark.py concorrencia [qtd_pesadas] [consulta_pesada_ms]
+"""
+
+import sys
+import os
+import time
+import threading
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import date
+from decimal import Decimal
+
+# Adicionar o diretório atual ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy.orm import Session
+
+from app.DTOs import ParsedBundleDTO, AtivoDTO, IndexadorDTO, LoteDTO, PosicaoDTO
+from app.test.massa_analytics import sessao_descartavel, popular_massa, consultas_filtradas, planos_com_seq_scan
+
+
+def gerar_bundles(qtd: int):
+    """Gera `qtd` bundles sintéticos, parecidos com os de um arquivoposicao_4_01"""
+    indexadores = ["CDI", "IPCA", "IGPM", "PRE"]
+    for i in range(qtd):
+        yield ParsedBundleDTO(
+            lote=LoteDTO(vl_pu_compra=Decimal("1000.5"), qtd_comprada=Decimal("10"), dt_operacao=date(2025, 1, 2)),
+            indexador=IndexadorDTO(cd_indexador=indexadores[i % len(indexadores)], sgl_indexador=""),
+            ativo=AtivoDTO(
+                cd_ativo=f"CRA{i:08d}",
+                cd_isin=f"BRBENCH{i:08d}",
+                perc_indexador=100.0,
+                perc_cupom=5.5,
+                vl_pu_emissao=Decimal("1000"),
+                dt_emissao=date(2024, 1, 1),
+                dt_vencimento=date(2030, 1, 1),
+            ),
+            posicao=PosicaoDTO(
+                vl_pu_posicao=Decimal("1010.1"),
+                vl_principal=Decimal(str(1000 + i)),
+                vl_financeiro_disponivel=Decimal("1010.1"),
+                dt_posicao=date(2025, 1, 2),
+            ),
+        )
+
+
+def medir(nome: str, funcao, *args, **kwargs) -> float:
+    """Executa `funcao` em uma sessão descartável e imprime o tempo gasto"""
+    with sessao_descartavel() as db:
+        inicio = time.perf_counter()
+        funcao(db, *args, **kwargs)
+        duracao = time.perf_counter() - inicio
+
+    print(f"⏱️  {nome}: {duracao:.3f}s")
+    return duracao
+
+
+def benchmark_persistencia(qtd: int):
+    """Compara persist_bundles (linha a linha) com persist_bundles_bulk"""
+    from app.persiste import persist_bundles, persist_bundles_bulk
+
+    print(f"📦 Persistindo {qtd} titprivado sintéticos")
+    linha_a_linha = medir("persist_bundles (linha a linha)", persist_bundles, gerar_bundles(qtd))
+    em_lote = medir("persist_bundles_bulk", persist_bundles_bulk, gerar_bundles(qtd))
+    print(f"🚀 Speedup: {linha_a_linha / em_lote:.1f}x")
+
+
+def benchmark_explain(qtd: int):
+    """
+    Roda as consultas filtradas de analytics/histórico/fundos sobre uma massa grande e
+    falha (exit 1) se o plano de alguma delas fizer Seq Scan em uma tabela grande
+    (a mesma verificação de app/test/test_planos_analytics.py, com a massa no tamanho pedido).
+    """
+    with sessao_descartavel() as db:
+        print(f"🌱 Populando {qtd} ativos/posições")
+        popular_massa(db, qtd)
+
+        falhas = 0
+        for nome, (funcao, kwargs) in consultas_filtradas(db).items():
+            encontrados = planos_com_seq_scan(db, funcao, **kwargs)
+            for statement, tabelas in encontrados:
+                falhas += 1
+                print(f"❌ {nome}: Seq Scan em {', '.join(tabelas)}")
+                print(f"   {' '.join(statement.split())[:200]}")
+            if not encontrados:
+                print(f"✅ {nome}")
+
+    if falhas:
+        print(f"💥 {falhas} consulta(s) com Seq Scan em tabela grande")
+        sys.exit(1)
+    print("🎉 Nenhuma consulta filtrada caiu em Seq Scan")
+
+
+def overview_cinco_consultas(db: Session, **filtros):
+    """Forma antiga do overview: cinco consultas sobre o mesmo join filtrado (referência do benchmark)"""
+    from sqlalchemy import func, desc
+    from app.models import Ativo, Indexador, Posicao
+    from app.persiste.queries.filters import aplicar_filtros
+
+    base = db.query(Ativo).join(Posicao, Ativo.id_ativo == Posicao.id_ativo).join(Indexador, Ativo.id_indexador == Indexador.id_indexador)
+    base = aplicar_filtros(base, **filtros)
+    base.count()
+    base.with_entities(Indexador.id_indexador).distinct().count()
+    base.with_entities(func.sum(Posicao.vl_principal)).scalar()
+    base.with_entities(Indexador.cd_indexador, func.count(Ativo.id_ativo)).group_by(Indexador.cd_indexador).all()
+    base.with_entities(Ativo.cd_ativo, Posicao.vl_principal, Indexador.cd_indexador).order_by(desc(Posicao.vl_principal)).limit(5).all()
+
+
+def benchmark_overview(qtd: int, repeticoes: int = 5):
+    """Compara o overview em cinco consultas com a consulta única (GROUPING SETS + top N)"""
+    from app.persiste.queries import get_overview_data
+
+    cenarios = {
+        "sem filtro": {},
+        "indexador CDI": {"indexador": "CDI"},
+        "período de 1 mês": {"date_from": "2025-03-01", "date_to": "2025-03-31"},
+    }
+
+    with sessao_descartavel() as db:
+        print(f"🌱 Populando {qtd} posições")
+        popular_massa(db, qtd)
+
+        for nome, filtros in cenarios.items():
+            tempos = {}
+            for rotulo, funcao in (("5 consultas", overview_cinco_consultas), ("consulta única", get_overview_data)):
+                inicio = time.perf_counter()
+                for _ in range(repeticoes):
+                    funcao(db, **filtros)
+                tempos[rotulo] = (time.perf_counter() - inicio) / repeticoes
+                print(f"⏱️  {nome} / {rotulo}: {tempos[rotulo] * 1000:.1f}ms")
+            print(f"🚀 Speedup ({nome}): {tempos['5 consultas'] / tempos['consulta única']:.1f}x")
+
+
+def benchmark_paginacao(qtd: int, tamanho_pagina: int = 50, repeticoes: int = 3):
+    """Latência por página da listagem de ativos em profundidade crescente: offset x keyset (cursor)"""
+    from app.persiste.queries import get_ativos_data
+    from app.persiste.queries.paginacao import decodificar_cursor
+
+    with sessao_descartavel() as db:
+        print(f"🌱 Populando {qtd} posições")
+        popular_massa(db, qtd)
+
+        # Cursor de cada profundidade obtido de antemão andando pelas páginas (fora da medida)
+        profundidades = [p for p in (0, 100, 1000, 5000, 9000) if p * tamanho_pagina < qtd]
+        cursores, cursor, pagina = {}, None, 0
+        while pagina <= profundidades[-1]:
+            if pagina in profundidades:
+                cursores[pagina] = cursor
+            resultado = get_ativos_data(db, limit=tamanho_pagina, cursor=cursor, contagem="nenhuma")
+            cursor = decodificar_cursor(resultado["next_cursor"])
+            pagina += 1
+
+        for pagina in profundidades:
+            tempos = {}
+            cenarios = {
+                "offset + count": dict(offset=pagina * tamanho_pagina, contagem="exata"),
+                "cursor": dict(cursor=cursores[pagina], contagem="nenhuma"),
+            }
+            for rotulo, kwargs in cenarios.items():
+                inicio = time.perf_counter()
+                for _ in range(repeticoes):
+                    get_ativos_data(db, limit=tamanho_pagina, **kwargs)
+                tempos[rotulo] = (time.perf_counter() - inicio) / repeticoes
+            print(f"⏱️  página {pagina}: offset + count {tempos['offset + count'] * 1000:.1f}ms, "
+                  f"cursor {tempos['cursor'] * 1000:.1f}ms")
+
+        inicio = time.perf_counter()
+        estimado = get_ativos_data(db, limit=tamanho_pagina, contagem="estimada")["total"]
+        print(f"⏱️  total estimado pelo planner: {estimado} (real {qtd}) em {(time.perf_counter() - inicio) * 1000:.1f}ms")
+
+
+def benchmark_exportacao(qtd: int, tamanho_pagina: int = 100):
+    """Exportação em streaming (cursor no servidor) x paginar a listagem de ativos: tempo e pico de memória"""
+    import tracemalloc
+    from app.config import get_settings
+    from app.persiste.queries import get_ativos_data
+    from app.persiste.queries.exportacao import colunas_exportacao, iter_posicoes_exportacao
+    from app.persiste.queries.paginacao import decodificar_cursor
+    from app.utils import iter_csv
+
+    def exportar(db: Session) -> int:
+        nomes = [nome for nome, _ in colunas_exportacao()]
+        lotes = iter_posicoes_exportacao(db, get_settings().EXPORTACAO_LOTE_LINHAS)
+        return sum(len(bloco) for bloco in iter_csv(nomes, lotes))
+
+    def paginar(db: Session) -> int:
+        linhas, cursor = 0, None
+        while True:
+            pagina = get_ativos_data(db, limit=tamanho_pagina, cursor=cursor, contagem="nenhuma")
+            linhas += len(pagina["ativos"])
+            if not pagina["next_cursor"]:
+                return linhas
+            cursor = decodificar_cursor(pagina["next_cursor"])
+
+    with sessao_descartavel() as db:
+        print(f"🌱 Populando {qtd} posições")
+        popular_massa(db, qtd)
+
+        for rotulo, funcao in ((f"paginando de {tamanho_pagina} em {tamanho_pagina}", paginar), ("exportação CSV em streaming", exportar)):
+            db.expunge_all()
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            resultado = funcao(db)
+            duracao = time.perf_counter() - inicio
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"⏱️  {rotulo}: {duracao:.2f}s, pico de memória {pico / 2**20:.1f} MiB ({resultado})")
+
+
+# Página de características da ANBIMA (estrutura das tabelas gravada do site; valores fictícios)
+PAGINA_ANBIMA = """<html><head><title>CRA - Características | ANBIMA Data</title></head><body>
+<table>
+<tr><th>Série</th><td>1ª</td></tr>
+<tr><th>Emissão</th><td>12ª</td></tr>
+<tr><th>Devedor</th><td>Agro Exemplo S.A.</td></tr>
+<tr><th>Securitizadora</th><td>Securitizadora Exemplo S.A.</td></tr>
+<tr><th>Resgate antecipado</th><td>Não</td></tr>
+<tr><th>Agente fiduciário</th><td>Fiduciária Exemplo DTVM</td></tr>
+</table>
+</body></html>""".encode("utf-8")
+
+
+@contextmanager
+def servidor_stub_anbima(latencia: float, falhar_a_cada: int = 10, fora_do_ar: bool = False):
+    """
+    Servidor HTTP local que imita a ANBIMA: responde PAGINA_ANBIMA após `latencia` segundos
+    e devolve 503 na primeira tentativa de um a cada `falhar_a_cada` ativos (exercita as novas tentativas).
+    Com `fora_do_ar`, todas as respostas são 503.
+    """
+    tentativas = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latencia)
+            with lock:
+                tentativas[self.path] = tentativas.get(self.path, 0) + 1
+                falhar = fora_do_ar or (tentativas[self.path] == 1 and zlib.crc32(self.path.encode()) % falhar_a_cada == 0)
+            status, corpo = (503, b"") if falhar else (200, PAGINA_ANBIMA)
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_port}/certificado-de-recebiveis/{{cod_ativo}}/caracteristicas", tentativas
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def benchmark_anbima(qtd: int, latencia_ms: float):
+    """
+    Enriquecimento contra um stub local da ANBIMA: uma requisição por vez
+    (como o loop antigo, sem o delay fixo) x requisições concorrentes das settings ANBIMA_*,
+    e a ANBIMA fora do ar com e sem circuit breaker. Não usa o banco.
+    """
+    from app.config import get_settings
+    from app.services.anbima_enrichment import AnbimaEnrichmentService
+    from app.utils import AsyncFetcher, TokenBucket, CircuitBreaker, executar_sync
+
+    settings = get_settings()
+    cod_ativos = [f"CRA{i:08d}" for i in range(qtd)]
+    cenarios = {
+        "sequencial": 1,
+        f"{settings.ANBIMA_MAX_CONCORRENCIA} concorrentes": settings.ANBIMA_MAX_CONCORRENCIA,
+    }
+
+    with servidor_stub_anbima(latencia_ms / 1000) as (url, tentativas):
+        servico = AnbimaEnrichmentService(base_url=url)
+        tempos = {}
+        for nome, concorrencia in cenarios.items():
+            tentativas.clear()
+            # Sem limite de taxa: mede só o efeito da concorrência (o bucket é testado à parte)
+            fetcher = AsyncFetcher(
+                max_concorrencia = concorrencia,
+                rate_limiter     = TokenBucket(1_000_000, concorrencia),
+                timeout          = settings.ANBIMA_TIMEOUT_SEGUNDOS,
+                max_tentativas   = settings.ANBIMA_MAX_TENTATIVAS,
+                backoff_base     = 0.05,
+                headers          = servico.HEADERS,
+            )
+            inicio = time.perf_counter()
+            resultados = executar_sync(servico.enrich_multiple_ativos_async(cod_ativos, fetcher))
+            tempos[nome] = time.perf_counter() - inicio
+
+            ok = sum(1 for dados in resultados.values() if dados and not dados.get("erro") and dados["devedor"])
+            print(f"⏱️  {nome}: {tempos[nome]:.2f}s ({qtd / tempos[nome]:.1f} ativos/s), "
+                  f"{ok}/{qtd} enriquecidos, {sum(tentativas.values()) - qtd} novas tentativas")
+            if ok != qtd:
+                print("❌ Nem todos os ativos foram enriquecidos")
+                sys.exit(1)
+
+        nome_concorrente = list(cenarios)[1]
+        print(f"🚀 Speedup: {tempos['sequencial'] / tempos[nome_concorrente]:.1f}x")
+
+    # ANBIMA fora do ar: sem circuito, cada ativo gasta todas as tentativas; com ele, falha na hora
+    with servidor_stub_anbima(latencia_ms / 1000, fora_do_ar=True) as (url, tentativas):
+        servico = AnbimaEnrichmentService(base_url=url)
+        for nome, circuito in {
+            "fora do ar, sem circuito": None,
+            "fora do ar, com circuito": CircuitBreaker(settings.ANBIMA_CIRCUITO_FALHAS, settings.ANBIMA_CIRCUITO_ABERTO_SEGUNDOS),
+        }.items():
+            tentativas.clear()
+            fetcher = AsyncFetcher(
+                max_concorrencia     = settings.ANBIMA_MAX_CONCORRENCIA,
+                rate_limiter         = TokenBucket(1_000_000, settings.ANBIMA_MAX_CONCORRENCIA),
+                timeout              = settings.ANBIMA_TIMEOUT_SEGUNDOS,
+                max_tentativas       = settings.ANBIMA_MAX_TENTATIVAS,
+                backoff_base         = 0.05,
+                headers              = servico.HEADERS,
+                circuit_breaker      = circuito,
+                concorrencia_inicial = settings.ANBIMA_CONCORRENCIA_INICIAL,
+            )
+            inicio = time.perf_counter()
+            resultados = executar_sync(servico.enrich_multiple_ativos_async(cod_ativos, fetcher))
+            tempo = time.perf_counter() - inicio
+
+            transitorios = sum(1 for dados in resultados.values() if dados and dados.get("transitorio"))
+            print(f"⏱️  {nome}: {tempo:.2f}s, {sum(tentativas.values())} requisições, "
+                  f"{transitorios}/{qtd} erros transitórios, concorrência final {int(fetcher.concorrencia.limite)}")
+            if transitorios != qtd:
+                print("❌ Erros da ANBIMA fora do ar deveriam ser transitórios")
+                sys.exit(1)
+
+    # Limite de taxa: N reservas seguidas devem levar ~(N - rajada) / taxa
+    bucket = TokenBucket(settings.ANBIMA_RATE_POR_SEGUNDO, settings.ANBIMA_RATE_RAJADA)
+    esperas = [bucket.reservar() for _ in range(settings.ANBIMA_RATE_RAJADA + 10)]
+    print(f"🪣 Token bucket ({settings.ANBIMA_RATE_POR_SEGUNDO}/s, rajada {settings.ANBIMA_RATE_RAJADA}): "
+          f"a {len(esperas)}ª requisição espera {esperas[-1]:.2f}s")
+
+
+def pagina_anbima_completa(i: int) -> bytes:
+    """Página do tamanho da real (menu, rodapé, scripts) com as características no meio"""
+    menu = "".join(f'<li class="menu-item"><a href="/pagina/{j}">Item {j}</a></li>' for j in range(300))
+    campos = "".join(
+        f'<div class="field-item"><span>{rotulo}:</span> <span>{valor}</span></div>'
+        for rotulo, valor in (("Data de emissão", "01/02/2024"), ("Data de vencimento", "01/02/2030"),
+                              ("Remuneração", f"CDI + {i % 5},{i % 10}%"), ("Quantidade", f"{1000 + i}"))
+    )
+    tabela = PAGINA_ANBIMA.decode("utf-8").split("<body>")[1].split("</body>")[0]
+    return (
+        '<html><head><meta charset="utf-8"><title>ANBIMA Data</title>'
+        f'<script>var dados = {{"id": {i}}};</script><style>.x {{ color: red; }}</style></head><body>'
+        f'<nav class="menu"><ul>{menu}</ul></nav><main><h1>CRA{i:08d}</h1>{campos}{tabela}</main>'
+        f'<footer><div class="rodape">{"<p>Texto institucional.</p>" * 50}</div></footer></body></html>'
+    ).encode("utf-8")
+
+
+def extrair_bs4_antigo(conteudo: bytes) -> dict:
+    """Extrator anterior (BeautifulSoup + html.parser, cadeia de if/elif), referência do benchmark"""
+    import re
+    from bs4 import BeautifulSoup
+    from app.utils.anbima_extrator import parse_boolean
+
+    def aplicar(dados, label, value):
+        if 'série' in label or 'serie' in label:
+            dados['serie'] = value
+        elif 'emissão' in label or 'emissao' in label:
+            dados['emissao'] = value
+        elif 'devedor' in label:
+            dados['devedor'] = value
+        elif 'securitizadora' in label:
+            dados['securitizadora'] = value
+        elif 'resgate' in label and 'antecipado' in label:
+            dados['resgate_antecipado'] = parse_boolean(value)
+        elif 'agente' in label and 'fiduciário' in label:
+            dados['agente_fiduciario'] = value
+
+    dados = dict.fromkeys(('serie', 'emissao', 'devedor', 'securitizadora', 'resgate_antecipado', 'agente_fiduciario'))
+    soup = BeautifulSoup(conteudo, 'html.parser')
+    for table in soup.find_all('table'):
+        for row in table.find_all('tr'):
+            cells = row.find_all(['td', 'th'])
+            if len(cells) >= 2:
+                aplicar(dados, cells[0].get_text(strip=True).lower(), cells[1].get_text(strip=True))
+    for div in soup.find_all('div', class_=re.compile(r'(info|data|field)', re.I)):
+        text = div.get_text(strip=True)
+        if ':' in text:
+            label, value = text.split(':', 1)
+            aplicar(dados, label.strip().lower(), value.strip())
+    return dados
+
+
+def benchmark_extrator(diretorio: str | None, repeticoes: int):
+    """
+    Throughput de extração das páginas de características: extrator antigo (BeautifulSoup)
+    x backends de app.utils.anbima_extrator, sobre páginas salvas em `diretorio` (*.html)
+    ou, sem diretório, um corpus sintético do tamanho das páginas reais. Não usa rede nem banco.
+    """
+    from pathlib import Path
+    from app.utils.anbima_extrator import EXTRATORES, extrair_campos
+
+    if diretorio:
+        corpus = [caminho.read_bytes() for caminho in sorted(Path(diretorio).glob("*.html"))]
+    else:
+        corpus = [pagina_anbima_completa(i) for i in range(200)]
+    if not corpus:
+        print(f"❌ Nenhuma página .html em {diretorio}")
+        sys.exit(1)
+    print(f"📄 {len(corpus)} páginas, {sum(map(len, corpus)) / len(corpus) / 1024:.0f} KiB em média")
+
+    funcoes = {"bs4 (antigo)": extrair_bs4_antigo}
+    for nome, classe in EXTRATORES.items():
+        try:
+            extrator = classe()
+        except RuntimeError as e:
+            print(f"⚠️  {nome}: {e}")
+            continue
+        funcoes[nome] = lambda conteudo, extrator=extrator: extrair_campos(extrator, conteudo)
+
+    referencia = [extrair_bs4_antigo(pagina) for pagina in corpus]
+    tempos = {}
+    for nome, funcao in funcoes.items():
+        divergentes = sum(1 for pagina, esperado in zip(corpus, referencia) if funcao(pagina) != esperado)
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            for pagina in corpus:
+                funcao(pagina)
+        tempos[nome] = time.perf_counter() - inicio
+        paginas_s = len(corpus) * repeticoes / tempos[nome]
+        print(f"⏱️  {nome}: {paginas_s:.0f} páginas/s, {divergentes} páginas com resultado diferente do antigo")
+
+    for nome in list(funcoes)[1:]:
+        print(f"🚀 Speedup {nome}: {tempos['bs4 (antigo)'] / tempos[nome]:.1f}x")
+
+
+def benchmark_concorrencia(qtd_pesadas: int, pesada_ms: float, qtd_leves: int = 200):
+    """
+    Latência de uma rota barata enquanto `qtd_pesadas` rotas pesadas rodam ao mesmo tempo:
+    consulta síncrona dentro de `async def` (bloqueia o event loop) x rota `def` (threadpool
+    limitado a API_THREADS). A consulta pesada é simulada por uma chamada bloqueante que
+    libera o GIL, como o psycopg2 esperando o banco. Não usa o banco.
+    """
+    import asyncio
+    import statistics
+    import httpx
+    from anyio import to_thread
+    from fastapi import FastAPI
+    from app.config import get_settings
+
+    settings = get_settings()
+    espera = pesada_ms / 1000
+
+    def consulta_pesada():
+        time.sleep(espera)
+        return {"ok": True}
+
+    app = FastAPI()
+
+    @app.get("/pesada/async")
+    async def pesada_async():
+        return consulta_pesada()
+
+    @app.get("/pesada/def")
+    def pesada_def():
+        return consulta_pesada()
+
+    @app.get("/leve")
+    def leve():
+        return {"ok": True}
+
+    async def cenario(rota_pesada: str):
+        to_thread.current_default_thread_limiter().total_tokens = settings.API_THREADS
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as client:
+            # Carga aberta: cada requisição leve tem um horário marcado e a latência conta
+            # a partir dele, então o tempo com o event loop travado entra na medida
+            async def medir_leve(horario: float):
+                await asyncio.sleep(max(0.0, horario - time.perf_counter()))
+                await client.get("/leve")
+                return (time.perf_counter() - horario) * 1000
+
+            inicio = time.perf_counter()
+            intervalo = espera * qtd_pesadas / qtd_leves
+            leves = [asyncio.create_task(medir_leve(inicio + i * intervalo)) for i in range(qtd_leves)]
+            pesadas = [asyncio.create_task(client.get(rota_pesada)) for _ in range(qtd_pesadas)]
+            await asyncio.gather(*pesadas)
+            return await asyncio.gather(*leves)
+
+    for nome, rota in {"async def + consulta síncrona": "/pesada/async", "def (threadpool)": "/pesada/def"}.items():
+        latencias = sorted(asyncio.run(cenario(rota)))
+        p99 = latencias[int(len(latencias) * 0.99) - 1]
+        print(f"⏱️  {nome}: rota leve p50 {statistics.median(latencias):.1f}ms, p99 {p99:.1f}ms, "
+              f"máx {latencias[-1]:.1f}ms ({qtd_pesadas} consultas de {pesada_ms:.0f}ms em paralelo)")
+
+
+BENCHMARKS = {
+    "persistencia": lambda args: benchmark_persistencia(int(args[0]) if args else 20000),
+    "explain": lambda args: benchmark_explain(int(args[0]) if args else 200000),
+    "overview": lambda args: benchmark_overview(int(args[0]) if args else 1000000),
+    "paginacao": lambda args: benchmark_paginacao(int(args[0]) if args else 500000),
+    "exportacao": lambda args: benchmark_exportacao(int(args[0]) if args else 1000000),
+    "extrator": lambda args: benchmark_extrator(args[0] if args else None, int(args[1]) if len(args) > 1 else 3),
+    "concorrencia": lambda args: benchmark_concorrencia(int(args[0]) if args else 20, float(args[1]) if len(args) > 1 else 200),
+    "anbima": lambda args: benchmark_anbima(int(args[0]) if args else 200, float(args[1]) if len(args) > 1 else 50),
+}
+
+
+def main():
+    """Função principal"""
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(__doc__)
+        print(f"Benchmarks disponíveis: {', '.join(BENCHMARKS)}")
+        return
+
+    print("🚀 Benchmark:", sys.argv[1])
+    print("=" * 50)
+    BENCHMARKS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from logging_config import logger
@@ -6,10 +8,37 @@ from app.controllers.analytics import analytics_routes
 from app.controllers.history import history_routes
 from app.controllers.enrichment import enrichment_routes
 from app.controllers.fundo_investimento import fundo_routes
+from app.controllers.job import job_routes
 from app.config import get_settings
-import app.config.db
+from app.provider import shutdown_process_pool
+from app.persiste.util import warm_indexador_cache
+from app.config.db import SessionLocal
+from app.services.cache_analytics import iniciar_ouvinte_versoes, parar_ouvinte_versoes
 
-app = FastAPI(debug=get_settings().DEBUG)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Rotas `def` (consultas síncronas do SQLAlchemy) rodam neste threadpool, fora do event loop;
+    # o limite acompanha o pool de conexões para nenhuma thread ficar esperando conexão
+    to_thread.current_default_thread_limiter().total_tokens = get_settings().API_THREADS
+
+    # Aquece o cache de indexadores (cd_indexador -> id_indexador) usado na ingestão
+    try:
+        with SessionLocal() as db:
+            logger.info(f"Cache de indexadores aquecido: {warm_indexador_cache(db)} indexadores")
+    except Exception as e:
+        logger.warning(f"Não foi possível aquecer o cache de indexadores: {e}")
+
+    # Versões dos dados (cache do analytics) atualizadas por LISTEN/NOTIFY
+    iniciar_ouvinte_versoes()
+
+    yield
+    parar_ouvinte_versoes()
+    # Encerra os processos de parsing criados sob demanda
+    shutdown_process_pool()
+
+
+app = FastAPI(debug=get_settings().DEBUG, lifespan=lifespan)
 
 logger.info("🚀 API inicializada com sucesso.")
 
@@ -28,6 +57,7 @@ app.include_router(analytics_routes)
 app.include_router(history_routes)
 app.include_router(enrichment_routes)
 app.include_router(fundo_routes)
+app.include_router(job_routes)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Workers das filas persistentes
+
+- ingestao: jobs de ingestão (uploads enviados com background=true), tb_ingestao_job
+- enriquecimento: enriquecimento ANBIMA em lotes, tb_fila_enriquecimento
+- agendador: enfileira a atualização dos ativos com enriquecimento antigo (janela fora do pico)
+
+As filas são consumidas com SELECT ... FOR UPDATE SKIP LOCKED, então vários
+processos podem rodar ao mesmo tempo sem pegar o mesmo item.
+
+Uso:
+    poetry run python worker.py [ingestao|enriquecimento|agendador]
+"""
+
+import signal
+import socket
+import os
+import sys
+import time
+from datetime import timedelta
+
+from logging_config import logger
+from app.config import get_settings
+from app.config.db import SessionLocal
+from app.persiste.util import claim_proximo_job, warm_indexador_cache
+from app.services.ingestao_job import processar_job, encerrar_jobs_abandonados_service
+from app.services.fila_enriquecimento import processar_lote_enriquecimento
+from app.services.agendador_enriquecimento import executar_agendamento
+
+# Sinaliza o fim do loop (SIGTERM/SIGINT): o job/lote em andamento termina antes de sair
+_parar = False
+
+
+def _pedir_parada(signum, frame):
+    global _parar
+    logger.info(f"Sinal {signum} recebido; encerrando após o job/lote atual")
+    _parar = True
+
+
+def reservar_job() -> int | None:
+    """
+    Reserva o próximo job da fila (commit imediato para liberar o lock da linha)
+
+    Antes, encerra com erro os jobs abandonados que o claim não retoma mais.
+    """
+    settings = get_settings()
+    with SessionLocal() as db:
+        encerrar_jobs_abandonados_service(db)
+        id_job = claim_proximo_job(
+            db,
+            timeout        = timedelta(seconds=settings.JOB_TIMEOUT_SEGUNDOS),
+            max_tentativas = settings.JOB_MAX_TENTATIVAS,
+        )
+        db.commit()
+        return id_job
+
+
+def proximo_job_ingestao() -> bool:
+    """Processa o próximo job de ingestão; False se a fila estiver vazia"""
+    id_job = reservar_job()
+    if id_job is None:
+        return False
+
+    logger.info(f"▶️  Processando job {id_job}")
+    processar_job(id_job)
+    return True
+
+
+def proximo_lote_enriquecimento() -> bool:
+    """Processa o próximo lote da fila de enriquecimento; False se a fila estiver vazia"""
+    return processar_lote_enriquecimento() > 0
+
+
+def rodada_agendador() -> bool:
+    """Uma rodada do agendador de atualização; sempre False (a próxima só após o intervalo)"""
+    with SessionLocal() as db:
+        executar_agendamento(db)
+    return False
+
+
+FILAS = {
+    "ingestao": proximo_job_ingestao,
+    "enriquecimento": proximo_lote_enriquecimento,
+    "agendador": rodada_agendador,
+}
+
+
+def main():
+    """Função principal"""
+    fila = sys.argv[1] if len(sys.argv) > 1 else "ingestao"
+    if fila not in FILAS:
+        print(__doc__)
+        sys.exit(1)
+
+    signal.signal(signal.SIGTERM, _pedir_parada)
+    signal.signal(signal.SIGINT, _pedir_parada)
+
+    nome = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"👷 Worker da fila {fila} iniciado ({nome})")
+
+    try:
+        with SessionLocal() as db:
+            warm_indexador_cache(db)
+    except Exception as e:
+        logger.warning(f"Não foi possível aquecer o cache de indexadores: {e}")
+
+    while not _parar:
+        try:
+            processou = FILAS[fila]()
+        except Exception as e:
+            logger.error(f"Erro ao consumir a fila {fila}: {e}")
+            processou = False
+
+        if not processou:
+            settings = get_settings()
+            time.sleep(settings.ENRIQUECIMENTO_AGENDADOR_SEGUNDOS if fila == "agendador" else settings.JOB_POLL_SEGUNDOS)
+
+    logger.info("👋 Worker encerrado")
+
+
+if __name__ == "__main__":
+    main()